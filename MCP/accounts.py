@@ -1,14 +1,33 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
+from collections import OrderedDict
+from typing import Literal
 import json
+import os
 from dotenv import load_dotenv
 from datetime import datetime
-from market import get_share_price
-from database import write_account, read_account, write_log
+from market import get_share_price, get_share_prices
+from database import (
+    create_account,
+    write_account,
+    read_account,
+    read_account_version,
+    reset_account,
+    write_positions,
+    write_trades,
+    StaleAccountError,
+    read_transactions,
+    read_valuation,
+    write_log,
+)
 
 load_dotenv(override=True)
 
 INITIAL_BALANCE = 10_000.0
 SPREAD = 0.002
+ACCOUNT_CACHE_SIZE = int(os.getenv("ACCOUNT_CACHE_SIZE", "64"))
+MAX_WRITE_ATTEMPTS = int(os.getenv("MAX_WRITE_ATTEMPTS", "25"))
+# Transactions included in a report; the full history is in list_transactions
+REPORT_TRANSACTIONS = int(os.getenv("REPORT_TRANSACTIONS", "20"))
 
 
 class Transaction(BaseModel):
@@ -25,142 +44,341 @@ class Transaction(BaseModel):
         return f"{abs(self.quantity)} shares of {self.symbol} at {self.price} each."
 
 
+class Order(BaseModel):
+    symbol: str
+    side: Literal["buy", "sell"]
+    quantity: int
+    rationale: str
+
+    def __repr__(self):
+        return f"{self.side} {self.quantity} shares of {self.symbol}"
+
+
+class Position(BaseModel):
+    symbol: str
+    quantity: int = 0
+    average_cost: float = 0.0
+    realized_pnl: float = 0.0
+
+    def buy(self, quantity: int, price: float):
+        """ Add shares to the position, folding their price into the average cost. """
+        total_cost = self.quantity * self.average_cost + quantity * price
+        self.quantity += quantity
+        self.average_cost = total_cost / self.quantity
+
+    def sell(self, quantity: int, price: float):
+        """ Remove shares from the position, realizing profit or loss against the average cost. """
+        self.realized_pnl += quantity * (price - self.average_cost)
+        self.quantity -= quantity
+        if self.quantity == 0:
+            self.average_cost = 0.0
+
+    def unrealized_pnl(self, price: float) -> float:
+        return self.quantity * (price - self.average_cost)
+
+
 class Account(BaseModel):
     name: str
     balance: float
     strategy: str
-    holdings: dict[str, int]
-    transactions: list[Transaction]
-    portfolio_value_time_series: list[tuple[str, float]]
+    net_invested: float
+    positions: dict[str, Position]
+    _transactions: list[Transaction] | None = PrivateAttr(default=None)
+    _version: int = PrivateAttr(default=0)
 
     @classmethod
     def get(cls, name: str):
         fields = read_account(name.lower())
         if not fields:
-            fields = {
-                "name": name.lower(),
-                "balance": INITIAL_BALANCE,
-                "strategy": "",
-                "holdings": {},
-                "transactions": [],
-                "portfolio_value_time_series": []
-            }
-            write_account(name, fields)
-        return cls(**fields)
-    
-    
-    def save(self):
-        write_account(self.name.lower(), self.model_dump())
+            create_account(name, INITIAL_BALANCE, "")
+            fields = read_account(name.lower())
+        if fields["net_invested"] is None:
+            account = cls(**{**fields, "net_invested": 0.0, "positions": {}})
+            account._version = fields["version"]
+            try:
+                account.rebuild_positions()
+            except StaleAccountError:
+                # Another process rebuilt or wrote the account first; load its result instead
+                return cls.get(name)
+            return account
+        account = cls(**fields)
+        account._version = fields["version"]
+        return account
+
+    @property
+    def version(self) -> int:
+        """ The version of the stored account that this object reflects. """
+        return self._version
+
+    @property
+    def holdings(self) -> dict[str, int]:
+        """ The quantity held of each symbol, excluding positions that have been sold out. """
+        return {symbol: position.quantity for symbol, position in self.positions.items() if position.quantity}
+
+    @property
+    def transactions(self) -> list[Transaction]:
+        """ The account's transactions, loaded from the database on first access. """
+        if self._transactions is None:
+            self._transactions = [Transaction(**row) for row in read_transactions(self.name)]
+        return self._transactions
+
+    def refresh(self):
+        """ Reload this account from the database, discarding any changes that were not written. """
+        latest = Account.get(self.name)
+        for field in type(self).model_fields:
+            setattr(self, field, getattr(latest, field))
+        self._transactions = None
+        self._version = latest.version
+
+    def _retry(self, attempt):
+        """
+        Optimistic concurrency control: run attempt(), which changes this account and writes it
+        conditionally on the version it was read at, until a write succeeds without conflict.
+        When another writer committed first, the account is reloaded and attempt() runs again,
+        re-validating against the latest balance and holdings.
+        """
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            try:
+                return attempt()
+            except StaleAccountError:
+                self.refresh()
+        raise StaleAccountError(f"Gave up writing account {self.name} after {MAX_WRITE_ATTEMPTS} conflicting writes")
+
+    def save(self, balance: float, strategy: str):
+        """ Write a new balance and strategy, and take them on only once the write has committed. """
+        self._version = write_account(self.name.lower(), balance, strategy, self._version)
+        self.balance = balance
+        self.strategy = strategy
 
     def reset(self, strategy: str):
+        self._version = reset_account(self.name, INITIAL_BALANCE, strategy)
         self.balance = INITIAL_BALANCE
         self.strategy = strategy
-        self.holdings = {}
-        self.transactions = []
-        self.portfolio_value_time_series = []
-        self.save()
+        self.net_invested = 0.0
+        self.positions = {}
+        self._transactions = []
+
+    def apply_transaction(self, transaction: Transaction):
+        """ Update the position and net invested amount for a transaction, in O(1). """
+        position = self.positions.setdefault(transaction.symbol, Position(symbol=transaction.symbol))
+        if transaction.quantity > 0:
+            position.buy(transaction.quantity, transaction.price)
+        else:
+            position.sell(-transaction.quantity, transaction.price)
+        self.net_invested += transaction.total()
+
+    def rebuild_positions(self):
+        """ Recompute every position by replaying the transaction history, and persist the result. """
+        self.net_invested = 0.0
+        self.positions = {}
+        for transaction in self.transactions:
+            self.apply_transaction(transaction)
+        positions = [position.model_dump() for position in self.positions.values()]
+        self._version = write_positions(self.name, self.net_invested, positions, self._version)
+
+    def commit_transactions(self, transactions: list[Transaction]):
+        """
+        Apply trades to a copy of the balance and positions, then write them all in one SQLite
+        transaction that only succeeds if nobody else has written the account since it was read.
+        The account takes on the new state only once the write has committed, so a failed write,
+        whatever the error, leaves it as stored.
+        """
+        staged = self.model_copy(update={"positions": {symbol: position.model_copy() for symbol, position in self.positions.items()}})
+        for transaction in transactions:
+            staged.apply_transaction(transaction)
+            staged.balance -= transaction.total()
+        symbols = dict.fromkeys(transaction.symbol for transaction in transactions)
+        self._version = write_trades(
+            self.name,
+            staged.balance,
+            staged.net_invested,
+            [staged.positions[symbol].model_dump() for symbol in symbols],
+            [transaction.model_dump() for transaction in transactions],
+            self._version,
+        )
+        self.balance = staged.balance
+        self.net_invested = staged.net_invested
+        self.positions = staged.positions
+        if self._transactions is not None:
+            self._transactions.extend(transactions)
 
     def deposit(self, amount: float):
         """ Deposit funds into the account. """
         if amount <= 0:
             raise ValueError("Deposit amount must be positive.")
-        self.balance += amount
+
+        def attempt():
+            self.save(self.balance + amount, self.strategy)
+
+        self._retry(attempt)
         print(f"Deposited ${amount}. New balance: ${self.balance}")
-        self.save()
 
     def withdraw(self, amount: float):
         """ Withdraw funds from the account, ensuring it doesn't go negative. """
-        if amount > self.balance:
-            raise ValueError("Insufficient funds for withdrawal.")
-        self.balance -= amount
+        def attempt():
+            if amount > self.balance:
+                raise ValueError("Insufficient funds for withdrawal.")
+            self.save(self.balance - amount, self.strategy)
+
+        self._retry(attempt)
         print(f"Withdrew ${amount}. New balance: ${self.balance}")
-        self.save()
 
-    def buy_shares(self, symbol: str, quantity: int, rationale: str) -> str:
-        """ Buy shares of a stock if sufficient funds are available. """
-        price = get_share_price(symbol)
+    def buy_shares(self, symbol: str, quantity: int, rationale: str, price: float | None = None) -> str:
+        """ Buy shares of a stock if sufficient funds are available, at the given market price or else the current one. """
+        price = get_share_price(symbol) if price is None else price
         buy_price = price * (1 + SPREAD)
         total_cost = buy_price * quantity
-        
-        if total_cost > self.balance:
-            raise ValueError("Insufficient funds to buy shares.")
-        elif price==0:
-            raise ValueError(f"Unrecognized symbol {symbol}")
-        
-        # Update holdings
-        self.holdings[symbol] = self.holdings.get(symbol, 0) + quantity
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        # Record transaction
-        transaction = Transaction(symbol=symbol, quantity=quantity, price=buy_price, timestamp=timestamp, rationale=rationale)
-        self.transactions.append(transaction)
-        
-        # Update balance
-        self.balance -= total_cost
-        self.save()
+
+        def attempt():
+            if total_cost > self.balance:
+                raise ValueError("Insufficient funds to buy shares.")
+            elif price==0:
+                raise ValueError(f"Unrecognized symbol {symbol}")
+
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # Record transaction, update holdings and balance
+            transaction = Transaction(symbol=symbol, quantity=quantity, price=buy_price, timestamp=timestamp, rationale=rationale)
+            self.commit_transactions([transaction])
+
+        self._retry(attempt)
         write_log(self.name, "account", f"Bought {quantity} of {symbol}")
         return "Completed. Latest details:\n" + self.report()
 
-    def sell_shares(self, symbol: str, quantity: int, rationale: str) -> str:
-        """ Sell shares of a stock if the user has enough shares. """
+    def sell_shares(self, symbol: str, quantity: int, rationale: str, price: float | None = None) -> str:
+        """ Sell shares of a stock if the user has enough shares, at the given market price or else the current one. """
         if self.holdings.get(symbol, 0) < quantity:
             raise ValueError(f"Cannot sell {quantity} shares of {symbol}. Not enough shares held.")
         
-        price = get_share_price(symbol)
+        price = get_share_price(symbol) if price is None else price
         sell_price = price * (1 - SPREAD)
-        total_proceeds = sell_price * quantity
-        
-        # Update holdings
-        self.holdings[symbol] -= quantity
-        
-        # If shares are completely sold, remove from holdings
-        if self.holdings[symbol] == 0:
-            del self.holdings[symbol]
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        # Record transaction
-        transaction = Transaction(symbol=symbol, quantity=-quantity, price=sell_price, timestamp=timestamp, rationale=rationale)  # negative quantity for sell
-        self.transactions.append(transaction)
-
-        # Update balance
-        self.balance += total_proceeds
-        self.save()
+
+        def attempt():
+            if self.holdings.get(symbol, 0) < quantity:
+                raise ValueError(f"Cannot sell {quantity} shares of {symbol}. Not enough shares held.")
+
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # Record transaction, update holdings and balance
+            transaction = Transaction(symbol=symbol, quantity=-quantity, price=sell_price, timestamp=timestamp, rationale=rationale)  # negative quantity for sell
+            self.commit_transactions([transaction])
+
+        self._retry(attempt)
         write_log(self.name, "account", f"Sold {quantity} of {symbol}")
         return "Completed. Latest details:\n" + self.report()
 
-    def calculate_portfolio_value(self):
-        """ Calculate the total value of the user's portfolio. """
+    def execute_orders(self, orders: list[Order], prices: dict[str, float] | None = None) -> str:
+        """
+        Buy and sell several stocks at once, at the given market prices or else the current ones.
+        Orders are filled in the order given, each against the balance and holdings left by the
+        ones before it, and written together in one transaction: if any order cannot be filled,
+        none are.
+        """
+        if not orders:
+            raise ValueError("No orders to execute.")
+        prices = get_share_prices([order.symbol for order in orders]) if prices is None else prices
+
+        def reject(number: int, order: Order, reason: str):
+            raise ValueError(f"Order {number} ({order!r}): {reason} None of the orders were executed.")
+
+        def attempt():
+            balance = self.balance
+            holdings = dict(self.holdings)
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            transactions = []
+            for number, order in enumerate(orders, 1):
+                price = prices.get(order.symbol, 0.0)
+                if order.quantity <= 0:
+                    reject(number, order, "Quantity must be positive.")
+                elif price == 0:
+                    reject(number, order, f"Unrecognized symbol {order.symbol}.")
+                if order.side == "buy":
+                    price *= 1 + SPREAD
+                    if price * order.quantity > balance:
+                        reject(number, order, "Insufficient funds to buy shares.")
+                    quantity = order.quantity
+                else:
+                    price *= 1 - SPREAD
+                    if holdings.get(order.symbol, 0) < order.quantity:
+                        reject(number, order, "Not enough shares held.")
+                    quantity = -order.quantity
+                balance -= quantity * price
+                holdings[order.symbol] = holdings.get(order.symbol, 0) + quantity
+                transactions.append(Transaction(symbol=order.symbol, quantity=quantity, price=price, timestamp=timestamp, rationale=order.rationale))
+            self.commit_transactions(transactions)
+
+        self._retry(attempt)
+        write_log(self.name, "account", f"Executed {len(orders)} orders: " + ", ".join(f"{order!r}" for order in orders))
+        return f"Completed {len(orders)} orders. Latest details:\n" + self.report()
+
+    def get_prices(self) -> dict[str, float]:
+        """ Look up the current price of every symbol held, in one bulk request. """
+        return get_share_prices(self.holdings)
+
+    def calculate_portfolio_value(self, prices: dict[str, float] | None = None):
+        """ Calculate the total value of the user's portfolio, valuing symbols missing from prices at cost. """
+        prices = self.get_prices() if prices is None else prices
         total_value = self.balance
-        for symbol, quantity in self.holdings.items():
-            total_value += get_share_price(symbol) * quantity
+        for symbol, position in self.positions.items():
+            total_value += prices.get(symbol, position.average_cost) * position.quantity
         return total_value
 
     def calculate_profit_loss(self, portfolio_value: float):
         """ Calculate profit or loss from the initial spend. """
-        initial_spend = sum(transaction.total() for transaction in self.transactions)
-        return portfolio_value - initial_spend - self.balance
+        return portfolio_value - self.net_invested - self.balance
+
+    def calculate_position_profit_loss(self, prices: dict[str, float]) -> dict[str, dict]:
+        """ Break profit or loss down by symbol, including positions that have been sold out. """
+        return {
+            symbol: {
+                "quantity": position.quantity,
+                "average_cost": position.average_cost,
+                "realized_pnl": position.realized_pnl,
+                "unrealized_pnl": position.unrealized_pnl(prices.get(symbol, position.average_cost)) if position.quantity else 0.0,
+            }
+            for symbol, position in self.positions.items()
+        }
 
     def get_holdings(self):
         """ Report the current holdings of the user. """
         return self.holdings
 
-    def get_profit_loss(self):
-        """ Report the user's profit or loss at any point in time. """
-        return self.calculate_profit_loss()
+    def get_profit_loss(self, prices: dict[str, float] | None = None) -> dict:
+        """ Report the user's profit or loss at any point in time, in total and per symbol. """
+        prices = self.get_prices() if prices is None else prices
+        positions = self.calculate_position_profit_loss(prices)
+        return {
+            "positions": positions,
+            "total_realized_pnl": sum(position["realized_pnl"] for position in positions.values()),
+            "total_unrealized_pnl": sum(position["unrealized_pnl"] for position in positions.values()),
+            "total_profit_loss": self.calculate_profit_loss(self.calculate_portfolio_value(prices)),
+        }
 
     def list_transactions(self):
         """ List all transactions made by the user. """
         return [transaction.model_dump() for transaction in self.transactions]
     
+    def snapshot(self) -> dict:
+        """
+        Read-only view of the account: balance, holdings and profit or loss valued at the prices
+        recorded by the last run of the valuation job, with the latest REPORT_TRANSACTIONS
+        transactions. Never looks up prices or writes anything; symbols bought since that run are
+        valued at cost until the next one.
+        """
+        valuation = read_valuation(self.name) or {"datetime": None, "prices": {}}
+        prices = valuation["prices"]
+        portfolio_value = self.calculate_portfolio_value(prices)
+        data = self.model_dump(exclude={"positions"})
+        data["holdings"] = self.holdings
+        data["positions"] = self.calculate_position_profit_loss(prices)
+        data["transactions"] = [transaction.model_dump() for transaction in self.transactions[-REPORT_TRANSACTIONS:]]
+        data["transaction_count"] = len(self.transactions)
+        data["total_portfolio_value"] = portfolio_value
+        data["total_profit_loss"] = self.calculate_profit_loss(portfolio_value)
+        data["valued_at"] = valuation["datetime"]
+        return data
+
     def report(self) -> str:
         """ Return a json string representing the account.  """
-        portfolio_value = self.calculate_portfolio_value()
-        self.portfolio_value_time_series.append((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), portfolio_value))
-        self.save()
-        pnl = self.calculate_profit_loss(portfolio_value)
-        data = self.model_dump()
-        data["total_portfolio_value"] = portfolio_value
-        data["total_profit_loss"] = pnl
-        write_log(self.name, "account", f"Retrieved account details")
-        return json.dumps(data)
+        return json.dumps(self.snapshot())
     
     def get_strategy(self) -> str:
         """ Return the strategy of the account """
@@ -169,11 +387,59 @@ class Account(BaseModel):
     
     def change_strategy(self, strategy: str) -> str:
         """ At your discretion, if you choose to, call this to change your investment strategy for the future """
-        self.strategy = strategy
-        self.save()
+        def attempt():
+            self.save(self.balance, strategy)
+
+        self._retry(attempt)
         write_log(self.name, "account", f"Changed strategy")
         return "Changed strategy"
 
+class AccountCache:
+    """
+    LRU cache of hydrated Account objects, keyed by name.
+
+    A cached account is only returned while its version matches the version column in the
+    database, which every write advances; a write from any other process is therefore seen
+    as a miss, and the account is reloaded.
+    """
+
+    def __init__(self, max_size: int = ACCOUNT_CACHE_SIZE):
+        self.max_size = max_size
+        self.accounts: OrderedDict[str, Account] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str) -> Account:
+        key = name.lower()
+        account = self.accounts.get(key)
+        if account is not None and account.version == read_account_version(key):
+            self.hits += 1
+            self.accounts.move_to_end(key)
+            return account
+        self.misses += 1
+        account = Account.get(key)
+        self.accounts[key] = account
+        self.accounts.move_to_end(key)
+        if len(self.accounts) > self.max_size:
+            self.accounts.popitem(last=False)
+        return account
+
+    def clear(self):
+        self.accounts.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.accounts),
+            "max_size": self.max_size,
+        }
+
+
+account_cache = AccountCache()
+
 # Example of usage:
 if __name__ == "__main__":
     account = Account("John Doe")
@@ -0,0 +1,84 @@
+"""
+Benchmark of accounts MCP server tool-call latency with the Account cache cold and warm.
+
+Seeds a throwaway database with accounts that each have a long transaction history, then
+calls the get_balance and get_holdings tools in-process through the FastMCP tool manager:
+once with the cache cleared before every call (cold), and once with it populated (warm).
+
+Usage: uv run bench_accounts_cache.py [--accounts 4] [--transactions 2000] [--calls 500]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+
+
+def seed(accounts: int, transactions: int) -> list[str]:
+    from database import get_connection, INSERT_TRANSACTION
+    from accounts import Account
+
+    names = [f"trader{i}" for i in range(accounts)]
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for name in names:
+        Account.get(name).reset("Benchmark strategy")
+        with get_connection() as conn:
+            conn.executemany(
+                INSERT_TRANSACTION,
+                [
+                    (name, f"SYM{i % 20}", -1 if (i // 20) % 3 == 2 else 1, 100.0, timestamp, "Benchmark trade")
+                    for i in range(transactions)
+                ],
+            )
+        Account.get(name).rebuild_positions()
+    return names
+
+
+async def mean_latency_us(mcp, tool: str, names: list[str], calls: int, clear=None) -> float:
+    elapsed = 0.0
+    for i in range(calls):
+        if clear:
+            clear()
+        start = time.perf_counter()
+        await mcp.call_tool(tool, {"name": names[i % len(names)]})
+        elapsed += time.perf_counter() - start
+    return elapsed / calls * 1_000_000
+
+
+async def run(args):
+    names = seed(args.accounts, args.transactions)
+    from accounts import account_cache
+    from accounts_server import mcp
+
+    print(f"{'tool':<14}{'cold us/call':>14}{'warm us/call':>14}{'speedup':>10}")
+    for tool in ("get_balance", "get_holdings"):
+        cold = await mean_latency_us(mcp, tool, names, args.calls, clear=account_cache.clear)
+        await mean_latency_us(mcp, tool, names, len(names))
+        warm = await mean_latency_us(mcp, tool, names, args.calls)
+        print(f"{tool:<14}{cold:>14,.0f}{warm:>14,.0f}{cold / warm:>9.1f}x")
+    print(f"cache stats: {account_cache.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=4)
+    parser.add_argument("--transactions", type=int, default=2000, help="history length per account")
+    parser.add_argument("--calls", type=int, default=500, help="tool calls per measurement")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            asyncio.run(run(args))
+        finally:
+            from database import log_writer, close_connection
+            log_writer.close()
+            close_connection()
+            os.chdir(here)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark for the SQLite layer in database.py.
+
+Compares the original pattern (a fresh sqlite3.connect per call, rollback journal)
+with the pooled, WAL-mode connection manager, and reports ops/sec for account writes
+and log inserts. Runs against a throwaway database in a temporary directory.
+
+Usage: uv run bench_database.py [--ops 2000]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+ACCOUNT = {
+    "name": "bench",
+    "balance": 10_000.0,
+    "strategy": "Buy low, sell high",
+    "holdings": {"AAPL": 10, "MSFT": 5},
+    "transactions": [],
+    "portfolio_value_time_series": [],
+}
+
+
+def write_account_unpooled(path, name, account_dict):
+    with sqlite3.connect(path) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO accounts (name, account)
+            VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET account=excluded.account
+        ''', (name.lower(), json.dumps(account_dict)))
+        conn.commit()
+
+
+def write_log_unpooled(path, name, type, message):
+    with sqlite3.connect(path) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO logs (name, datetime, type, message)
+            VALUES (?, datetime('now'), ?, ?)
+        ''', (name.lower(), type, message))
+        conn.commit()
+
+
+def ops_per_second(fn, ops: int, finish=None) -> float:
+    start = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    if finish:
+        finish()
+    return ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ops", type=int, default=2000, help="operations per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        import database
+        database.create_account("bench", ACCOUNT["balance"], ACCOUNT["strategy"])
+        # Each write is conditional on the version the previous one returned, as Account.save does
+        version = [database.read_account_version("bench")]
+
+        def write_account_pooled(i):
+            version[0] = database.write_account("bench", ACCOUNT["balance"], ACCOUNT["strategy"], version[0])
+
+        before_path = os.path.join(workdir, "before.db")
+        with sqlite3.connect(before_path) as conn:
+            conn.execute('CREATE TABLE accounts (name TEXT PRIMARY KEY, account TEXT)')
+            conn.execute('''
+                CREATE TABLE logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT, datetime DATETIME, type TEXT, message TEXT
+                )
+            ''')
+
+        results = {
+            "write_account": (
+                ops_per_second(lambda i: write_account_unpooled(before_path, "bench", ACCOUNT), args.ops),
+                ops_per_second(write_account_pooled, args.ops),
+            ),
+            "write_log": (
+                ops_per_second(lambda i: write_log_unpooled(before_path, "bench", "trace", f"Span {i}"), args.ops),
+                ops_per_second(lambda i: database.write_log("bench", "trace", f"Span {i}"), args.ops, database.flush_logs),
+            ),
+        }
+        database.log_writer.close()
+        database.close_connection()
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    print(f"{'operation':<16}{'before ops/s':>14}{'after ops/s':>14}{'speedup':>10}")
+    for operation, (before, after) in results.items():
+        print(f"{operation:<16}{before:>14,.0f}{after:>14,.0f}{after / before:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
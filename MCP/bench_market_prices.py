@@ -0,0 +1,107 @@
+"""
+Benchmark of a cold end-of-day price lookup: the first lookup for one symbol in a new process,
+as an MCP server makes after it starts.
+
+Compares the original layout, where a day of closes is one JSON object in the market table that
+is parsed whole and kept in an lru_cache, with the market_prices table, where a lookup reads one
+row by primary key. Seeds a throwaway database with a synthetic grouped-daily result, then runs
+each lookup in a fresh subprocess and reports its latency and the Python memory it allocated
+(peak) and still holds afterwards (retained), from tracemalloc.
+
+Usage: uv run bench_market_prices.py [--tickers 10000] [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from functools import lru_cache
+
+SYMBOL = "T04711"
+
+
+@lru_cache(maxsize=2)
+def get_market_for_prior_date_json(today):
+    with sqlite3.connect("before.db") as conn:
+        row = conn.execute("SELECT data FROM market WHERE date = ?", (today,)).fetchone()
+    return json.loads(row[0])
+
+
+def lookup_before(today: str) -> float:
+    return get_market_for_prior_date_json(today).get(SYMBOL, 0.0)
+
+
+def child(mode: str) -> None:
+    today = datetime.now().date().strftime("%Y-%m-%d")
+    if mode == "after":
+        import market
+        from database import close_connection
+        # Like the original lookup, include opening the connection
+        close_connection()
+        lookup = market.get_share_price_polygon_eod
+    else:
+        lookup = lambda symbol: lookup_before(today)
+    tracemalloc.start()
+    start = time.perf_counter()
+    price = lookup(SYMBOL)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    print(json.dumps({"price": price, "latency_us": elapsed * 1_000_000, "retained_kb": retained / 1024, "peak_kb": peak / 1024}))
+
+
+def seed(tickers: int) -> None:
+    from database import write_market_prices, close_connection
+
+    today = datetime.now().date().strftime("%Y-%m-%d")
+    bars = [(f"T{i:05d}", 100.0 + i % 7, 101.0 + i % 7, 99.0 + i % 7, 100.5 + i % 7, 1_000_000.0) for i in range(tickers)]
+    write_market_prices(today, "2000-01-03", bars)
+    close_connection()
+    with sqlite3.connect("before.db") as conn:
+        conn.execute("CREATE TABLE market (date TEXT PRIMARY KEY, data TEXT)")
+        conn.execute("INSERT INTO market VALUES (?, ?)", (today, json.dumps({bar[0]: bar[4] for bar in bars})))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=10_000, help="tickers in the synthetic trading day")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per layout; medians are reported")
+    parser.add_argument("--child", choices=["before", "after"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child)
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([here, os.environ.get("PYTHONPATH", "")])}
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            seed(args.tickers)
+            for mode in ("before", "after"):
+                runs = [
+                    json.loads(subprocess.run(
+                        [sys.executable, os.path.join(here, __file__), "--child", mode],
+                        capture_output=True, text=True, check=True, env=env,
+                    ).stdout.strip().splitlines()[-1])
+                    for _ in range(args.runs)
+                ]
+                results[mode] = {key: statistics.median(run[key] for run in runs) for key in ("latency_us", "peak_kb", "retained_kb")}
+        finally:
+            os.chdir(here)
+
+    print(f"cold lookup of one symbol in a day of {args.tickers:,} tickers, median of {args.runs} processes")
+    print(f"{'layout':<24}{'latency us':>12}{'peak KiB':>12}{'retained KiB':>14}")
+    for mode, label in (("before", "JSON blob per day"), ("after", "market_prices table")):
+        r = results[mode]
+        print(f"{label:<24}{r['latency_us']:>12,.0f}{r['peak_kb']:>12,.0f}{r['retained_kb']:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
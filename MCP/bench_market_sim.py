@@ -0,0 +1,63 @@
+"""
+Benchmark of the offline market simulator in market_sim.py.
+
+Times a year of daily closes, a full session of minute ticks, and a point-in-time price lookup
+for a universe of synthetic symbols, each in one vectorized pass. Also checks that the
+simulator is deterministic: repeating a request, or asking for a subset of the symbols,
+gives identical prices.
+
+Usage: uv run bench_market_sim.py [--symbols 5000] [--seed 42]
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from market_sim import MarketSimulator, NEW_YORK, trading_date, trading_day
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    simulator = MarketSimulator(args.seed)
+    symbols = [f"T{i:05d}" for i in range(args.symbols)]
+    day = trading_date(trading_day(date.today() - timedelta(days=1)))
+    noon = datetime(day.year, day.month, day.day, 12, 0, tzinfo=NEW_YORK)
+
+    (_, closes), closes_s = timed(lambda: simulator.closes(symbols, day - timedelta(days=365), day))
+    ticks, ticks_s = timed(lambda: simulator.intraday(symbols, day))
+    prices, prices_s = timed(lambda: simulator.prices(symbols, noon))
+
+    print(f"{'request':<32}{'values':>12}{'seconds':>10}{'values/s':>14}")
+    for label, values, seconds in (
+        ("daily closes, 1 year", closes.size, closes_s),
+        ("minute ticks, 1 session", ticks.size, ticks_s),
+        (f"prices at {noon:%H:%M} on {day}", len(prices), prices_s),
+    ):
+        print(f"{label:<32}{values:>12,}{seconds:>10.3f}{values / seconds:>14,.0f}")
+
+    subset = symbols[::7]
+    problems = []
+    if not np.array_equal(simulator.intraday(symbols, day), ticks):
+        problems.append("repeating a request changed the prices")
+    if simulator.prices(subset, noon) != {symbol: prices[symbol] for symbol in subset}:
+        problems.append("asking for a subset of the symbols changed their prices")
+    for problem in problems:
+        print(f"FAILED {problem}")
+    print("FAILED" if problems else "OK: prices are deterministic")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark of the MCP server start-up in trading cycles, with servers started for each trader on
+each cycle, as traders.py used to, and with the shared fleet from mcp_fleet.py.
+
+Each simulated cycle has --traders traders that each connect to the accounts, push and market
+servers plus a per-trader server (a second accounts server, standing in for a trader's memory
+server), list the tools of each and make one tool call on each, all at once. Runs the servers
+with this interpreter against a throwaway database, so the start-up measured is only the
+process start and handshake; uvx and npx, which resolve their packages first, add to that.
+
+Then checks supervision: kills every server process and makes sure the supervisor restarts them.
+
+Usage: uv run bench_mcp_fleet.py [--traders 4] [--cycles 3]
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import tempfile
+import time
+from contextlib import AsyncExitStack
+
+from agents.mcp import MCPServerStdio
+
+import mcp_fleet
+from mcp_fleet import close_fleet, get_fleet
+
+
+def trader_params(here: str, env: dict, name: str) -> list[dict]:
+    def server(script: str, **extra) -> dict:
+        return {"command": sys.executable, "args": [os.path.join(here, script)], "env": {**env, **extra}}
+
+    return [
+        server("accounts_server.py"),
+        server("push_server.py"),
+        server("market_server.py"),
+        server("accounts_server.py", MEMORY_OWNER=name),
+    ]
+
+
+async def use(servers: list, name: str) -> None:
+    for server in servers:
+        tools = await server.list_tools()
+        if "accounts_server" in server.name:
+            await server.call_tool("get_balance", {"name": name})
+        elif "market_server" in server.name:
+            await server.call_tool("lookup_share_price", {"symbol": "AAPL"})
+        elif not tools:
+            raise RuntimeError(f"{server.name} has no tools")
+
+
+async def trader_unshared(params: list[dict], name: str) -> float:
+    start = time.perf_counter()
+    async with AsyncExitStack() as stack:
+        servers = [
+            await stack.enter_async_context(MCPServerStdio(p, client_session_timeout_seconds=120))
+            for p in params
+        ]
+        connected = time.perf_counter() - start
+        await use(servers, name)
+    return connected
+
+
+async def trader_fleet(params: list[dict], name: str) -> float:
+    start = time.perf_counter()
+    servers = await get_fleet().servers(params)
+    connected = time.perf_counter() - start
+    await use(servers, name)
+    return connected
+
+
+def child_pids() -> list[int]:
+    """Direct child processes of this one, from /proc"""
+    pids = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) == os.getpid():
+                        pids.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                pass
+    return pids
+
+
+async def run(args, here: str, env: dict) -> tuple[list, list[str]]:
+    names = [f"trader{i}" for i in range(args.traders)]
+    rows = []
+    problems = []
+    for label, trader in (("started per trader per cycle", trader_unshared), ("shared fleet", trader_fleet)):
+        for cycle in range(1, args.cycles + 1):
+            start = time.perf_counter()
+            waits = await asyncio.gather(*[trader(trader_params(here, env, name), name) for name in names])
+            rows.append((label, cycle, max(waits), time.perf_counter() - start))
+
+    fleet = get_fleet()
+    expected = 3 + args.traders
+    if fleet.starts() != expected:
+        problems.append(f"the fleet started {fleet.starts()} servers over {args.cycles} cycles, expected {expected}")
+    print(fleet.report())
+
+    if os.path.isdir("/proc"):
+        for pid in child_pids():
+            os.kill(pid, signal.SIGKILL)
+        await asyncio.sleep(mcp_fleet.CHECK_EVERY_SECONDS * 2 + 1)
+        try:
+            await asyncio.gather(*[trader_fleet(trader_params(here, env, name), name) for name in names])
+            restarts = fleet.starts() - expected
+            print(f"{'ok' if restarts == expected else 'FAIL':<5}after every server process was killed, the supervisor restarted {restarts} of {expected}")
+            if restarts != expected:
+                problems.append(f"{restarts} restarts after the servers were killed, expected {expected}")
+        except Exception as e:
+            problems.append(f"the cycle after the servers were killed failed: {e!r}")
+    await close_fleet()
+    if child_pids():
+        problems.append("server processes were left running after the fleet was closed")
+    return rows, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--traders", type=int, default=4, help="traders in each cycle")
+    parser.add_argument("--cycles", type=int, default=3, help="cycles per pattern")
+    args = parser.parse_args()
+
+    mcp_fleet.CHECK_EVERY_SECONDS = 1.0
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            # The servers would otherwise log every request to stderr
+            env = {"MARKET_DATA_PROVIDER": "simulator", "FASTMCP_LOG_LEVEL": "WARNING"}
+            rows, problems = asyncio.run(run(args, here, env))
+        finally:
+            os.chdir(here)
+
+    print(f"{args.traders} traders, each with {len(trader_params(here, {}, ''))} servers")
+    print(f"{'servers':<30}{'cycle':>7}{'wait for servers s':>20}{'cycle s':>10}")
+    for label, cycle, wait, elapsed in rows:
+        print(f"{label:<30}{cycle:>7}{wait:>20.2f}{elapsed:>10.2f}")
+    for problem in problems:
+        print(f"FAILED {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark of a trader's MCP setup with the accounts, push and market servers separately and
+with the single mcp_gateway.py server.
+
+Each cycle, --traders traders each connect to their servers over stdio, run the initialize
+handshake and list the tools of each, all at once, as every cycle did before the server fleet;
+with the fleet the same setup happens once, on the first cycle. Reports the connections and
+list_tools calls per cycle and how long the setup took.
+
+Then checks that the gateway's tools share one price cache: a trade placed right after a price
+lookup has to be filled from the lookup's cache entry, not a fresh fetch. The simulator needs
+no cache, so this runs against a local fake Polygon server.
+
+Runs the servers with this interpreter, on the market simulator and a throwaway database.
+
+Usage: uv run bench_mcp_gateway.py [--traders 4] [--cycles 2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import AsyncExitStack
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from fake_polygon import start_process
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# The servers would otherwise log every request to stderr
+ENV = {**os.environ, "MARKET_DATA_PROVIDER": "simulator", "FASTMCP_LOG_LEVEL": "WARNING"}
+SEPARATE = ["accounts_server.py", "push_server.py", "market_server.py"]
+GATEWAY = ["mcp_gateway.py"]
+
+
+async def connect(stack: AsyncExitStack, script: str, workdir: str, env: dict = ENV) -> ClientSession:
+    params = StdioServerParameters(command=sys.executable, args=[os.path.join(HERE, script)], env=env, cwd=workdir)
+    devnull = stack.enter_context(open(os.devnull, "w"))
+    read, write = await stack.enter_async_context(stdio_client(params, errlog=devnull))
+    session = await stack.enter_async_context(ClientSession(read, write))
+    await session.initialize()
+    return session
+
+
+async def trader_setup(scripts: list[str], workdir: str) -> tuple[float, int]:
+    """Connect to the servers and list their tools, as the agent does; the time it took and the tools"""
+    start = time.perf_counter()
+    async with AsyncExitStack() as stack:
+        sessions = [await connect(stack, script, workdir) for script in scripts]
+        tools = [tool for session in sessions for tool in (await session.list_tools()).tools]
+        return time.perf_counter() - start, len(tools)
+
+
+async def shared_cache(workdir: str) -> tuple[int, int]:
+    """Price cache hits on the gateway from a lookup and then a trade of the same symbol"""
+    url, fake = start_process()
+    env = {**ENV, "MARKET_DATA_PROVIDER": "polygon", "POLYGON_API_KEY": "fake", "POLYGON_BASE_URL": url, "POLYGON_PLAN": "paid"}
+    async with AsyncExitStack() as stack:
+        stack.callback(fake.terminate)
+        session = await connect(stack, "mcp_gateway.py", workdir, env)
+
+        async def hits() -> int:
+            result = await session.read_resource("market://price_cache_stats")
+            return json.loads(result.contents[0].text)["hits"]
+
+        before = await hits()
+        await session.call_tool("market_lookup_share_price", {"symbol": "AAPL"})
+        looked_up = await hits()
+        result = await session.call_tool("accounts_buy_shares", {"name": "gateway", "symbol": "AAPL", "quantity": 1, "rationale": "Check"})
+        if result.isError:
+            raise RuntimeError(result.content[0].text)
+        return looked_up - before, await hits() - looked_up
+
+
+async def run(args, workdir: str) -> tuple[list, tuple]:
+    rows = []
+    for label, scripts in (("separate servers", SEPARATE), ("gateway", GATEWAY)):
+        for cycle in range(1, args.cycles + 1):
+            start = time.perf_counter()
+            setups = await asyncio.gather(*[trader_setup(scripts, workdir) for _ in range(args.traders)])
+            elapsed = time.perf_counter() - start
+            connections = len(scripts) * args.traders
+            rows.append((label, cycle, connections, connections, setups[0][1], max(s for s, _ in setups), elapsed))
+    return rows, await shared_cache(workdir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--traders", type=int, default=4, help="traders setting up at once")
+    parser.add_argument("--cycles", type=int, default=2, help="cycles per setup")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        rows, (lookup_hits, trade_hits) = asyncio.run(run(args, workdir))
+
+    print(f"{args.traders} traders connecting at once")
+    print(f"{'servers':<18}{'cycle':>6}{'connections':>13}{'list_tools':>12}{'tools':>7}{'trader setup s':>16}{'cycle setup s':>15}")
+    for label, cycle, connections, list_calls, tools, slowest, elapsed in rows:
+        print(f"{label:<18}{cycle:>6}{connections:>13}{list_calls:>12}{tools:>7}{slowest:>16.2f}{elapsed:>15.2f}")
+    ok = lookup_hits == 0 and trade_hits == 1
+    print(f"{'ok' if ok else 'FAIL':<5}the gateway filled the trade from the price cache entry of the lookup before it ({trade_hits} hit)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
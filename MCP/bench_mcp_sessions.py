@@ -0,0 +1,146 @@
+"""
+Benchmark of per-call latency from accounts_client.py to the accounts server.
+
+Compares the original pattern, where every helper call starts the server process, runs the MCP
+initialize handshake, makes one request and tears it all down, with the pooled session from
+mcp_pool.py that every call reuses. Measures read_accounts_resource followed by
+read_strategy_resource, the pair Trader.run_agent makes before every run.
+
+Then checks recovery: kills the pooled server process and makes sure the next read restarts it
+and is retried on the new session, while a tool call, which may have taken effect, is not.
+
+Runs the server with this interpreter against a throwaway database. Pass --uv to start it with
+"uv run accounts_server.py", as the traders do, which adds uv's own start-up to every new session.
+
+Usage: uv run bench_mcp_sessions.py [--calls 20] [--uv]
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import sys
+import tempfile
+import time
+
+import mcp
+from mcp import StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+import accounts_client
+from mcp_pool import close_session_pool, get_session_pool
+
+NAME = "bench"
+
+
+async def read_resource_unpooled(params: StdioServerParameters, uri: str) -> str:
+    async with stdio_client(params) as streams:
+        async with mcp.ClientSession(*streams) as session:
+            await session.initialize()
+            result = await session.read_resource(uri)
+            return result.contents[0].text
+
+
+async def before_run_unpooled(params: StdioServerParameters) -> None:
+    await read_resource_unpooled(params, f"accounts://accounts_server/{NAME}")
+    await read_resource_unpooled(params, f"accounts://strategy/{NAME}")
+
+
+async def before_run_pooled(params: StdioServerParameters) -> None:
+    await accounts_client.read_accounts_resource(NAME)
+    await accounts_client.read_strategy_resource(NAME)
+
+
+async def time_calls(fn, params, calls: int) -> list[float]:
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await fn(params)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def child_pids() -> list[int]:
+    """Direct child processes of this one, from /proc"""
+    pids = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) == os.getpid():
+                        pids.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                pass
+    return pids
+
+
+async def run(args, params: StdioServerParameters) -> tuple[dict, list[str]]:
+    accounts_client.params = params
+    results = {}
+    problems = []
+    for label, fn in (("new session per call", before_run_unpooled), ("pooled session", before_run_pooled)):
+        latencies = await time_calls(fn, params, args.calls)
+        results[label] = latencies
+
+    pool = get_session_pool()
+    starts = pool.stats()[" ".join([params.command, *params.args])]["starts"]
+    if starts != 1:
+        problems.append(f"the pooled session was started {starts} times for {args.calls} calls, expected once")
+    if os.path.isdir("/proc"):
+        for pid in child_pids():
+            os.kill(pid, signal.SIGKILL)
+        await asyncio.sleep(0.5)
+        try:
+            await before_run_pooled(params)
+            restarts = pool.stats()[" ".join([params.command, *params.args])]["starts"] - starts
+            print(f"{'ok' if restarts == 1 else 'FAIL':<5}after the server process was killed, the next call restarted it ({restarts} restart)")
+            if restarts != 1:
+                problems.append(f"{restarts} restarts after the server was killed, expected 1")
+        except Exception as e:
+            problems.append(f"the call after the server was killed failed: {e!r}")
+        for pid in child_pids():
+            os.kill(pid, signal.SIGKILL)
+        await asyncio.sleep(0.5)
+        try:
+            await accounts_client.call_accounts_tool("get_balance", {"name": NAME})
+            problems.append("a tool call was retried after the server was killed")
+        except Exception:
+            print(f"{'ok':<5}after the server process was killed, a tool call failed rather than being sent again")
+        try:
+            await accounts_client.call_accounts_tool("get_balance", {"name": NAME})
+        except Exception as e:
+            problems.append(f"the tool call after the restart failed: {e!r}")
+    await close_session_pool()
+    if child_pids():
+        problems.append("server processes were left running after the pool was closed")
+    return results, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20, help="pairs of resource reads per pattern")
+    parser.add_argument("--uv", action="store_true", help="start the server with uv run, as the traders do")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as workdir:
+        # The servers would otherwise log every request to stderr
+        env = {**os.environ, "PYTHONPATH": here, "MARKET_DATA_PROVIDER": "simulator", "FASTMCP_LOG_LEVEL": "WARNING"}
+        if args.uv:
+            params = StdioServerParameters(command="uv", args=["run", os.path.join(here, "accounts_server.py")], env=env, cwd=workdir)
+        else:
+            params = StdioServerParameters(command=sys.executable, args=[os.path.join(here, "accounts_server.py")], env=env, cwd=workdir)
+        results, problems = asyncio.run(run(args, params))
+
+    print(f"read_accounts_resource + read_strategy_resource, {args.calls} times each way")
+    print(f"{'pattern':<24}{'mean ms':>10}{'p50 ms':>10}{'max ms':>10}")
+    for label, latencies in results.items():
+        print(f"{label:<24}{statistics.mean(latencies) * 1000:>10.1f}{statistics.median(latencies) * 1000:>10.1f}{max(latencies) * 1000:>10.1f}")
+    for problem in problems:
+        print(f"FAILED {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
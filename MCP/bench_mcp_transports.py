@@ -0,0 +1,196 @@
+"""
+Load test of the accounts server with many concurrent clients, over stdio with a server process
+per client (how every trader and client helper connects by default) and over streamable HTTP
+with one shared server, with one and with --workers worker processes.
+
+Each of --clients clients connects, then makes --calls tool calls one after another,
+alternating get_balance and get_holdings on an account of its own, all the clients at once.
+Reports the time for every client to connect, the latency of the calls, the calls per second
+across all the clients, and the resident memory of all the server processes while connected.
+
+Runs the servers with this interpreter, on the market simulator and a throwaway database.
+
+Usage: uv run bench_mcp_transports.py [--clients 8] [--calls 50] [--workers 2]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVER = os.path.join(HERE, "accounts_server.py")
+# The servers would otherwise log every request to stderr
+ENV = {**os.environ, "MARKET_DATA_PROVIDER": "simulator", "FASTMCP_LOG_LEVEL": "WARNING"}
+
+
+def descendants(pid: int) -> list[int]:
+    """Every process below this one, from /proc"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                pass
+    found, frontier = [], [pid]
+    while frontier:
+        children = [child for child, parent in parents.items() if parent in frontier]
+        found += children
+        frontier = children
+    return found
+
+
+def rss_mb(pids: list[int]) -> float:
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            pass
+    return total / 1024
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@asynccontextmanager
+async def stdio_session(workdir: str):
+    params = StdioServerParameters(command=sys.executable, args=[SERVER], env=ENV, cwd=workdir)
+    with open(os.devnull, "w") as devnull:
+        async with stdio_client(params, errlog=devnull) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session
+
+
+def http_session(url: str):
+    @asynccontextmanager
+    async def connect(workdir: str):
+        async with streamablehttp_client(url) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session
+
+    return connect
+
+
+async def client(connect, workdir: str, name: str, calls: int, connected: asyncio.Barrier, done: asyncio.Event, results: dict):
+    start = time.perf_counter()
+    async with connect(workdir) as session:
+        results["connect"].append(time.perf_counter() - start)
+        await connected.wait()
+        for i in range(calls):
+            start = time.perf_counter()
+            result = await session.call_tool("get_balance" if i % 2 == 0 else "get_holdings", {"name": name})
+            results["latencies"].append(time.perf_counter() - start)
+            if result.isError:
+                raise RuntimeError(result.content[0].text)
+        await done.wait()
+
+
+async def load(connect, args, workdir: str) -> dict:
+    results = {"connect": [], "latencies": []}
+    # Every client connects before any starts calling, and stays connected until all have finished
+    connected = asyncio.Barrier(args.clients + 1)
+    done = asyncio.Event()
+    tasks = [
+        asyncio.create_task(client(connect, workdir, f"client{i}", args.calls, connected, done, results))
+        for i in range(args.clients)
+    ]
+    await connected.wait()
+    results["rss"] = rss_mb(descendants(os.getpid()))
+    start = time.perf_counter()
+    while len(results["latencies"]) < args.clients * args.calls and not any(task.done() for task in tasks):
+        await asyncio.sleep(0.01)
+    results["elapsed"] = time.perf_counter() - start
+    results["servers"] = len(descendants(os.getpid()))
+    done.set()
+    await asyncio.gather(*tasks)
+    return results
+
+
+async def wait_for_health(url: str, seconds: float = 60.0) -> set[int]:
+    """Wait until the server answers /health, then return the worker pids seen over a few requests"""
+    deadline = time.time() + seconds
+    async with httpx.AsyncClient() as http:
+        while True:
+            try:
+                response = await http.get(url)
+                if response.status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.time() > deadline:
+                raise RuntimeError(f"no answer from {url}")
+            await asyncio.sleep(0.2)
+        pids = set()
+        for _ in range(50):
+            async with httpx.AsyncClient() as fresh:
+                pids.add((await fresh.get(url)).json()["pid"])
+        return pids
+
+
+async def run(args, workdir: str) -> list[tuple]:
+    rows = []
+    results = await load(stdio_session, args, workdir)
+    rows.append(("stdio, a server per client", results))
+    for workers in sorted({1, args.workers}):
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, SERVER, "--transport", "http", "--port", str(port), "--workers", str(workers)],
+            env={**ENV, "PYTHONPATH": HERE}, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            pids = await wait_for_health(f"http://127.0.0.1:{port}/health")
+            results = await load(http_session(f"http://127.0.0.1:{port}/mcp"), args, workdir)
+            results["answered"] = len(pids)
+            rows.append((f"shared HTTP, {workers} worker{'s' if workers > 1 else ''}", results))
+        finally:
+            server.terminate()
+            server.wait()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--calls", type=int, default=50, help="tool calls per client")
+    parser.add_argument("--workers", type=int, default=2, help="worker processes for the second HTTP run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        rows = asyncio.run(run(args, workdir))
+
+    print(f"{args.clients} clients, {args.calls} calls each, all at once")
+    print(f"{'server':<28}{'processes':>10}{'connect s':>11}{'p50 ms':>9}{'p95 ms':>9}{'calls/s':>10}{'server MB':>11}")
+    for label, r in rows:
+        latencies = sorted(r["latencies"])
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(
+            f"{label:<28}{r['servers']:>10}{max(r['connect']):>11.2f}{statistics.median(latencies) * 1000:>9.1f}"
+            f"{p95 * 1000:>9.1f}{len(latencies) / r['elapsed']:>10.0f}{r['rss']:>11.0f}"
+        )
+    for label, r in rows:
+        if "answered" in r:
+            print(f"{label}: /health answered from {r['answered']} process{'es' if r['answered'] > 1 else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark of per-lookup price latency against a local fake Polygon server.
+
+Compares building a new RESTClient for every lookup (the original pattern) with the shared
+client from get_polygon_client(), and with the asyncio client the MCP tools await, both one
+lookup at a time and with several lookups in flight. Lookups bypass the price cache, so every
+one is a real HTTP request.
+
+The fake server is plain HTTP on localhost, so it simulates the network: every response is
+delayed by --latency, and every new connection by --connect-latency, standing in for the TCP
+and TLS handshake round trips to the real API.
+
+Usage: uv run bench_polygon_client.py [--lookups 200] [--concurrency 10] [--latency 0.02] [--connect-latency 0.04]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from polygon import RESTClient
+from fake_polygon import start_process
+
+
+def summarize(latencies: list[float]) -> tuple[float, float]:
+    latencies = sorted(latencies)
+    return statistics.mean(latencies) * 1_000_000, latencies[int(len(latencies) * 0.95)] * 1_000_000
+
+
+def time_each(fn, lookups: int) -> list[float]:
+    latencies = []
+    for _ in range(lookups):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def time_each_async(fn, lookups: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await fn()
+            return time.perf_counter() - start
+
+    return await asyncio.gather(*[one() for _ in range(lookups)])
+
+
+def run(args, url: str) -> list[tuple]:
+    import market
+
+    market.polygon_api_key = "fake"
+    market.polygon_base_url = url
+    rows = []
+
+    def measure(label: str, latencies: list[float], elapsed: float):
+        mean, p95 = summarize(latencies)
+        connections = httpx.get(f"{url}/__stats").json()["connections"] - 1
+        rows.append((label, mean, p95, args.lookups / elapsed, connections))
+        httpx.get(f"{url}/__reset")
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        latencies = fn()
+        measure(label, latencies, time.perf_counter() - start)
+
+    timed("new client per lookup", lambda: time_each(
+        lambda: RESTClient("fake", base=url).get_snapshot_ticker("stocks", "AAPL"), args.lookups))
+    timed("shared client", lambda: time_each(
+        lambda: market.get_share_price_polygon_min("AAPL"), args.lookups))
+
+    async def run_async():
+        lookup = lambda: market.get_share_prices_polygon_min_async(["AAPL"])
+        start = time.perf_counter()
+        latencies = await time_each_async(lookup, args.lookups, 1)
+        measure("async client", latencies, time.perf_counter() - start)
+        start = time.perf_counter()
+        latencies = await time_each_async(lookup, args.lookups, args.concurrency)
+        measure(f"async client, {args.concurrency} in flight", latencies, time.perf_counter() - start)
+        await market.get_async_polygon_client().aclose()
+
+    asyncio.run(run_async())
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10, help="lookups in flight for the concurrent async run")
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated seconds per response")
+    parser.add_argument("--connect-latency", type=float, default=0.04, help="simulated seconds per new connection")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    url, server = start_process(args.latency, args.connect_latency)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            rows = run(args, url)
+        finally:
+            server.terminate()
+            os.chdir(here)
+
+    print(f"{'client':<28}{'mean us':>10}{'p95 us':>10}{'lookups/s':>12}{'connections':>13}")
+    for label, mean, p95, rate, connections in rows:
+        print(f"{label:<28}{mean:>10,.0f}{p95:>10,.0f}{rate:>12,.0f}{connections:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark of cross-process price lookups with many reader processes, as when several MCP
+servers, the trading floor and the dashboard all price the same holdings.
+
+Compares reading prices from the prices table in SQLite (how a price fetched by one process
+reached the others before the board) with reading them from the shared-memory price board.
+While the readers run, a writer process republishes every price every --publish-every seconds;
+each publication sets every symbol to the same value, so a reader that sees a batch with mixed
+values has seen a torn read, and the benchmark counts them.
+
+Reports aggregate lookups per second (one lookup prices --batch symbols) for 1, 4 and
+--readers reader processes.
+
+Usage: uv run bench_price_board.py [--readers 12] [--symbols 500] [--batch 10] [--seconds 3]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+def writer(mode: str, board_name: str, symbols: list[str], every: float) -> None:
+    """Republish every price until terminated; run as its own interpreter, like the real writer"""
+    from database import write_prices
+    from price_board import PriceBoard
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    board = PriceBoard.create(board_name) if mode == "board" else None
+    tick = 0
+    try:
+        while True:
+            tick += 1
+            prices = dict.fromkeys(symbols, float(tick))
+            if board:
+                board.publish(prices)
+            else:
+                write_prices(prices, time.time())
+            time.sleep(every)
+    finally:
+        if board:
+            board.close()
+
+
+def reader(mode: str, board_name: str, symbols: list[str], batch: int, seconds: float, ready, results) -> None:
+    from database import read_prices
+    from price_board import PriceBoard
+
+    board = PriceBoard.attach(board_name) if mode == "board" else None
+    if mode == "board" and board is None:
+        raise RuntimeError(f"no price board {board_name!r} to attach to")
+    rng = random.Random(os.getpid())
+    batches = [rng.sample(symbols, batch) for _ in range(1000)]
+    lookups = torn = 0
+    # Start timing only once every reader has started and attached
+    ready.wait()
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        for _ in range(100):
+            chosen = batches[lookups % len(batches)]
+            if board:
+                values = [price for price, _ in board.read(chosen).values()]
+            else:
+                values = [price for price, _ in read_prices(chosen).values()]
+            torn += len(values) != batch or len(set(values)) != 1
+            lookups += 1
+    if board:
+        board.close()
+    results.put((lookups, torn))
+
+
+def run(mode: str, readers: int, args, symbols: list[str]) -> tuple[float, int]:
+    """Aggregate lookups per second and torn reads; the processes inherit the working directory"""
+    context = multiprocessing.get_context("spawn")
+    board_name = f"bench_price_board_{os.getpid()}"
+    publisher = subprocess.Popen([
+        sys.executable, os.path.abspath(__file__), "--writer", mode, board_name,
+        "--symbols", str(args.symbols), "--publish-every", str(args.publish_every),
+    ])
+    time.sleep(1.0)
+    ready = context.Barrier(readers)
+    queue = context.Queue()
+    processes = [
+        context.Process(target=reader, args=(mode, board_name, symbols, args.batch, args.seconds, ready, queue))
+        for _ in range(readers)
+    ]
+    try:
+        for process in processes:
+            process.start()
+        results = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        publisher.terminate()
+        publisher.wait()
+    return sum(lookups for lookups, _ in results) / args.seconds, sum(torn for _, torn in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=12, help="reader processes in the largest run")
+    parser.add_argument("--symbols", type=int, default=500, help="symbols on the board")
+    parser.add_argument("--batch", type=int, default=10, help="symbols priced per lookup")
+    parser.add_argument("--seconds", type=float, default=3.0, help="seconds each run lasts")
+    parser.add_argument("--publish-every", type=float, default=0.01, help="seconds between publications")
+    parser.add_argument("--writer", nargs=2, metavar=("MODE", "BOARD"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    symbols = [f"T{i:04d}" for i in range(args.symbols)]
+    if args.writer:
+        return writer(*args.writer, symbols, args.publish_every)
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            from database import close_connection, write_prices
+            write_prices(dict.fromkeys(symbols, 0.0), time.time())
+            close_connection()
+            for readers in sorted({1, min(4, args.readers), args.readers}):
+                for mode, label in (("sqlite", "prices table"), ("board", "shared-memory board")):
+                    rate, torn = run(mode, readers, args, symbols)
+                    rows.append((label, readers, rate, torn))
+        finally:
+            os.chdir(here)
+
+    print(f"{args.batch} symbols per lookup, {args.symbols} symbols republished every {args.publish_every}s")
+    print(f"{'source':<22}{'readers':>9}{'lookups/s':>14}{'prices/s':>14}{'torn reads':>12}")
+    for label, readers, rate, torn in rows:
+        print(f"{label:<22}{readers:>9}{rate:>14,.0f}{rate * args.batch:>14,.0f}{torn:>12}")
+
+
+if __name__ == "__main__":
+    main()
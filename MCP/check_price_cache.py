@@ -0,0 +1,102 @@
+"""
+Check of the price cache in market.py against a local fake Polygon server.
+
+- a burst of concurrent lookups for the same symbol sends exactly one request
+- concurrent bulk lookups for the same symbols send exactly one request
+- repeat lookups within the TTL are served from memory without a request
+- a process with an empty memory cache is served from the prices table
+- once the TTL has passed, the next lookup fetches again
+
+Runs against a throwaway database in a temporary directory. Exits non-zero on any failure.
+
+Usage: uv run check_price_cache.py [--ttl 1.0] [--threads 16]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fake_polygon import FakePolygon
+
+
+def burst(threads: int, fn, *args) -> list:
+    with ThreadPoolExecutor(threads) as pool:
+        return list(pool.map(lambda _: fn(*args), range(threads)))
+
+
+def run(args, fake: FakePolygon) -> list[str]:
+    import market
+
+    market.use_simulator = False
+    market.polygon_api_key = "fake"
+    market.polygon_base_url = fake.url
+    market.is_paid_polygon = True
+    market.price_cache.ttl = args.ttl
+    problems = []
+
+    def expect(endpoint: str, count: int, what: str):
+        actual = fake.requests[endpoint]
+        status = "ok" if actual == count else "FAIL"
+        print(f"{status:<5}{what}: {actual} {endpoint} request(s), expected {count}")
+        if actual != count:
+            problems.append(f"{what}: {actual} {endpoint} requests, expected {count}")
+        fake.reset()
+
+    prices = burst(args.threads, market.get_share_price, "AAPL")
+    expect("snapshot_ticker", 1, f"{args.threads} concurrent get_share_price('AAPL')")
+    if len(set(prices)) != 1:
+        problems.append(f"concurrent callers saw different prices {set(prices)}")
+
+    symbols = ["MSFT", "NVDA", "AMZN"]
+    burst(args.threads, market.get_share_prices, symbols)
+    expect("snapshot_all", 1, f"{args.threads} concurrent get_share_prices({symbols})")
+
+    burst(args.threads, market.get_share_prices, ["AAPL", *symbols])
+    expect("snapshot_all", 0, "repeat lookups within the TTL")
+
+    market.price_cache.clear()
+    market.get_share_prices(symbols)
+    expect("snapshot_all", 0, "lookups with an empty memory cache, served from the prices table")
+
+    time.sleep(args.ttl)
+    market.get_share_prices(symbols)
+    expect("snapshot_all", 1, "lookups after the TTL has passed")
+
+    stats = market.price_cache.stats()
+    print(f"cache stats: {stats}")
+    if not stats["coalesced"]:
+        problems.append("no concurrent misses were coalesced")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ttl", type=float, default=1.0, help="price cache TTL in seconds")
+    parser.add_argument("--threads", type=int, default=16, help="concurrent callers per burst")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds the fake server takes to respond")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    fake = FakePolygon(latency=args.latency).start()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            problems = run(args, fake)
+        finally:
+            from database import log_writer, close_connection
+            log_writer.close()
+            close_connection()
+            fake.stop()
+            os.chdir(here)
+
+    for problem in problems:
+        print(f"FAILED {problem}")
+    print("FAILED" if problems else "OK: the price cache coalesces and expires as expected")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Check of push_dispatcher.py against a local fake Pushover server.
+
+- notify returns at once, however slow Pushover is
+- a burst of messages is sent as a single digest
+- a burst too long for one message is split into digests within Pushover's length limit
+- server errors are retried with backoff until the message goes through
+- a rejected message is not retried
+- after a 429, messages are dropped until the limit resets, without more requests
+- messages beyond the queue bound are dropped, and notify says so
+- close sends what is queued without waiting out the coalescing window
+
+Exits non-zero on any failure.
+
+Usage: uv run check_push_dispatcher.py [--window 0.3]
+"""
+
+import argparse
+import sys
+import time
+
+from fake_pushover import FakePushover
+from push_dispatcher import MAX_MESSAGE_LENGTH, PushDispatcher
+
+
+def run(args, fake: FakePushover) -> list[str]:
+    problems = []
+
+    def expect(ok: bool, what: str):
+        print(f"{'ok' if ok else 'FAIL':<5}{what}")
+        if not ok:
+            problems.append(what)
+
+    def dispatcher(**kwargs) -> PushDispatcher:
+        fake.reset()
+        options = {"user": "user", "token": "token", "coalesce_seconds": args.window, "backoff_seconds": 0.05}
+        return PushDispatcher(fake.url, **{**options, **kwargs})
+
+    pusher = dispatcher()
+    fake.latency = 1.0
+    start = time.perf_counter()
+    for i in range(10):
+        pusher.notify(f"Slow {i}")
+    elapsed = time.perf_counter() - start
+    pusher.flush()
+    expect(elapsed < 0.1, f"10 notify calls against a 1 s endpoint returned in {elapsed * 1000:.1f} ms")
+    pusher.close()
+
+    pusher = dispatcher()
+    for i in range(20):
+        pusher.notify(f"Bought {i} shares of AAPL")
+    pusher.flush()
+    titles = [m["title"] for m in fake.messages]
+    expect(fake.requests == 1 and titles == ["20 notifications"], f"a burst of 20 was sent as {fake.requests} request(s) titled {titles}")
+    pusher.close()
+
+    pusher = dispatcher()
+    sent = [f"{i:02d} " + "x" * 97 for i in range(30)]
+    for message in sent:
+        pusher.notify(message)
+    pusher.flush()
+    lengths = [len(m["message"]) for m in fake.messages]
+    delivered = "\n".join(m["message"] for m in fake.messages)
+    expect(
+        len(lengths) > 1 and max(lengths) <= MAX_MESSAGE_LENGTH and all(message in delivered for message in sent),
+        f"a burst of 30 long messages was split into {len(lengths)} digests of at most {max(lengths)} characters",
+    )
+    pusher.close()
+
+    pusher = dispatcher()
+    fake.fail_next = 2
+    pusher.notify("Retried")
+    pusher.flush()
+    stats = pusher.stats()
+    expect(
+        stats["sent"] == 1 and fake.requests == 3 and stats["retries"] == 2,
+        f"after 2 server errors the message was sent on request {fake.requests} ({stats['retries']} retries)",
+    )
+    pusher.close()
+
+    pusher = dispatcher()
+    pusher.notify("")
+    pusher.flush()
+    stats = pusher.stats()
+    expect(stats["failed"] == 1 and fake.requests == 1, f"a rejected message was tried {fake.requests} time(s)")
+    pusher.close()
+
+    pusher = dispatcher()
+    fake.remaining = 0
+    pusher.notify("Over quota")
+    pusher.flush()
+    pusher.notify("Still over quota")
+    pusher.flush()
+    stats = pusher.stats()
+    expect(
+        fake.requests == 1 and stats["dropped"] == 1 and stats["paused_until"] == fake.reset_at,
+        f"after a 429, {fake.requests} request(s) were made and {stats['dropped']} message(s) dropped until the reset",
+    )
+    pusher.close()
+
+    pusher = dispatcher(queue_size=5)
+    accepted = [pusher.notify(f"Bounded {i}") for i in range(8)]
+    pusher.flush()
+    stats = pusher.stats()
+    expect(
+        accepted.count(True) == 5 and stats["dropped"] == 3 and stats["sent"] == 5,
+        f"with a bound of 5, {accepted.count(True)} of 8 were queued and {stats['dropped']} dropped",
+    )
+    pusher.close()
+
+    pusher = dispatcher(coalesce_seconds=60)
+    for i in range(3):
+        pusher.notify(f"Closing {i}")
+    start = time.perf_counter()
+    closed = pusher.close()
+    elapsed = time.perf_counter() - start
+    expect(
+        closed and pusher.stats()["sent"] == 3 and elapsed < 5,
+        f"close sent {pusher.stats()['sent']} queued message(s) in {elapsed:.2f} s despite a 60 s window",
+    )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--window", type=float, default=0.3, help="coalescing window in seconds")
+    args = parser.parse_args()
+
+    fake = FakePushover().start()
+    try:
+        problems = run(args, fake)
+    finally:
+        fake.stop()
+
+    for problem in problems:
+        print(f"FAILED {problem}")
+    print("FAILED" if problems else "OK: the push dispatcher queues, coalesces, retries and limits as expected")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
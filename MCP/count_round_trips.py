@@ -0,0 +1,150 @@
+"""
+Count the model-to-MCP round trips in a trading cycle, with the single-symbol tools and with
+the batch tools (lookup_share_prices and execute_orders).
+
+By default, replays a scripted rebalance of a --names stock portfolio against the real market
+and accounts servers over stdio, on the market simulator and a throwaway database: the trader
+prices every holding, then sells part of half of them and adds to the rest. Each tool call is
+one MCP round trip, and takes a model turn to issue when the calls are made one after another;
+the cycle time estimate adds --model-latency seconds for each turn, plus a final reply.
+
+With --logs, instead counts what real trading cycles did, from the log table of an
+accounts.db: the model calls (generation or response spans) and tool calls (function spans)
+in each trader's trace. Run it on logs from before and after a change to compare them.
+
+Usage: uv run count_round_trips.py [--names 10] [--model-latency 2.0]
+       uv run count_round_trips.py --logs accounts.db
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+NAME = "replay"
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "JPM", "V", "UNH", "XOM", "JNJ", "PG", "HD", "KO"]
+
+
+class CountingSession:
+    def __init__(self, session: ClientSession):
+        self.session = session
+        self.calls = Counter()
+
+    async def call(self, tool: str, **arguments):
+        self.calls[tool] += 1
+        result = await self.session.call_tool(tool, arguments)
+        if result.isError:
+            raise RuntimeError(f"{tool} failed: {result.content[0].text}")
+        return result
+
+
+async def single_symbol(market: CountingSession, accounts: CountingSession, symbols: list[str]) -> None:
+    for symbol in symbols:
+        await market.call("lookup_share_price", symbol=symbol)
+    for symbol in symbols[: len(symbols) // 2]:
+        await accounts.call("sell_shares", name=NAME, symbol=symbol, quantity=2, rationale="Trim")
+    for symbol in symbols[len(symbols) // 2:]:
+        await accounts.call("buy_shares", name=NAME, symbol=symbol, quantity=2, rationale="Add")
+
+
+async def batched(market: CountingSession, accounts: CountingSession, symbols: list[str]) -> None:
+    await market.call("lookup_share_prices", symbols=symbols)
+    orders = [
+        {"symbol": symbol, "side": "sell", "quantity": 2, "rationale": "Trim"} for symbol in symbols[: len(symbols) // 2]
+    ] + [
+        {"symbol": symbol, "side": "buy", "quantity": 2, "rationale": "Add"} for symbol in symbols[len(symbols) // 2:]
+    ]
+    await accounts.call("execute_orders", name=NAME, orders=orders)
+
+
+async def replay(args, workdir: str) -> list[tuple]:
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "MARKET_DATA_PROVIDER": "simulator", "PYTHONPATH": here}
+
+    def server(script: str) -> StdioServerParameters:
+        return StdioServerParameters(command=sys.executable, args=[os.path.join(here, script)], env=env, cwd=workdir)
+
+    symbols = SYMBOLS[: args.names]
+    rows = []
+    devnull = open(os.devnull, "w")
+    async with (
+        stdio_client(server("market_server.py"), errlog=devnull) as market_streams,
+        stdio_client(server("accounts_server.py"), errlog=devnull) as accounts_streams,
+    ):
+        async with ClientSession(*market_streams) as market_session, ClientSession(*accounts_streams) as accounts_session:
+            await market_session.initialize()
+            await accounts_session.initialize()
+            for label, cycle in (("single-symbol tools", single_symbol), ("batch tools", batched)):
+                await CountingSession(accounts_session).call("execute_orders", name=NAME, orders=[
+                    {"symbol": symbol, "side": "buy", "quantity": 4, "rationale": "Seed"} for symbol in symbols
+                ])
+                market, accounts = CountingSession(market_session), CountingSession(accounts_session)
+                start = time.perf_counter()
+                await cycle(market, accounts, symbols)
+                elapsed = time.perf_counter() - start
+                calls = market.calls + accounts.calls
+                round_trips = sum(calls.values())
+                # One turn to issue each call, one after another, and one for the final reply
+                turns = round_trips + 1
+                rows.append((label, round_trips, turns, elapsed, turns * args.model_latency + elapsed, dict(calls)))
+    return rows
+
+
+def from_logs(path: str) -> None:
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT name, type, message FROM logs ORDER BY id").fetchall()
+    open_traces: dict[str, Counter] = {}
+    cycles = []
+    for name, type, message in rows:
+        if type == "trace" and message.startswith("Started: "):
+            open_traces[name] = Counter()
+        elif type == "trace" and message.startswith("Ended: ") and name in open_traces:
+            cycles.append((name, message.removeprefix("Ended: "), open_traces.pop(name)))
+        elif name in open_traces and message.startswith("Started "):
+            if type in ("generation", "response"):
+                open_traces[name]["model calls"] += 1
+            elif type == "function":
+                open_traces[name]["tool calls"] += 1
+                open_traces[name][message.split()[2] if len(message.split()) > 2 else "?"] += 1
+    if not cycles:
+        print("No complete trading cycles in the logs")
+        return
+    print(f"{'cycle':<28}{'model calls':>13}{'tool calls':>12}  batch tools used")
+    for name, trace, counts in cycles:
+        batch = counts["lookup_share_prices"] + counts["execute_orders"]
+        print(f"{trace:<28}{counts['model calls']:>13}{counts['tool calls']:>12}  {batch}")
+    print(
+        f"{'mean of ' + str(len(cycles)) + ' cycles':<28}"
+        f"{statistics.mean(c['model calls'] for _, _, c in cycles):>13.1f}"
+        f"{statistics.mean(c['tool calls'] for _, _, c in cycles):>12.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--names", type=int, default=10, help=f"stocks in the portfolio, up to {len(SYMBOLS)}")
+    parser.add_argument("--model-latency", type=float, default=2.0, help="seconds per model turn, for the estimate")
+    parser.add_argument("--logs", help="count real cycles from the logs in this accounts.db instead")
+    args = parser.parse_args()
+    if args.logs:
+        return from_logs(args.logs)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        rows = asyncio.run(replay(args, workdir))
+
+    print(f"Rebalancing a {args.names} stock portfolio, at {args.model_latency}s per model turn")
+    print(f"{'tools':<22}{'round trips':>13}{'model turns':>13}{'MCP seconds':>13}{'est. cycle s':>14}  calls")
+    for label, round_trips, turns, elapsed, estimate, calls in rows:
+        print(f"{label:<22}{round_trips:>13}{turns:>13}{elapsed:>13.2f}{estimate:>14.1f}  {calls}")
+
+
+if __name__ == "__main__":
+    main()
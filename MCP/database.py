@@ -1,101 +1,646 @@
 import sqlite3
 import json
-from datetime import datetime
+import os
+import queue
+import sys
+import threading
+import time
+import atexit
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
 DB = "accounts.db"
 
+BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+CACHED_STATEMENTS = 256
 
-with sqlite3.connect(DB) as conn:
-    cursor = conn.cursor()
-    cursor.execute('CREATE TABLE IF NOT EXISTS accounts (name TEXT PRIMARY KEY, account TEXT)')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            datetime DATETIME,
-            type TEXT,
-            message TEXT
-        )
-    ''')
-    cursor.execute('CREATE TABLE IF NOT EXISTS market (date TEXT PRIMARY KEY, data TEXT)')
-    conn.commit()
-
-def write_account(name, account_dict):
-    json_data = json.dumps(account_dict)
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO accounts (name, account)
-            VALUES (?, ?)
-            ON CONFLICT(name) DO UPDATE SET account=excluded.account
-        ''', (name.lower(), json_data))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "500"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "0.5"))
+
+# Every statement below is a module-level constant so that each long-lived connection
+# compiles it once and then reuses the prepared statement from sqlite3's statement cache
+
+INSERT_ACCOUNT = '''
+    INSERT INTO accounts (name, balance, strategy, net_invested)
+    VALUES (?, ?, ?, 0)
+    ON CONFLICT(name) DO NOTHING
+'''
+UPDATE_ACCOUNT = 'UPDATE accounts SET balance = ?, strategy = ? WHERE name = ?'
+UPDATE_BALANCE = 'UPDATE accounts SET balance = ?, net_invested = ? WHERE name = ?'
+UPDATE_NET_INVESTED = 'UPDATE accounts SET net_invested = ? WHERE name = ?'
+SELECT_ACCOUNT = 'SELECT balance, strategy, net_invested, version FROM accounts WHERE name = ? AND balance IS NOT NULL'
+SELECT_ACCOUNT_VERSION = 'SELECT version FROM accounts WHERE name = ?'
+BUMP_ACCOUNT_VERSION = 'UPDATE accounts SET version = version + 1 WHERE name = ?'
+BUMP_ACCOUNT_VERSION_FROM = 'UPDATE accounts SET version = version + 1 WHERE name = ? AND version = ?'
+SELECT_HOLDINGS = 'SELECT symbol, quantity, average_cost, realized_pnl FROM holdings WHERE name = ?'
+UPSERT_HOLDING = '''
+    INSERT INTO holdings (name, symbol, quantity, average_cost, realized_pnl)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(name, symbol) DO UPDATE SET
+        quantity=excluded.quantity,
+        average_cost=excluded.average_cost,
+        realized_pnl=excluded.realized_pnl
+'''
+INSERT_TRANSACTION = '''
+    INSERT INTO transactions (name, symbol, quantity, price, timestamp, rationale)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+SELECT_TRANSACTIONS = '''
+    SELECT symbol, quantity, price, timestamp, rationale FROM transactions
+    WHERE name = ?
+    ORDER BY id
+'''
+INSERT_PORTFOLIO_VALUE = 'INSERT INTO portfolio_values (name, datetime, value) VALUES (?, ?, ?)'
+UPSERT_VALUATION = '''
+    INSERT INTO valuations (name, datetime, value, prices)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(name) DO UPDATE SET datetime = excluded.datetime, value = excluded.value, prices = excluded.prices
+'''
+SELECT_VALUATION = 'SELECT datetime, value, prices FROM valuations WHERE name = ?'
+INSERT_LOG = '''
+    INSERT INTO logs (name, datetime, type, message)
+    VALUES (?, ?, ?, ?)
+'''
+SELECT_LOGS = '''
+    SELECT datetime, type, message FROM logs
+    WHERE name = ?
+    ORDER BY datetime DESC, id DESC
+    LIMIT ?
+'''
+SELECT_LOGS_SINCE = '''
+    SELECT id, datetime, type, message FROM logs
+    WHERE name = ? AND id > ?
+    ORDER BY id DESC
+    LIMIT ?
+'''
+UPSERT_MARKET_DATE = '''
+    INSERT INTO market_dates (date, trading_date)
+    VALUES (?, ?)
+    ON CONFLICT(date) DO UPDATE SET trading_date = excluded.trading_date
+'''
+SELECT_MARKET_DATE = 'SELECT trading_date FROM market_dates WHERE date = ?'
+UPSERT_MARKET_PRICE = '''
+    INSERT OR REPLACE INTO market_prices (date, symbol, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+SELECT_MARKET_PRICE = 'SELECT close FROM market_prices WHERE date = ? AND symbol = ?'
+SELECT_MARKET_PRICES = '''
+    SELECT symbol, close FROM market_prices
+    WHERE date = ? AND symbol IN (SELECT value FROM json_each(?))
+'''
+SELECT_PRICE_HISTORY = '''
+    SELECT symbol, date, close FROM market_prices
+    WHERE symbol IN (SELECT value FROM json_each(?)) AND date BETWEEN ? AND ?
+'''
+UPSERT_PRICE = '''
+    INSERT INTO prices (symbol, price, fetched_at)
+    VALUES (?, ?, ?)
+    ON CONFLICT(symbol) DO UPDATE SET price = excluded.price, fetched_at = excluded.fetched_at
+    WHERE excluded.fetched_at > fetched_at
+'''
+SELECT_PRICES = 'SELECT symbol, price, fetched_at FROM prices WHERE symbol IN (SELECT value FROM json_each(?))'
+SELECT_HELD_SYMBOLS = 'SELECT DISTINCT symbol FROM holdings WHERE quantity != 0'
+UPSERT_TOOL_SCHEMAS = '''
+    INSERT INTO tool_schemas (key, server, tools, stored_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET server = excluded.server, tools = excluded.tools, stored_at = excluded.stored_at
+'''
+SELECT_TOOL_SCHEMAS = 'SELECT tools, stored_at FROM tool_schemas WHERE key = ?'
+
+_local = threading.local()
+# The (pid, path) of each database whose schema this process has created, see get_connection
+_schema_ready: set[tuple[int, str]] = set()
+_schema_lock = threading.Lock()
+
+
+class StaleAccountError(Exception):
+    """Raised by a conditional write when the account has changed since it was read."""
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=CACHED_STATEMENTS)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Return the long-lived connection to DB for the calling thread, opening it on first use.
+
+    Connections are keyed by process id as well as path, so a forked child never reuses
+    the parent's connection. The schema is created by the first connection a process opens
+    to a database rather than at import, so a process that never touches the database, or
+    an MCP server before its first tool call, does not wait on the DDL.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    key = (os.getpid(), DB)
+    conn = connections.get(key)
+    if conn is None:
+        conn = connections[key] = _connect(DB)
+        if key not in _schema_ready:
+            with _schema_lock:
+                if key not in _schema_ready:
+                    create_schema(conn)
+                    _schema_ready.add(key)
+    return conn
+
+
+def close_connection() -> None:
+    """Close every connection held by the calling thread."""
+    connections = getattr(_local, "connections", {})
+    while connections:
+        _, conn = connections.popitem()
+        conn.close()
+
+
+@contextmanager
+def read_snapshot():
+    """Run a group of reads against one consistent snapshot of the database."""
+    conn = get_connection()
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
         conn.commit()
 
-def read_account(name):
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT account FROM accounts WHERE name = ?', (name.lower(),))
-        row = cursor.fetchone()
-        return json.loads(row[0]) if row else None
-    
+
+def add_missing_columns(conn: sqlite3.Connection, table: str, columns: dict[str, str]) -> list[str]:
+    """Add any of the given columns that an existing table lacks; returns the names added."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    added = [column for column in columns if column not in existing]
+    for column in added:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {columns[column]}")
+    return added
+
+
+def migrate_legacy_accounts(conn: sqlite3.Connection) -> int:
+    """
+    Convert accounts stored in the original layout, where the whole Account model was
+    serialized as JSON into accounts.account, into rows of the normalized tables.
+
+    Holdings are not copied: net_invested is left NULL, and Account.get rebuilds the
+    positions from the transaction history the first time the account is loaded.
+
+    Safe to run repeatedly; returns the number of accounts converted.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(accounts)")}
+    if "account" not in columns:
+        return 0
+    rows = conn.execute("SELECT name, account FROM accounts WHERE account IS NOT NULL").fetchall()
+    for name, account_json in rows:
+        account = json.loads(account_json)
+        conn.executemany(
+            INSERT_TRANSACTION,
+            [
+                (name, t["symbol"], t["quantity"], t["price"], t["timestamp"], t["rationale"])
+                for t in account["transactions"]
+            ],
+        )
+        conn.executemany(
+            INSERT_PORTFOLIO_VALUE,
+            [(name, timestamp, value) for timestamp, value in account["portfolio_value_time_series"]],
+        )
+        conn.execute(
+            "UPDATE accounts SET balance = ?, strategy = ?, net_invested = NULL, account = NULL WHERE name = ?",
+            (account["balance"], account["strategy"], name),
+        )
+    return len(rows)
+
+
+def migrate_legacy_market(conn: sqlite3.Connection) -> int:
+    """
+    Move the closing prices stored as one JSON object per day in the old market table into
+    market_prices, then drop the table. The old rows did not record which trading day they
+    came from, so it is taken to be the last weekday before the day they were loaded.
+
+    Returns the number of days converted.
+    """
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'market'").fetchone():
+        return 0
+    rows = conn.execute("SELECT date, data FROM market").fetchall()
+    for date, data in rows:
+        trading_date = datetime.strptime(date, "%Y-%m-%d") - timedelta(days=1)
+        while trading_date.weekday() >= 5:
+            trading_date -= timedelta(days=1)
+        trading_date = trading_date.strftime("%Y-%m-%d")
+        conn.executemany(
+            UPSERT_MARKET_PRICE,
+            [(trading_date, symbol, None, None, None, close, None) for symbol, close in json.loads(data).items()],
+        )
+        conn.execute(UPSERT_MARKET_DATE, (date, trading_date))
+    conn.execute("DROP TABLE market")
+    return len(rows)
+
+def create_schema(conn: sqlite3.Connection) -> None:
+    """Create the tables and indexes that are missing, and migrate data from older layouts."""
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS accounts (
+                name TEXT PRIMARY KEY,
+                balance REAL,
+                strategy TEXT,
+                net_invested REAL,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        add_missing_columns(
+            conn,
+            "accounts",
+            {"balance": "REAL", "strategy": "TEXT", "net_invested": "REAL", "version": "INTEGER NOT NULL DEFAULT 0"},
+        )
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS holdings (
+                name TEXT,
+                symbol TEXT,
+                quantity INTEGER,
+                average_cost REAL,
+                realized_pnl REAL,
+                PRIMARY KEY (name, symbol)
+            )
+        ''')
+        if add_missing_columns(conn, "holdings", {"average_cost": "REAL", "realized_pnl": "REAL"}):
+            # Positions written before cost basis was tracked are rebuilt by Account.get
+            conn.execute("UPDATE accounts SET net_invested = NULL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                symbol TEXT,
+                quantity INTEGER,
+                price REAL,
+                timestamp TEXT,
+                rationale TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS transactions_name ON transactions (name, id)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS portfolio_values (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                datetime TEXT,
+                value REAL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS portfolio_values_name ON portfolio_values (name, id)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS portfolio_series (
+                name TEXT,
+                resolution TEXT,
+                slot INTEGER,
+                bucket INTEGER,
+                datetime TEXT,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                count INTEGER,
+                PRIMARY KEY (name, resolution, slot)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('CREATE TABLE IF NOT EXISTS valuations (name TEXT PRIMARY KEY, datetime TEXT, value REAL, prices TEXT)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                datetime DATETIME,
+                type TEXT,
+                message TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS logs_name_datetime ON logs (name, datetime)')
+        conn.execute('CREATE INDEX IF NOT EXISTS logs_name_id ON logs (name, id)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS market_prices (
+                date TEXT,
+                symbol TEXT,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume REAL,
+                PRIMARY KEY (date, symbol)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS market_prices_symbol_date ON market_prices (symbol, date)')
+        conn.execute('CREATE TABLE IF NOT EXISTS market_dates (date TEXT PRIMARY KEY, trading_date TEXT)')
+        conn.execute('CREATE TABLE IF NOT EXISTS prices (symbol TEXT PRIMARY KEY, price REAL, fetched_at REAL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS tool_schemas (key TEXT PRIMARY KEY, server TEXT, tools TEXT, stored_at REAL)')
+        migrate_legacy_accounts(conn)
+        migrate_legacy_market(conn)
+
+def _bump_version(conn: sqlite3.Connection, name: str, expected_version: int | None) -> int:
+    """
+    Advance an account's version inside the current write transaction and return it.
+    Every write to an account or its child tables goes through here, so a reader holding
+    a copy at an older version knows it is stale.
+
+    When expected_version is given, this is the optimistic concurrency check: if another
+    writer has committed since the caller read the account, StaleAccountError is raised and
+    the surrounding transaction rolls back without having changed anything.
+    """
+    if expected_version is None:
+        conn.execute(BUMP_ACCOUNT_VERSION, (name,))
+        return conn.execute(SELECT_ACCOUNT_VERSION, (name,)).fetchone()[0]
+    if conn.execute(BUMP_ACCOUNT_VERSION_FROM, (name, expected_version)).rowcount == 0:
+        raise StaleAccountError(f"Account {name} has changed since version {expected_version} was read")
+    return expected_version + 1
+
+def create_account(name: str, balance: float, strategy: str) -> None:
+    with get_connection() as conn:
+        conn.execute(INSERT_ACCOUNT, (name.lower(), balance, strategy))
+
+def write_account(name: str, balance: float, strategy: str, expected_version: int) -> int:
+    name = name.lower()
+    with get_connection() as conn:
+        version = _bump_version(conn, name, expected_version)
+        conn.execute(UPDATE_ACCOUNT, (balance, strategy, name))
+        return version
+
+def read_account_version(name: str) -> int | None:
+    """Read just the version of an account, to check whether a cached copy is still current."""
+    row = get_connection().execute(SELECT_ACCOUNT_VERSION, (name.lower(),)).fetchone()
+    return row[0] if row else None
+
+def read_account(name: str) -> dict | None:
+    """
+    Read the balance, strategy, net invested amount and positions of an account;
+    transactions and portfolio values are loaded separately, on demand.
+    """
+    with read_snapshot() as conn:
+        row = conn.execute(SELECT_ACCOUNT, (name.lower(),)).fetchone()
+        if not row:
+            return None
+        positions = {
+            symbol: {"symbol": symbol, "quantity": quantity, "average_cost": average_cost, "realized_pnl": realized_pnl}
+            for symbol, quantity, average_cost, realized_pnl in conn.execute(SELECT_HOLDINGS, (name.lower(),))
+        }
+    return {
+        "name": name.lower(),
+        "balance": row[0],
+        "strategy": row[1],
+        "net_invested": row[2],
+        "version": row[3],
+        "positions": positions,
+    }
+
+def reset_account(name: str, balance: float, strategy: str) -> int:
+    """Restore an account to a fresh balance and strategy, discarding its history."""
+    name = name.lower()
+    with get_connection() as conn:
+        conn.execute(INSERT_ACCOUNT, (name, balance, strategy))
+        conn.execute(UPDATE_ACCOUNT, (balance, strategy, name))
+        conn.execute(UPDATE_NET_INVESTED, (0, name))
+        for table in ("holdings", "transactions", "portfolio_values", "portfolio_series", "valuations"):
+            conn.execute(f"DELETE FROM {table} WHERE name = ?", (name,))
+        return _bump_version(conn, name, None)
+
+def write_positions(name: str, net_invested: float, positions: list[dict], expected_version: int) -> int:
+    """Replace every position of an account, along with its net invested amount."""
+    name = name.lower()
+    with get_connection() as conn:
+        version = _bump_version(conn, name, expected_version)
+        conn.execute("DELETE FROM holdings WHERE name = ?", (name,))
+        conn.executemany(
+            UPSERT_HOLDING,
+            [(name, p["symbol"], p["quantity"], p["average_cost"], p["realized_pnl"]) for p in positions],
+        )
+        conn.execute(UPDATE_NET_INVESTED, (net_invested, name))
+        return version
+
+def write_trades(
+    name: str,
+    balance: float,
+    net_invested: float,
+    positions: list[dict],
+    transactions: list[dict],
+    expected_version: int,
+) -> int:
+    """
+    Record one or more trades as a single SQLite transaction: the new balance and net invested
+    amount, the updated positions in the traded symbols, and appended rows in the transactions
+    table. Nothing is written unless the account is still at expected_version.
+    """
+    name = name.lower()
+    with get_connection() as conn:
+        version = _bump_version(conn, name, expected_version)
+        conn.execute(UPDATE_BALANCE, (balance, net_invested, name))
+        conn.executemany(
+            UPSERT_HOLDING,
+            [(name, p["symbol"], p["quantity"], p["average_cost"], p["realized_pnl"]) for p in positions],
+        )
+        conn.executemany(
+            INSERT_TRANSACTION,
+            [(name, t["symbol"], t["quantity"], t["price"], t["timestamp"], t["rationale"]) for t in transactions],
+        )
+        return version
+
+def read_transactions(name: str) -> list[dict]:
+    rows = get_connection().execute(SELECT_TRANSACTIONS, (name.lower(),)).fetchall()
+    return [
+        {"symbol": symbol, "quantity": quantity, "price": price, "timestamp": timestamp, "rationale": rationale}
+        for symbol, quantity, price, timestamp, rationale in rows
+    ]
+
+def write_valuation(name: str, timestamp: str, value: float, prices: dict[str, float]) -> None:
+    with get_connection() as conn:
+        conn.execute(UPSERT_VALUATION, (name.lower(), timestamp, value, json.dumps(prices)))
+
+def read_valuation(name: str) -> dict | None:
+    """The most recent valuation of an account: when it ran, the portfolio value, and the prices it used."""
+    row = get_connection().execute(SELECT_VALUATION, (name.lower(),)).fetchone()
+    if not row:
+        return None
+    return {"datetime": row[0], "value": row[1], "prices": json.loads(row[2])}
+
+class LogWriter:
+    """
+    Write-behind buffer for the logs table.
+
+    write_log only appends to a bounded in-memory queue, so callers such as the tracing
+    hooks that run inside the traders' event loop never wait on SQLite. A background thread
+    drains the queue and inserts each batch with executemany in a single transaction, as soon
+    as batch_size entries are waiting or flush_interval seconds after the first one arrived.
+    When the queue is full, append blocks until the writer catches up.
+    """
+
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(self, max_size: int = LOG_QUEUE_SIZE, batch_size: int = LOG_BATCH_SIZE, flush_interval: float = LOG_FLUSH_INTERVAL):
+        self.queue = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self) -> None:
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                # A forked child inherits the parent's queue contents but not its writer thread
+                self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def append(self, name: str, type: str, message: str) -> None:
+        self._ensure_started()
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        self.queue.put((name.lower(), now, type, message))
+
+    def flush(self) -> None:
+        """Block until every entry appended so far has been written."""
+        if not self._thread or not self._thread.is_alive():
+            return
+        self.queue.put(self._FLUSH)
+        self.queue.join()
+
+    def close(self) -> None:
+        """Write everything still queued, then stop the writer thread."""
+        if not self._thread or not self._thread.is_alive():
+            return
+        self.flush()
+        self.queue.put(self._STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        markers = (self._FLUSH, self._STOP)
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] not in markers and len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            rows = [row for row in batch if row not in markers]
+            try:
+                if rows:
+                    with get_connection() as conn:
+                        conn.executemany(INSERT_LOG, rows)
+            except sqlite3.Error as e:
+                print(f"Was not able to write {len(rows)} log entries due to {e}", file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if batch[-1] is self._STOP:
+                return
+
+
+log_writer = LogWriter()
+atexit.register(log_writer.close)
+
 def write_log(name: str, type: str, message: str):
     """
-    Write a log entry to the logs table.
-    
+    Queue a log entry for the logs table; it is written by the background log writer.
+
     Args:
         name (str): The name associated with the log
         type (str): The type of log entry
         message (str): The log message
     """
-    now = datetime.now().isoformat()
-    
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO logs (name, datetime, type, message)
-            VALUES (?, datetime('now'), ?, ?)
-        ''', (name.lower(), type, message))
-        conn.commit()
+    log_writer.append(name, type, message)
+
+def flush_logs() -> None:
+    """Block until every queued log entry has been written to the logs table."""
+    log_writer.flush()
 
 def read_log(name: str, last_n=10):
     """
     Read the most recent log entries for a given name.
-    
+
     Args:
         name (str): The name to retrieve logs for
         last_n (int): Number of most recent entries to retrieve
-        
+
     Returns:
         list: A list of tuples containing (datetime, type, message)
     """
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT datetime, type, message FROM logs 
-            WHERE name = ? 
-            ORDER BY datetime DESC
-            LIMIT ?
-        ''', (name.lower(), last_n))
-        
-        return reversed(cursor.fetchall())
-
-def write_market(date: str, data: dict) -> None:
-    data_json = json.dumps(data)
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO market (date, data)
-            VALUES (?, ?)
-            ON CONFLICT(date) DO UPDATE SET data=excluded.data
-        ''', (date, data_json))
-        conn.commit()
+    rows = get_connection().execute(SELECT_LOGS, (name.lower(), last_n)).fetchall()
+    return reversed(rows)
+
+def read_log_since(name: str, after_id: int = 0, limit: int = 100) -> list[tuple]:
+    """
+    Read the log entries for a given name that are newer than a previously seen entry.
+
+    Args:
+        name (str): The name to retrieve logs for
+        after_id (int): The id of the last entry the caller has already seen; 0 for none
+        limit (int): The maximum number of entries to return; when more are available,
+            only the newest are returned
+
+    Returns:
+        list: A list of tuples containing (id, datetime, type, message), oldest first
+    """
+    rows = get_connection().execute(SELECT_LOGS_SINCE, (name.lower(), after_id, limit)).fetchall()
+    rows.reverse()
+    return rows
+
+def write_market_prices(date: str, trading_date: str, bars: list[tuple]) -> None:
+    """
+    Bulk-load one trading day of (symbol, open, high, low, close, volume) bars, and record it
+    as the day whose closes price lookups made on date should use, in a single transaction.
+    """
+    with get_connection() as conn:
+        conn.executemany(UPSERT_MARKET_PRICE, [(trading_date, *bar) for bar in bars])
+        conn.execute(UPSERT_MARKET_DATE, (date, trading_date))
+
+def read_market_date(date: str) -> str | None:
+    """The trading day whose closes have been loaded for lookups made on date, if any."""
+    row = get_connection().execute(SELECT_MARKET_DATE, (date,)).fetchone()
+    return row[0] if row else None
+
+def read_market_price(trading_date: str, symbol: str) -> float | None:
+    row = get_connection().execute(SELECT_MARKET_PRICE, (trading_date, symbol)).fetchone()
+    return row[0] if row else None
+
+def read_market_prices(trading_date: str, symbols: list[str]) -> dict[str, float]:
+    return dict(get_connection().execute(SELECT_MARKET_PRICES, (trading_date, json.dumps(symbols))).fetchall())
+
+def write_price_history(bars: list[tuple]) -> None:
+    """Store (date, symbol, open, high, low, close, volume) bars for any mix of days and symbols."""
+    with get_connection() as conn:
+        conn.executemany(UPSERT_MARKET_PRICE, bars)
+
+def read_price_history(symbols: list[str], start: str, end: str) -> list[tuple[str, str, float]]:
+    """(symbol, date, close) for every stored bar of the symbols from start to end inclusive."""
+    return get_connection().execute(SELECT_PRICE_HISTORY, (json.dumps(symbols), start, end)).fetchall()
+
+def write_prices(prices: dict[str, float], fetched_at: float) -> None:
+    with get_connection() as conn:
+        conn.executemany(UPSERT_PRICE, [(symbol, price, fetched_at) for symbol, price in prices.items()])
+
+def read_prices(symbols: list[str]) -> dict[str, tuple[float, float]]:
+    """The last stored price of each symbol, with the epoch time it was fetched at."""
+    rows = get_connection().execute(SELECT_PRICES, (json.dumps(symbols),)).fetchall()
+    return {symbol: (price, fetched_at) for symbol, price, fetched_at in rows}
+
+def read_held_symbols() -> list[str]:
+    """Every symbol held in any account."""
+    return [row[0] for row in get_connection().execute(SELECT_HELD_SYMBOLS)]
+
+def write_tool_schemas(key: str, server: str, tools: str, stored_at: float) -> None:
+    with get_connection() as conn:
+        conn.execute(UPSERT_TOOL_SCHEMAS, (key, server, tools, stored_at))
 
-def read_market(date: str) -> dict | None:
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT data FROM market WHERE date = ?', (date,))
-        row = cursor.fetchone()
-        return json.loads(row[0]) if row else None
\ No newline at end of file
+def read_tool_schemas(key: str) -> tuple[str, float] | None:
+    """The JSON tool list stored under key, with the epoch time it was stored at."""
+    return get_connection().execute(SELECT_TOOL_SCHEMAS, (key,)).fetchone()
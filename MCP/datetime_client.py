@@ -1,7 +1,6 @@
-import mcp
-from mcp.client.stdio import stdio_client
 from mcp import StdioServerParameters
 from agents import FunctionTool
+from mcp_pool import get_session_pool
 import json
 
 params = StdioServerParameters(
@@ -11,17 +10,12 @@ params = StdioServerParameters(
 )
 
 async def list_datetime_tools():
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            result = await session.list_tools()
-            return result.tools
+    result = await get_session_pool().call(params, lambda session: session.list_tools(), idempotent=True)
+    return result.tools
 
 async def call_datetime_tool(tool_name, tool_args):
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            return await session.call_tool(tool_name, tool_args)
+    # The datetime server's tools only read the clock, so they are safe to run again
+    return await get_session_pool().call(params, lambda session: session.call_tool(tool_name, tool_args), idempotent=True)
 
 async def get_datetime_tools_openai():
     openai_tools = []
@@ -1,4 +1,5 @@
 from mcp.server.fastmcp import FastMCP
+from mcp_transport import run
 from datetime import datetime, timezone
 
 mcp = FastMCP("datetime_server")
@@ -15,4 +16,4 @@ async def get_current_datetime() -> str:
 
 
 if __name__ == "__main__":
-    mcp.run(transport="stdio")
+    run(mcp)
@@ -0,0 +1,165 @@
+"""
+A local stand-in for the parts of the Polygon REST API that market.py uses, for checks and
+benchmarks that must not spend real quota. Point market.py at it with POLYGON_BASE_URL.
+
+Prices are deterministic per symbol and minute. Every request is counted by endpoint, as is
+every TCP connection, and the counts are served as JSON at /__stats (and zeroed by /__reset),
+so a check can assert how many requests went out and a benchmark can show whether connections
+are reused. Benchmarks should run it in a separate process with start_process, so that the
+server does not compete with the code being measured for the GIL.
+
+Usage: uv run fake_polygon.py [--port 8765] [--latency 0.05] [--connect-latency 0.0]
+"""
+
+import argparse
+import json
+import multiprocessing
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+UNIVERSE = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "SPY", "VTI", "F"] + [f"T{i:03d}" for i in range(490)]
+
+
+def fake_price(symbol: str, minute: int | None = None) -> float:
+    minute = int(time.time() // 60) if minute is None else minute
+    base = 20 + zlib.crc32(symbol.encode()) % 48000 / 100
+    wiggle = (zlib.crc32(f"{symbol}{minute}".encode()) % 200 - 100) / 10000
+    return round(base * (1 + wiggle), 2)
+
+
+def fake_bar(symbol: str, day: date) -> dict:
+    minute = int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp() // 60)
+    close = fake_price(symbol, minute)
+    return {
+        "T": symbol,
+        "o": round(close * 0.995, 2),
+        "h": round(close * 1.01, 2),
+        "l": round(close * 0.99, 2),
+        "c": close,
+        "v": 1_000_000 + zlib.crc32(symbol.encode()) % 9_000_000,
+        "t": minute * 60_000 + 20 * 3_600_000,
+    }
+
+
+def last_weekday() -> date:
+    day = datetime.now(timezone.utc).date() - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def snapshot(symbol: str) -> dict:
+    close = fake_price(symbol)
+    return {"ticker": symbol, "min": {"c": close}, "prevDay": fake_bar(symbol, last_weekday()), "todaysChange": 0.0}
+
+
+class FakePolygon:
+    def __init__(self, port: int = 0, latency: float = 0.0, connect_latency: float = 0.0):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.requests = Counter()
+        self.connections = 0
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+                # Stands in for the round trips of a TCP and TLS handshake with the real API
+                time.sleep(fake.connect_latency)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                parts = url.path.strip("/").split("/")
+                query = parse_qs(url.query)
+                if url.path == "/__stats":
+                    with fake._lock:
+                        return self.reply({**fake.requests, "connections": fake.connections})
+                if url.path == "/__reset":
+                    fake.reset()
+                    return self.reply({})
+                time.sleep(fake.latency)
+                if parts[:6] == ["v2", "snapshot", "locale", "us", "markets", "stocks"] and len(parts) == 8:
+                    endpoint, body = "snapshot_ticker", {"status": "OK", "ticker": snapshot(parts[7])}
+                elif parts[:6] == ["v2", "snapshot", "locale", "us", "markets", "stocks"]:
+                    symbols = query.get("tickers", [",".join(UNIVERSE)])[0].split(",")
+                    endpoint, body = "snapshot_all", {"status": "OK", "tickers": [snapshot(s) for s in symbols]}
+                elif parts[:3] == ["v2", "aggs", "ticker"] and parts[-1] == "prev":
+                    endpoint, body = "previous_close", {"status": "OK", "results": [fake_bar(parts[3], last_weekday())]}
+                elif parts[:6] == ["v2", "aggs", "grouped", "locale", "us", "market"]:
+                    day = date.fromisoformat(parts[7])
+                    endpoint, body = "grouped_daily", {"status": "OK", "results": [fake_bar(s, day) for s in UNIVERSE]}
+                elif url.path == "/v1/marketstatus/now":
+                    endpoint, body = "market_status", {"market": "open"}
+                else:
+                    return self.reply({"status": "NOT_FOUND"}, 404)
+                with fake._lock:
+                    fake.requests[endpoint] += 1
+                self.reply(body)
+
+            def reply(self, body: dict, status: int = 200):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self) -> "FakePolygon":
+        threading.Thread(target=self.server.serve_forever, name="fake-polygon", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.connections = 0
+
+
+def _serve(port: int, latency: float, connect_latency: float, ready) -> None:
+    fake = FakePolygon(port, latency, connect_latency)
+    ready.send(fake.url)
+    fake.server.serve_forever()
+
+
+def start_process(latency: float = 0.0, connect_latency: float = 0.0) -> tuple[str, multiprocessing.Process]:
+    """Run a fake server in a child process; returns its URL and the process, to terminate when done."""
+    ready, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(0, latency, connect_latency, child), daemon=True)
+    process.start()
+    return ready.recv(), process
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--connect-latency", type=float, default=0.0, help="seconds added to every new connection")
+    args = parser.parse_args()
+    fake = FakePolygon(args.port, args.latency, args.connect_latency)
+    print(f"Fake Polygon API at {fake.url}")
+    fake.server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+A local stand-in for the Pushover messages API, for checks of push_dispatcher.py that must not
+send real notifications. Point the dispatcher at it with PUSHOVER_URL.
+
+Every message it receives is kept, with its title, and served as JSON at /__stats. It can be
+made slow, made to fail its next requests with a server error or a 429, and made to report a
+given number of remaining messages in the rate limit headers, as Pushover does.
+
+Usage: uv run fake_pushover.py [--port 8766] [--latency 0.0]
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+LIMIT = 10_000
+
+
+class FakePushover:
+    def __init__(self, port: int = 0, latency: float = 0.0):
+        self.latency = latency
+        self.fail_next = 0
+        self.fail_status = 500
+        self.remaining = LIMIT
+        self.reset_at = int(time.time()) + 30 * 86400
+        self.messages: list[dict] = []
+        self.requests = 0
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if self.path == "/__stats":
+                    with fake._lock:
+                        return self.reply({"requests": fake.requests, "messages": fake.messages})
+                self.reply({"status": 0, "errors": ["not found"]}, 404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+                time.sleep(fake.latency)
+                with fake._lock:
+                    fake.requests += 1
+                    if fake.fail_next:
+                        fake.fail_next -= 1
+                        return self.reply({"status": 0, "errors": ["failed"]}, fake.fail_status)
+                    if not form.get("message"):
+                        return self.reply({"status": 0, "errors": ["message cannot be blank"]}, 400)
+                    if fake.remaining <= 0:
+                        return self.reply({"status": 0, "errors": ["application over quota"]}, 429)
+                    fake.remaining -= 1
+                    fake.messages.append({"title": form.get("title"), "message": form["message"]})
+                self.reply({"status": 1, "request": f"fake-{fake.requests}"})
+
+            def reply(self, body: dict, status: int = 200):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("X-Limit-App-Limit", str(LIMIT))
+                self.send_header("X-Limit-App-Remaining", str(max(fake.remaining, 0)))
+                self.send_header("X-Limit-App-Reset", str(fake.reset_at))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/1/messages.json"
+
+    def start(self) -> "FakePushover":
+        threading.Thread(target=self.server.serve_forever, name="fake-pushover", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latency = 0.0
+            self.fail_next = 0
+            self.fail_status = 500
+            self.remaining = LIMIT
+            self.messages.clear()
+            self.requests = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+    fake = FakePushover(args.port, args.latency)
+    print(f"Fake Pushover API at {fake.url}")
+    fake.server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Technical indicators for many symbols at once, from a rolling history of daily closes.
+
+The history is the last HISTORY_DAYS completed sessions. With Polygon it is read from the
+market_prices table, where market.py stores each day's bars for the whole market; a symbol
+with days missing from the table is backfilled with one aggregates request, stored there for
+next time. With the market simulator it is computed directly. A process keeps the histories
+it has loaded until the next session closes.
+
+Closes are held as one (symbols, days) NumPy array, forward-filled over missing days and NaN
+before a symbol's first bar, and every indicator is computed for all the symbols in one pass.
+Moving averages and volatility need a full window of closes, otherwise they are None.
+
+Problems are reported on stderr.
+"""
+
+import os
+import sys
+import threading
+from datetime import date, datetime
+import numpy as np
+from dotenv import load_dotenv
+import market
+import market_sim
+from market_calendar import NEW_YORK, completed_sessions
+from database import read_price_history, write_price_history
+
+load_dotenv(override=True)
+
+HISTORY_DAYS = int(os.getenv("INDICATOR_HISTORY_DAYS", "250"))
+DAYS_PER_YEAR = 252
+
+
+def _forward_fill(closes: np.ndarray) -> np.ndarray:
+    """Carry each symbol's last close over the days it has no bar; leading days stay NaN"""
+    valid = ~np.isnan(closes)
+    index = np.maximum.accumulate(np.where(valid, np.arange(closes.shape[1]), 0), axis=1)
+    filled = closes[np.arange(len(closes))[:, None], index]
+    filled[np.cumsum(valid, axis=1) == 0] = np.nan
+    return filled
+
+
+def _ewm(values: np.ndarray, alpha: float) -> np.ndarray:
+    """Exponentially weighted mean of each row, weighting the latest value most and skipping NaN"""
+    weights = (1.0 - alpha) ** np.arange(values.shape[1])[::-1]
+    present = ~np.isnan(values)
+    with np.errstate(invalid="ignore"):
+        return np.where(present, values, 0.0) @ weights / (present @ weights)
+
+
+def sma(closes: np.ndarray, window: int) -> np.ndarray:
+    if closes.shape[1] < window:
+        return np.full(len(closes), np.nan)
+    return closes[:, -window:].mean(axis=1)
+
+
+def ema(closes: np.ndarray, span: int) -> np.ndarray:
+    values = _ewm(closes, 2.0 / (span + 1))
+    values[np.sum(~np.isnan(closes), axis=1) < span] = np.nan
+    return values
+
+
+def rsi(closes: np.ndarray, period: int = 14) -> np.ndarray:
+    """Relative strength index, with Wilder's smoothing of the daily gains and losses"""
+    change = np.diff(closes, axis=1)
+    gains = _ewm(np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)), 1.0 / period)
+    losses = _ewm(np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0)), 1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.where(losses > 0, 100.0 - 100.0 / (1.0 + gains / losses), 100.0)
+    values[np.sum(~np.isnan(change), axis=1) < period] = np.nan
+    return values
+
+
+def volatility(closes: np.ndarray, window: int) -> np.ndarray:
+    """Annualized standard deviation of the last window daily log returns"""
+    if closes.shape[1] <= window:
+        return np.full(len(closes), np.nan)
+    returns = np.diff(np.log(closes[:, -window - 1:]), axis=1)
+    return returns.std(axis=1, ddof=1) * np.sqrt(DAYS_PER_YEAR)
+
+
+def drawdowns(closes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """The current fall from the highest close in the history, and the largest fall within it"""
+    peaks = np.fmax.accumulate(closes, axis=1)
+    with np.errstate(invalid="ignore"):
+        drawdown = closes / peaks - 1.0
+    deepest = np.min(np.where(np.isnan(drawdown), np.inf, drawdown), axis=1)
+    return drawdown[:, -1], np.where(np.isinf(deepest), np.nan, deepest)
+
+
+def compute(closes: np.ndarray) -> dict[str, np.ndarray]:
+    """Every indicator for every row of a (symbols, days) array of daily closes, oldest first"""
+    drawdown, max_drawdown = drawdowns(closes)
+    with np.errstate(invalid="ignore"):
+        change = closes[:, -1] / closes[:, -21] - 1.0 if closes.shape[1] > 20 else np.full(len(closes), np.nan)
+    return {
+        "close": closes[:, -1],
+        "change_20d": change,
+        "sma_20": sma(closes, 20),
+        "sma_50": sma(closes, 50),
+        "sma_200": sma(closes, 200),
+        "ema_12": ema(closes, 12),
+        "ema_26": ema(closes, 26),
+        "rsi_14": rsi(closes, 14),
+        "volatility_20d": volatility(closes, 20),
+        "drawdown": drawdown,
+        "max_drawdown": max_drawdown,
+    }
+
+
+class PriceHistory:
+    """The daily closes of the last days completed sessions, loaded once per symbol per session"""
+
+    def __init__(self, days: int = HISTORY_DAYS):
+        self.days = days
+        self._sessions: list[date] = []
+        self._closes: dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _backfill(self, symbol: str, start: date, end: date) -> list[tuple]:
+        client = market.get_polygon_client()
+        aggs = client.get_aggs(symbol, 1, "day", start, end, adjusted=True, limit=50000)
+        return [
+            (datetime.fromtimestamp(agg.timestamp / 1000, NEW_YORK).date().isoformat(), symbol, agg.open, agg.high, agg.low, agg.close, agg.volume)
+            for agg in aggs
+        ]
+
+    def _load_polygon(self, symbols: list[str], sessions: list[date]) -> np.ndarray:
+        try:
+            market.get_market_for_prior_date(datetime.now().date().strftime("%Y-%m-%d"))
+        except Exception as e:
+            print(f"Was not able to load the prior day's market due to {e}", file=sys.stderr)
+        start, end = sessions[0].isoformat(), sessions[-1].isoformat()
+        column = {day.isoformat(): i for i, day in enumerate(sessions)}
+        row = {symbol: i for i, symbol in enumerate(symbols)}
+        closes = np.full((len(symbols), len(sessions)), np.nan)
+        for symbol, day, close in read_price_history(symbols, start, end):
+            if day in column:
+                closes[row[symbol], column[day]] = close
+        for symbol in symbols:
+            missing = np.flatnonzero(np.isnan(closes[row[symbol]]))
+            if not len(missing):
+                continue
+            try:
+                bars = self._backfill(symbol, sessions[missing[0]], sessions[missing[-1]])
+            except Exception as e:
+                print(f"Was not able to backfill the history of {symbol} due to {e}", file=sys.stderr)
+                continue
+            write_price_history(bars)
+            for day, _, _, _, _, close, _ in bars:
+                if day in column:
+                    closes[row[symbol], column[day]] = close
+        return closes
+
+    def _load_simulated(self, symbols: list[str], sessions: list[date]) -> np.ndarray:
+        days, closes = market_sim.simulator.closes(symbols, sessions[0], sessions[-1])
+        column = {day: i for i, day in enumerate(sessions)}
+        aligned = np.full((len(symbols), len(sessions)), np.nan)
+        aligned[:, [column[day] for day in days]] = closes
+        return aligned
+
+    def closes(self, symbols: list[str]) -> tuple[list[date], np.ndarray]:
+        """The sessions, oldest first, and the closes of each symbol on them, shaped (symbols, days)"""
+        sessions = completed_sessions(self.days)
+        with self._lock:
+            if sessions != self._sessions:
+                self._sessions, self._closes = sessions, {}
+            cached = self._closes
+            missing = [symbol for symbol in symbols if symbol not in cached]
+        if missing:
+            load = self._load_simulated if market.use_simulator else self._load_polygon
+            loaded = _forward_fill(load(missing, sessions))
+            with self._lock:
+                cached.update(zip(missing, loaded))
+        return sessions, np.array([cached[symbol] for symbol in symbols]).reshape(len(symbols), len(sessions))
+
+
+price_history = PriceHistory()
+
+
+def _value(x: float) -> float | None:
+    return None if np.isnan(x) else round(float(x), 4)
+
+
+def get_indicators(symbols: list[str]) -> dict[str, dict]:
+    """Technical indicators of each symbol as of the last close, computed together"""
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    sessions, closes = price_history.closes(symbols)
+    indicators = compute(closes)
+    days = np.sum(~np.isnan(closes), axis=1)
+    return {
+        symbol: {
+            "as_of": sessions[-1].isoformat(),
+            "days": int(days[i]),
+            **{name: _value(values[i]) for name, values in indicators.items()},
+        }
+        for i, symbol in enumerate(symbols)
+    }
+
+
+def get_history(symbols: list[str], days: int) -> dict:
+    """The dates of the last days sessions and each symbol's closes on them, oldest first"""
+    symbols = list(dict.fromkeys(symbols))
+    days = max(1, min(days, price_history.days))
+    sessions, closes = price_history.closes(symbols)
+    return {
+        "dates": [day.isoformat() for day in sessions[-days:]],
+        "closes": {symbol: [_value(x) for x in closes[i, -days:]] for i, symbol in enumerate(symbols)},
+    }
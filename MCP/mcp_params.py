@@ -1,9 +1,16 @@
 import os
 from dotenv import load_dotenv
 from market import is_paid_polygon, is_realtime_polygon
+from mcp_transport import http_url
 
 load_dotenv(override=True)
 
+# "stdio" starts the servers as child processes of the trading floor; "http" connects to shared
+# servers already running with --transport http, e.g. uv run accounts_server.py --transport http
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio").strip().lower()
+# "true" gives the trader the accounts, push and market tools from one mcp_gateway.py server
+MCP_GATEWAY = os.getenv("MCP_GATEWAY", "false").strip().lower() == "true"
+
 brave_env = {"BRAVE_API_KEY": os.getenv("BRAVE_API_KEY")}
 polygon_api_key = os.getenv("POLYGON_API_KEY")
 
@@ -15,17 +22,30 @@ if is_paid_polygon or is_realtime_polygon:
         "args": ["--from", "git+https://github.com/polygon-io/mcp_polygon@v0.1.0", "mcp_polygon"],
         "env": {"POLYGON_API_KEY": polygon_api_key},
     }
+elif MCP_TRANSPORT == "http":
+    market_mcp = {"url": http_url("market_server")}
 else:
     market_mcp = {"command": "uv", "args": ["run", "market_server.py"]}
 
 
 # The full set of MCP servers for the trader: Accounts, Push Notification and the Market
 
-trader_mcp_server_params = [
-    {"command": "uv", "args": ["run", "accounts_server.py"]},
-    {"command": "uv", "args": ["run", "push_server.py"]},
-    market_mcp,
-]
+if MCP_GATEWAY:
+    gateway_mcp = {"url": http_url("mcp_gateway")} if MCP_TRANSPORT == "http" else {"command": "uv", "args": ["run", "mcp_gateway.py"]}
+    # The gateway has its own market tools, but Polygon's server is kept when the plan has more
+    trader_mcp_server_params = [gateway_mcp] + ([market_mcp] if is_paid_polygon or is_realtime_polygon else [])
+elif MCP_TRANSPORT == "http":
+    trader_mcp_server_params = [
+        {"url": http_url("accounts_server")},
+        {"url": http_url("push_server")},
+        market_mcp,
+    ]
+else:
+    trader_mcp_server_params = [
+        {"command": "uv", "args": ["run", "accounts_server.py"]},
+        {"command": "uv", "args": ["run", "push_server.py"]},
+        market_mcp,
+    ]
 
 # The full set of MCP servers for the researcher: Fetch, Brave Search and Memory
 
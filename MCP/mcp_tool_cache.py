@@ -0,0 +1,119 @@
+"""
+Tool lists of MCP servers, stored in the database so that each version of a server's code is
+listed once, not on every run.
+
+The agents SDK lists the tools of every MCP server on every turn of an agent. With
+cache_tools_list a server makes that round trip once per connection; the servers here also skip
+that first one when the tool_schemas table has the list from an earlier connection. An entry is
+keyed by the server's command, args and URL, and for a server run from a Python file here, by a
+hash of that file and of every module here that it imports, directly or not, so that changing
+the code of a server is enough to invalidate its entry. Servers run from a package by uvx or
+npx, or reached by URL, have no code here to hash, so their entries expire after
+TOOL_CACHE_MAX_AGE_HOURS instead.
+
+Every round trip that is still made is recorded as a custom span in the current trace, next to
+the SDK's own mcp_tools span for every listing, so report_tool_cache.py can count from the logs
+how many round trips the caching saved in each cycle.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import time
+from agents import custom_span
+from agents.mcp import MCPServerStdio, MCPServerStreamableHttp
+from mcp.types import Tool as MCPTool
+from dotenv import load_dotenv
+from database import read_tool_schemas, write_tool_schemas
+
+load_dotenv(override=True)
+
+TOOL_CACHE_MAX_AGE_HOURS = float(os.getenv("TOOL_CACHE_MAX_AGE_HOURS", "24"))
+ROUND_TRIP_SPAN = "list_tools round trip"
+
+
+def source_files(script: str) -> list[str]:
+    """The script and every module in its directory that it imports, directly or not"""
+    root = os.path.dirname(os.path.abspath(script))
+    seen = set()
+    pending = [os.path.abspath(script)]
+    while pending:
+        path = pending.pop()
+        if path in seen or not os.path.isfile(path):
+            continue
+        seen.add(path)
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            pending += [os.path.join(root, name.split(".")[0] + ".py") for name in names]
+    return sorted(seen)
+
+
+def cache_key(params: dict) -> tuple[str, bool]:
+    """The key of a server's tool list, and whether it covers the server's code"""
+    digest = hashlib.sha256(json.dumps([params.get("command"), params.get("args"), params.get("url")]).encode())
+    cwd = params.get("cwd") or os.getcwd()
+    files = [
+        path
+        for arg in params.get("args", [])
+        if arg.endswith(".py")
+        for path in source_files(os.path.join(cwd, arg))
+    ]
+    for path in files:
+        with open(path, "rb") as f:
+            digest.update(os.path.basename(path).encode())
+            digest.update(f.read())
+    return digest.hexdigest(), bool(files)
+
+
+class PersistentToolsList:
+    """Mixin for an SDK MCP server class that keeps its tool list in the database"""
+
+    def _init_tools_list(self, params: dict) -> None:
+        self._tools_params = params
+        self._refetch = False
+
+    def _load_tools_list(self) -> str:
+        """Load the stored tool list if it is still valid; returns the key it is stored under"""
+        key, covers_code = cache_key(self._tools_params)
+        stored = None if self._refetch else read_tool_schemas(key)
+        if stored is not None:
+            tools, stored_at = stored
+            if covers_code or time.time() - stored_at < TOOL_CACHE_MAX_AGE_HOURS * 3600:
+                self._tools_list = [MCPTool.model_validate(tool) for tool in json.loads(tools)]
+                self._cache_dirty = False
+        return key
+
+    def invalidate_tools_cache(self) -> None:
+        super().invalidate_tools_cache()
+        self._refetch = True
+
+    async def list_tools(self, run_context=None, agent=None):
+        key = self._load_tools_list() if self._cache_dirty else None
+        if not self._cache_dirty:
+            return await super().list_tools(run_context, agent)
+        with custom_span(f"{ROUND_TRIP_SPAN} {self.name}"):
+            tools = await super().list_tools(run_context, agent)
+        stored = json.dumps([tool.model_dump(mode="json", exclude_none=True) for tool in self._tools_list])
+        write_tool_schemas(key, self.name, stored, time.time())
+        self._refetch = False
+        return tools
+
+
+class CachedMCPServerStdio(PersistentToolsList, MCPServerStdio):
+    def __init__(self, params: dict, **kwargs):
+        super().__init__(params, cache_tools_list=True, **kwargs)
+        self._init_tools_list(params)
+
+
+class CachedMCPServerStreamableHttp(PersistentToolsList, MCPServerStreamableHttp):
+    def __init__(self, params: dict, **kwargs):
+        super().__init__(params, cache_tools_list=True, **kwargs)
+        self._init_tools_list(params)
@@ -0,0 +1,236 @@
+"""
+A board of live prices in shared memory, published by one process and read by all the others.
+
+The MCP servers, the trading floor and the dashboard each run in their own processes, and
+without the board each of them fetches and parses the same quotes. With it, one writer process
+owns fetching: every PRICE_BOARD_INTERVAL seconds it prices every symbol held in any account,
+and the PRICE_BOARD_SYMBOLS watchlist, and publishes them into a multiprocessing.shared_memory
+segment. Every other process maps the segment and reads prices from it directly, without a
+request or a query. Symbols not on the board are priced as before, through the price cache.
+
+Layout of the segment: a header of HEADER_FIELDS unsigned 64-bit words, then capacity float64 prices,
+capacity float64 publication times (epoch seconds, 0 for never) and capacity 16-byte symbols.
+A symbol's slot is assigned by the writer the first time it publishes it and never changes, so
+a reader resolves a symbol to its slot once and keeps the mapping.
+
+Reads are made consistent with a sequence lock: the writer makes the sequence number odd,
+writes a batch of prices and makes it even again; a reader notes the sequence number, copies
+the values and retries if it changed or was odd, so no read sees a half-written publication.
+
+Run the writer with: uv run price_board.py (the trading floor starts one with start_process)
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from dotenv import load_dotenv
+from database import read_held_symbols
+
+load_dotenv(override=True)
+
+PRICE_BOARD_NAME = os.getenv("PRICE_BOARD_NAME", "agentic_price_board")
+PRICE_BOARD_SLOTS = int(os.getenv("PRICE_BOARD_SLOTS", "4096"))
+PRICE_BOARD_INTERVAL = float(os.getenv("PRICE_BOARD_INTERVAL", "15"))
+PRICE_BOARD_SYMBOLS = [s.strip().upper() for s in os.getenv("PRICE_BOARD_SYMBOLS", "").split(",") if s.strip()]
+
+MAGIC = 0x5052494345424F31  # "PRICEBO1"
+SYMBOL_BYTES = 16
+HEADER_FIELDS = 8
+MAGIC_FIELD, CAPACITY, COUNT, SEQUENCE, HEARTBEAT = range(5)
+
+
+def _size(capacity: int) -> int:
+    return HEADER_FIELDS * 8 + capacity * (8 + 8 + SYMBOL_BYTES)
+
+
+class PriceBoard:
+    """A view of the shared segment; create() makes the writer's, attach() a reader's."""
+
+    def __init__(self, shm: SharedMemory, capacity: int, owner: bool):
+        self._shm = shm
+        self.owner = owner
+        buf = shm.buf
+        offset = HEADER_FIELDS * 8
+        self._header = buf[:offset].cast("Q")
+        self._prices = buf[offset:offset + capacity * 8].cast("d")
+        self._updated = buf[offset + capacity * 8:offset + capacity * 16].cast("d")
+        self._symbols = buf[offset + capacity * 16:_size(capacity)]
+        self.capacity = capacity
+        self._slots: dict[str, int] = {}
+
+    @classmethod
+    def create(cls, name: str = PRICE_BOARD_NAME, capacity: int = PRICE_BOARD_SLOTS) -> "PriceBoard":
+        """Create the segment for a writer, replacing one left behind by a writer that died"""
+        try:
+            shm = SharedMemory(name, create=True, size=_size(capacity))
+        except FileExistsError:
+            stale = SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            shm = SharedMemory(name, create=True, size=_size(capacity))
+        shm.buf[:_size(capacity)] = bytes(_size(capacity))
+        board = cls(shm, capacity, owner=True)
+        board._header[CAPACITY] = capacity
+        board._header[MAGIC_FIELD] = MAGIC
+        return board
+
+    @classmethod
+    def attach(cls, name: str = PRICE_BOARD_NAME) -> "PriceBoard | None":
+        """Map a writer's segment for reading, or None if no board is being published"""
+        try:
+            if sys.version_info >= (3, 13):
+                shm = SharedMemory(name, track=False)
+            else:
+                shm = SharedMemory(name)
+                # Attaching registers the segment with the resource tracker, which would unlink
+                # it when this reader exits; the writer owns its lifetime
+                resource_tracker.unregister(shm._name, "shared_memory")
+        except FileNotFoundError:
+            return None
+        header = shm.buf[:HEADER_FIELDS * 8].cast("Q")
+        magic, capacity = header[MAGIC_FIELD], header[CAPACITY]
+        header.release()
+        if magic != MAGIC:
+            shm.close()
+            return None
+        return cls(shm, capacity, owner=False)
+
+    def close(self) -> None:
+        """Release the mapping; the writer also marks the board closed and removes the segment"""
+        if self.owner:
+            self._header[MAGIC_FIELD] = 0
+        for view in (self._header, self._prices, self._updated, self._symbols):
+            view.release()
+        self._header = None
+        if self.owner:
+            self._shm.close()
+            self._shm.unlink()
+        else:
+            self._shm.close()
+
+    def alive(self, stale_after: float = 3 * PRICE_BOARD_INTERVAL) -> bool:
+        """Whether the writer is still publishing: the board is open and has been published recently"""
+        header = self._header
+        return (
+            header is not None
+            and header[MAGIC_FIELD] == MAGIC
+            and time.time_ns() - header[HEARTBEAT] < stale_after * 1e9
+        )
+
+    def _sync(self) -> None:
+        """Learn the slots of symbols the writer has added since the last sync"""
+        for slot in range(len(self._slots), self._header[COUNT]):
+            symbol = self._symbols[slot * SYMBOL_BYTES:(slot + 1) * SYMBOL_BYTES].tobytes()
+            self._slots[symbol.rstrip(b"\0").decode()] = slot
+
+    def publish(self, prices: dict[str, float], at: float | None = None) -> int:
+        """Write a batch of prices as one publication; returns how many were published"""
+        at = at or time.time()
+        count = self._header[COUNT]
+        for symbol in prices:
+            encoded = symbol.encode()
+            if symbol not in self._slots and count < self.capacity and len(encoded) <= SYMBOL_BYTES:
+                self._symbols[count * SYMBOL_BYTES:(count + 1) * SYMBOL_BYTES] = encoded.ljust(SYMBOL_BYTES, b"\0")
+                self._slots[symbol] = count
+                count += 1
+        # The symbols are written before the count that makes them visible to readers
+        self._header[COUNT] = count
+        published = [(self._slots[symbol], price) for symbol, price in prices.items() if symbol in self._slots]
+        self._header[SEQUENCE] += 1
+        for slot, price in published:
+            self._prices[slot] = price
+            self._updated[slot] = at
+        self._header[SEQUENCE] += 1
+        self._header[HEARTBEAT] = time.time_ns()
+        return len(published)
+
+    def read(self, symbols: list[str]) -> dict[str, tuple[float, float]]:
+        """
+        The price of each symbol on the board and when it was published, read between
+        publications; symbols that have never been published are left out.
+        """
+        if any(symbol not in self._slots for symbol in symbols):
+            self._sync()
+        found = [symbol for symbol in symbols if symbol in self._slots]
+        slots = [self._slots[symbol] for symbol in found]
+        header, prices, updated = self._header, self._prices, self._updated
+        while True:
+            sequence = header[SEQUENCE]
+            if sequence & 1:
+                # The writer is mid-publication; let it finish rather than spin against it
+                os.sched_yield()
+                continue
+            values = [prices[slot] for slot in slots]
+            times = [updated[slot] for slot in slots]
+            if header[SEQUENCE] == sequence:
+                break
+        return {symbol: (value, at) for symbol, value, at in zip(found, values, times) if at}
+
+    def get_many(self, symbols: list[str], max_age: float) -> dict[str, float]:
+        """Prices of the symbols published within the last max_age seconds; the rest are left out"""
+        cutoff = time.time() - max_age
+        return {symbol: price for symbol, (price, at) in self.read(symbols).items() if at > cutoff}
+
+    def stats(self) -> dict:
+        header = self._header
+        return {
+            "symbols": header[COUNT],
+            "capacity": self.capacity,
+            "publications": header[SEQUENCE] // 2,
+            "seconds_since_publication": (time.time_ns() - header[HEARTBEAT]) / 1e9 if header[HEARTBEAT] else None,
+        }
+
+
+def serve(fetch, interval: float = PRICE_BOARD_INTERVAL, name: str = PRICE_BOARD_NAME, parent: int | None = None) -> None:
+    """
+    The writer's loop: every interval seconds, price the symbols in play with fetch(symbols)
+    and publish them. fetch must go to the provider, not back to the board. Given the pid of
+    a parent process, stops when that process exits.
+    """
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    board = PriceBoard.create(name)
+    print(f"Publishing prices to shared memory {name!r} every {interval} seconds")
+    try:
+        while parent is None or os.getppid() == parent:
+            started = time.time()
+            symbols = list(dict.fromkeys([*read_held_symbols(), *PRICE_BOARD_SYMBOLS]))
+            try:
+                board.publish(fetch(symbols) if symbols else {})
+            except Exception as e:
+                print(f"Price board could not fetch prices due to {e}")
+            time.sleep(max(interval - (time.time() - started), 0.0))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        board.close()
+
+
+def start_process() -> subprocess.Popen:
+    """
+    Run the writer as a child process, which stops when this process exits. It is a separate
+    interpreter rather than a multiprocessing child so that it has its own resource tracker.
+    """
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "--parent", str(os.getpid())])
+
+
+def stop_process(process: subprocess.Popen, timeout: float = 5.0) -> None:
+    """Stop a writer started by start_process, killing it if it has not exited within timeout seconds."""
+    process.terminate()
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+if __name__ == "__main__":
+    from market import fetch_share_prices
+
+    parser = argparse.ArgumentParser(description="Publish live prices to the shared-memory price board")
+    parser.add_argument("--parent", type=int, help="stop when the process with this pid exits")
+    serve(fetch_share_prices, parent=parser.parse_args().parent)
@@ -0,0 +1,209 @@
+"""
+Cold start profile of the MCP servers: where their import time goes, and how long a client waits
+from spawning a server to the response of its first tool call.
+
+Each server is run --runs times, every time in a fresh process and an empty working directory:
+
+- once importing it under python -X importtime, for its import time broken down by the package
+  each module belongs to, and to see what it imports before its first request
+- once over stdio, as a trader connects to it, timing the initialize handshake and then a first
+  tool call that reads the database or the market, so that work deferred to first use is counted
+
+and the medians are reported. It fails if a server imports the Polygon client, or NumPy outside
+the market servers, or creates its database, before its first tool call. With --save the medians
+are written to the baseline file; with --check a server whose import or cold start (handshake
+plus first call) has grown by more than --tolerance over the baseline fails too. Timings depend
+on the machine, so save the baseline on the machine that runs the check.
+
+Runs the servers with this interpreter, on the market simulator, with a local fake Pushover.
+
+Usage: uv run profile_startup.py [--dir ../Projects/Trader] [--runs 5] [--save | --check]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import AsyncExitStack
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from fake_pushover import FakePushover
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "startup_baseline.json")
+# A first tool call for each server, one that has to reach the database or the market
+FIRST_CALLS = {
+    "accounts_server": ("get_balance", {"name": "profile"}),
+    "market_server": ("lookup_share_price", {"symbol": "AAPL"}),
+    "push_server": ("push", {"args": {"message": "Cold start profile"}}),
+    "datetime_server": ("get_current_datetime", {}),
+    "mcp_gateway": ("accounts_get_balance", {"name": "profile"}),
+}
+# Modules a server must leave until a request needs them, and the servers allowed them up front
+DEFERRED = {"polygon": set(), "numpy": {"market_server", "mcp_gateway"}}
+# Slack on top of --tolerance, so that servers that start in a few milliseconds do not flap
+SLACK_MS = 25.0
+
+
+def profile_import(directory: str, server: str, env: dict) -> tuple[float, Counter, bool]:
+    """Import time of the server in ms, its self time in ms by package, and whether it created its database"""
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {server}"],
+            cwd=workdir,
+            env={**env, "PYTHONPATH": directory},
+            capture_output=True,
+            text=True,
+        )
+        created_db = os.path.exists(os.path.join(workdir, "accounts.db"))
+    if result.returncode:
+        raise RuntimeError(f"Importing {server} failed:\n{result.stderr[-2000:]}")
+    total, packages = 0.0, Counter()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        packages[name.strip().split(".")[0]] += int(self_us) / 1000
+        if name.strip() == server:
+            total = int(cumulative_us) / 1000
+    return total, packages, created_db
+
+
+async def profile_session(directory: str, server: str, env: dict) -> tuple[float, float]:
+    """ms from spawning the server to the end of the handshake, and then to the first tool response"""
+    tool, arguments = FIRST_CALLS[server]
+    with tempfile.TemporaryDirectory() as workdir:
+        params = StdioServerParameters(
+            command=sys.executable, args=[os.path.join(directory, f"{server}.py")], env=env, cwd=workdir
+        )
+        async with AsyncExitStack() as stack:
+            devnull = stack.enter_context(open(os.devnull, "w"))
+            start = time.perf_counter()
+            read, write = await stack.enter_async_context(stdio_client(params, errlog=devnull))
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+            handshake = time.perf_counter()
+            result = await session.call_tool(tool, arguments)
+            answered = time.perf_counter()
+        if result.isError:
+            raise RuntimeError(f"{server} {tool} failed: {result.content[0].text}")
+    return (handshake - start) * 1000, (answered - handshake) * 1000
+
+
+def profile(directory: str, server: str, runs: int, env: dict) -> dict:
+    imports, packages, created_db, handshakes, first_calls = [], Counter(), False, [], []
+    for _ in range(runs):
+        total, by_package, created = profile_import(directory, server, env)
+        imports.append(total)
+        packages.update(by_package)
+        created_db |= created
+        handshake, first_call = asyncio.run(profile_session(directory, server, env))
+        handshakes.append(handshake)
+        first_calls.append(first_call)
+    return {
+        "import_ms": statistics.median(imports),
+        "handshake_ms": statistics.median(handshakes),
+        "first_call_ms": statistics.median(first_calls),
+        "cold_start_ms": statistics.median(h + f for h, f in zip(handshakes, first_calls)),
+        "packages": {name: ms / runs for name, ms in packages.most_common()},
+        "created_db": created_db,
+    }
+
+
+def eager_imports(server: str, result: dict) -> list[str]:
+    return [
+        module for module, allowed in DEFERRED.items() if module in result["packages"] and server not in allowed
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", default=HERE, help="directory of the servers to profile")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per server")
+    parser.add_argument("--top", type=int, default=6, help="packages to list per server")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.4, help="growth over the baseline that fails --check")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--save", action="store_true", help="write the medians to the baseline file")
+    mode.add_argument("--check", action="store_true", help="fail if cold start has grown over the baseline")
+    args = parser.parse_args()
+
+    if args.check and not os.path.exists(args.baseline):
+        parser.error(f"no baseline at {args.baseline}; record one with --save")
+    directory = os.path.abspath(args.dir)
+    servers = [server for server in FIRST_CALLS if os.path.exists(os.path.join(directory, f"{server}.py"))]
+    fake = FakePushover().start()
+    # The servers would otherwise log every request to stderr
+    env = {
+        **{key: value for key, value in os.environ.items() if key not in ("PYTHONPATH", "POLYGON_API_KEY")},
+        "MARKET_DATA_PROVIDER": "simulator",
+        "FASTMCP_LOG_LEVEL": "WARNING",
+        "PUSHOVER_URL": fake.url,
+    }
+    try:
+        results = {server: profile(directory, server, args.runs, env) for server in servers}
+    finally:
+        fake.stop()
+
+    baseline = {}
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["servers"]
+
+    problems = []
+    print(f"{len(servers)} servers in {directory}, median of {args.runs} cold starts")
+    print(f"{'server':<18}{'import ms':>11}{'handshake ms':>14}{'first call ms':>15}{'cold start ms':>15}{'baseline ms':>13}")
+    for server, result in results.items():
+        before = baseline.get(server, {}).get("cold_start_ms")
+        print(
+            f"{server:<18}{result['import_ms']:>11.0f}{result['handshake_ms']:>14.0f}{result['first_call_ms']:>15.0f}"
+            f"{result['cold_start_ms']:>15.0f}" + (f"{before:>13.0f}" if before is not None else f"{'-':>13}")
+        )
+        for module in eager_imports(server, result):
+            problems.append(f"{server} imports {module} before its first request")
+        if result["created_db"]:
+            problems.append(f"{server} creates its database before its first request")
+        for metric in ("import_ms", "cold_start_ms") if args.check else ():
+            limit = baseline.get(server, {}).get(metric)
+            if limit is not None and result[metric] > limit * (1 + args.tolerance) + SLACK_MS:
+                problems.append(f"{server} {metric} {result[metric]:.0f} is over the baseline {limit:.0f} by {result[metric] / limit - 1:.0%}")
+
+    print("\nimport self time by package, ms")
+    for server, result in results.items():
+        top = list(result["packages"].items())[: args.top]
+        print(f"{server:<18}" + ", ".join(f"{name} {ms:.0f}" for name, ms in top))
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {
+                    "recorded_on": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+                    "servers": {
+                        server: {metric: round(result[metric], 1) for metric in ("import_ms", "handshake_ms", "first_call_ms", "cold_start_ms")}
+                        for server, result in results.items()
+                    },
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+        print(f"\nSaved the baseline to {args.baseline}")
+
+    for problem in problems:
+        print(f"FAILED {problem}")
+    if problems or args.check:
+        print("FAILED" if problems else "OK: no server starts slower than its baseline")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Push notifications through Pushover, delivered in the background.
+
+notify() queues a message and returns at once, from any thread or event loop, so a slow or
+failing Pushover never holds up the caller. A dispatcher thread with an event loop of its own
+sends the queue over one pooled httpx client:
+
+- the queue holds at most PUSH_QUEUE_SIZE messages; notify() drops messages beyond that and
+  returns False
+- messages that arrive within PUSH_COALESCE_SECONDS of the first are sent together as one digest,
+  split into as many digests as Pushover's message length limit needs
+- every request has a timeout; connection errors, timeouts and server errors are retried up to
+  PUSH_MAX_ATTEMPTS times with exponential backoff, and other errors are not retried
+- Pushover reports the application's remaining monthly messages on every response; when fewer
+  than PUSH_LOW_REMAINING are left the coalescing window widens tenfold, and once they have run
+  out (or on a 429) messages are dropped until the limit resets
+- at exit, whatever is still queued is sent, for up to PUSH_FLUSH_SECONDS
+
+Drops and failures are reported on stderr. PUSHOVER_URL points the dispatcher at another
+endpoint, such as fake_pushover.py.
+"""
+
+import asyncio
+import atexit
+import os
+import random
+import sys
+import threading
+import time
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+PUSHOVER_URL = os.getenv("PUSHOVER_URL", "https://api.pushover.net/1/messages.json")
+PUSH_QUEUE_SIZE = int(os.getenv("PUSH_QUEUE_SIZE", "100"))
+PUSH_COALESCE_SECONDS = float(os.getenv("PUSH_COALESCE_SECONDS", "2.0"))
+PUSH_MAX_ATTEMPTS = int(os.getenv("PUSH_MAX_ATTEMPTS", "4"))
+PUSH_LOW_REMAINING = int(os.getenv("PUSH_LOW_REMAINING", "100"))
+PUSH_FLUSH_SECONDS = float(os.getenv("PUSH_FLUSH_SECONDS", "10.0"))
+PUSH_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+BACKOFF_SECONDS = 1.0
+MAX_MESSAGE_LENGTH = 1024
+MAX_TITLE_LENGTH = 250
+
+
+def digests(messages: list[str], limit: int = MAX_MESSAGE_LENGTH) -> list[str]:
+    """The messages as one bulleted list, split into as few parts within limit as will hold them"""
+    parts, current = [], ""
+    for message in messages:
+        line = f"• {message}"[:limit]
+        if current and len(current) + 1 + len(line) > limit:
+            parts.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    return parts + [current] if current else parts
+
+
+class PushDispatcher:
+    def __init__(
+        self,
+        url: str = PUSHOVER_URL,
+        user: str | None = None,
+        token: str | None = None,
+        queue_size: int = PUSH_QUEUE_SIZE,
+        coalesce_seconds: float = PUSH_COALESCE_SECONDS,
+        max_attempts: int = PUSH_MAX_ATTEMPTS,
+        low_remaining: int = PUSH_LOW_REMAINING,
+        backoff_seconds: float = BACKOFF_SECONDS,
+    ):
+        self.url = url
+        self.user = user or os.getenv("PUSHOVER_USER")
+        self.token = token or os.getenv("PUSHOVER_TOKEN")
+        self.queue_size = queue_size
+        self.coalesce_seconds = coalesce_seconds
+        self.max_attempts = max_attempts
+        self.low_remaining = low_remaining
+        self.backoff_seconds = backoff_seconds
+        self.remaining: int | None = None
+        self.paused_until = 0.0
+        self._counts = dict.fromkeys(["queued", "sent", "requests", "retries", "dropped", "failed"], 0)
+        self._pending = 0
+        self._settled = threading.Condition()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            started = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(started,), name="push-dispatcher", daemon=True)
+            self._thread.start()
+            started.wait()
+            atexit.register(self.close)
+
+    def _run(self, started: threading.Event) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        started.set()
+        self._loop.run_until_complete(self._dispatch())
+        self._loop.close()
+
+    def notify(self, message: str) -> bool:
+        """Queue a message to push; False if it was dropped because the queue is full"""
+        self._start()
+        with self._settled:
+            if self._pending >= self.queue_size:
+                self._counts["dropped"] += 1
+                print(f"Push queue is full, dropping: {message}", file=sys.stderr)
+                return False
+            self._pending += 1
+            self._counts["queued"] += 1
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, message)
+        return True
+
+    def _settle(self, count: int, outcome: str) -> None:
+        with self._settled:
+            self._pending -= count
+            self._counts[outcome] += count
+            self._settled.notify_all()
+
+    async def _batch(self, first: str) -> tuple[list[str], bool]:
+        """The first message and any that follow within the coalescing window; and whether to stop"""
+        batch = [first]
+        window = self.coalesce_seconds * (10 if self.remaining is not None and self.remaining < self.low_remaining else 1)
+        deadline = time.monotonic() + window
+        while len(batch) < self.queue_size:
+            try:
+                message = await asyncio.wait_for(self._queue.get(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                break
+            if message is None:
+                return batch, True
+            batch.append(message)
+        return batch, False
+
+    async def _dispatch(self) -> None:
+        async with httpx.AsyncClient(timeout=PUSH_TIMEOUT) as client:
+            stopping = False
+            while not stopping:
+                first = await self._queue.get()
+                if first is None:
+                    break
+                batch, stopping = await self._batch(first)
+                if time.time() < self.paused_until:
+                    print(f"Pushover limit reached, dropping {len(batch)} notification(s)", file=sys.stderr)
+                    self._settle(len(batch), "dropped")
+                    continue
+                if len(batch) == 1:
+                    sends = [(None, batch[0][:MAX_MESSAGE_LENGTH])]
+                else:
+                    parts = digests(batch)
+                    sends = [(f"{len(batch)} notifications" + (f" ({i}/{len(parts)})" if len(parts) > 1 else ""), part) for i, part in enumerate(parts, 1)]
+                delivered = [await self._send(client, title, message) for title, message in sends]
+                self._settle(len(batch), "sent" if all(delivered) else "failed")
+
+    def _read_limits(self, response: httpx.Response) -> None:
+        remaining = response.headers.get("X-Limit-App-Remaining")
+        reset = response.headers.get("X-Limit-App-Reset")
+        if remaining is not None:
+            self.remaining = int(remaining)
+        if response.status_code == 429 or self.remaining == 0:
+            self.paused_until = float(reset) if reset else time.time() + 3600
+
+    async def _send(self, client: httpx.AsyncClient, title: str | None, message: str) -> bool:
+        payload = {"user": self.user, "token": self.token, "message": message}
+        if title:
+            payload["title"] = title[:MAX_TITLE_LENGTH]
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self._counts["requests"] += 1
+                response = await client.post(self.url, data=payload)
+                self._read_limits(response)
+                if response.status_code < 400:
+                    return True
+                if response.status_code < 500:
+                    print(f"Pushover rejected a notification: {response.status_code} {response.text[:200]}", file=sys.stderr)
+                    return False
+                error = f"{response.status_code}"
+            except httpx.HTTPError as e:
+                error = repr(e)
+            if attempt < self.max_attempts:
+                self._counts["retries"] += 1
+                await asyncio.sleep(self.backoff_seconds * 2 ** (attempt - 1) * random.uniform(0.8, 1.2))
+        print(f"Pushover failed after {self.max_attempts} attempts: {error}", file=sys.stderr)
+        return False
+
+    def flush(self, timeout: float = PUSH_FLUSH_SECONDS) -> bool:
+        """Wait until every queued message has been sent or given up on; False on timeout"""
+        with self._settled:
+            return self._settled.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout: float = PUSH_FLUSH_SECONDS) -> bool:
+        """Send whatever is queued without waiting out the coalescing window, then stop"""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def stats(self) -> dict:
+        with self._settled:
+            return {**self._counts, "pending": self._pending, "remaining": self.remaining, "paused_until": self.paused_until}
+
+
+push_dispatcher = PushDispatcher()
+
+
+def notify(message: str) -> bool:
+    return push_dispatcher.notify(message)
@@ -0,0 +1,63 @@
+"""
+Report of the list_tools round trips saved by the tool list caching, per trading cycle, from
+the traces in the log table of an accounts.db.
+
+The agents SDK records an mcp_tools span each time an agent lists a server's tools, once per
+server on every turn; mcp_tool_cache.py records a custom span for each listing that still went
+to the server. Without caching every listing was a round trip, so the difference is the round
+trips saved.
+
+Usage: uv run report_tool_cache.py [accounts.db] [--last 20]
+"""
+
+import argparse
+import sqlite3
+from collections import Counter
+
+from mcp_tool_cache import ROUND_TRIP_SPAN
+
+
+def cycles(path: str) -> list[tuple[str, str, Counter]]:
+    """(trader, trace name, counts) for every complete trace in the logs, oldest first"""
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT name, type, message FROM logs ORDER BY id").fetchall()
+    open_traces: dict[str, Counter] = {}
+    found = []
+    for name, type, message in rows:
+        if type == "trace" and message.startswith("Started: "):
+            open_traces[name] = Counter()
+        elif type == "trace" and message.startswith("Ended: ") and name in open_traces:
+            found.append((name, message.removeprefix("Ended: "), open_traces.pop(name)))
+        elif name in open_traces and message.startswith("Started "):
+            if type == "mcp_tools":
+                open_traces[name]["listings"] += 1
+            elif type == "custom" and message.startswith(f"Started custom {ROUND_TRIP_SPAN}"):
+                open_traces[name]["round trips"] += 1
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("db", nargs="?", default="accounts.db", help="the accounts.db with the logs")
+    parser.add_argument("--last", type=int, default=20, help="cycles to list")
+    args = parser.parse_args()
+
+    found = cycles(args.db)
+    if not found:
+        print("No complete trading cycles in the logs")
+        return
+    print(f"{'cycle':<28}{'listings':>10}{'round trips':>13}{'saved':>7}")
+    for _, trace, counts in found[-args.last:]:
+        saved = counts["listings"] - counts["round trips"]
+        print(f"{trace:<28}{counts['listings']:>10}{counts['round trips']:>13}{saved:>7}")
+    listings = sum(counts["listings"] for _, _, counts in found)
+    round_trips = sum(counts["round trips"] for _, _, counts in found)
+    print(
+        f"{len(found)} cycles: {listings} listings, {round_trips} round trips, "
+        f"{listings - round_trips} saved ({(listings - round_trips) / max(listings, 1):.0%}), "
+        f"{(listings - round_trips) / len(found):.1f} per cycle"
+    )
+
+
+if __name__ == "__main__":
+    main()
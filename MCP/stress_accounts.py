@@ -0,0 +1,144 @@
+"""
+Stress test for concurrent trading through the accounts MCP server.
+
+Starts several worker processes that each fire a burst of concurrent buy_shares and
+sell_shares tool calls at accounts_server.py (in-process, through the FastMCP tool manager)
+against a few shared accounts, so that writes from different processes race on the same
+rows. Afterwards it checks that every account balances exactly:
+
+- every accepted tool call left exactly one row in the transactions table
+- cash equals the initial balance less the net amount spent on all transactions
+- holdings, average costs and realized P&L match a replay of the transaction history
+
+Runs against a throwaway database in a temporary directory. Exits non-zero on any mismatch.
+
+Usage: uv run stress_accounts.py [--workers 8] [--orders 250] [--accounts 2]
+"""
+
+import argparse
+import asyncio
+import math
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL"]
+
+
+async def fire_orders(worker: int, orders: int, names: list[str]) -> tuple[int, int]:
+    from accounts_server import mcp
+
+    rng = random.Random(worker)
+
+    async def order():
+        name = rng.choice(names)
+        symbol = rng.choice(SYMBOLS)
+        tool = "buy_shares" if rng.random() < 0.6 else "sell_shares"
+        args = {"name": name, "symbol": symbol, "quantity": rng.randint(1, 3), "rationale": f"stress {worker}"}
+        try:
+            await mcp.call_tool(tool, args)
+            return True
+        except Exception:
+            # Rejected orders (not enough cash or shares) are expected and must leave no trace
+            return False
+
+    results = await asyncio.gather(*[order() for _ in range(orders)])
+    return sum(results), len(results) - sum(results)
+
+
+def worker_main(worker: int, orders: int, names: list[str], workdir: str, queue) -> None:
+    os.chdir(workdir)
+    accepted, rejected = asyncio.run(fire_orders(worker, orders, names))
+    from database import log_writer
+    log_writer.close()
+    queue.put((accepted, rejected))
+
+
+def check(names: list[str], accepted: int) -> list[str]:
+    from accounts import Account, Position, INITIAL_BALANCE
+    from database import get_connection
+
+    problems = []
+    recorded = get_connection().execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    if recorded != accepted:
+        problems.append(f"{accepted} orders were accepted but {recorded} transactions were recorded")
+
+    for name in names:
+        account = Account.get(name)
+        spent = sum(transaction.total() for transaction in account.transactions)
+        if not math.isclose(account.balance, INITIAL_BALANCE - spent, abs_tol=1e-6):
+            problems.append(f"{name}: balance {account.balance} != {INITIAL_BALANCE - spent} from transactions")
+        if not math.isclose(account.net_invested, spent, abs_tol=1e-6):
+            problems.append(f"{name}: net invested {account.net_invested} != {spent} from transactions")
+
+        replayed: dict[str, Position] = {}
+        for transaction in account.transactions:
+            position = replayed.setdefault(transaction.symbol, Position(symbol=transaction.symbol))
+            if transaction.quantity > 0:
+                position.buy(transaction.quantity, transaction.price)
+            else:
+                if position.quantity < -transaction.quantity:
+                    problems.append(f"{name}: sold {-transaction.quantity} {transaction.symbol} while holding {position.quantity}")
+                    break
+                position.sell(-transaction.quantity, transaction.price)
+        for symbol in set(replayed) | set(account.positions):
+            expected = replayed.get(symbol, Position(symbol=symbol))
+            actual = account.positions.get(symbol, Position(symbol=symbol))
+            if actual.quantity != expected.quantity:
+                problems.append(f"{name}: holds {actual.quantity} {symbol}, transactions add up to {expected.quantity}")
+            for field in ("average_cost", "realized_pnl"):
+                if not math.isclose(getattr(actual, field), getattr(expected, field), abs_tol=1e-6):
+                    problems.append(f"{name}: {symbol} {field} {getattr(actual, field)} != {getattr(expected, field)} from transactions")
+        print(f"{name}: {len(account.transactions)} transactions, balance ${account.balance:,.2f}, holdings {account.holdings}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8, help="number of worker processes")
+    parser.add_argument("--orders", type=int, default=250, help="orders fired by each worker")
+    parser.add_argument("--accounts", type=int, default=2, help="number of shared accounts")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    names = [f"stress{i}" for i in range(args.accounts)]
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from accounts import Account
+        for name in names:
+            Account.get(name).reset("Stress test")
+
+        queue = multiprocessing.Queue()
+        start = time.perf_counter()
+        workers = [
+            multiprocessing.Process(target=worker_main, args=(i, args.orders, names, workdir, queue))
+            for i in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        outcomes = [queue.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        accepted = sum(outcome[0] for outcome in outcomes)
+        rejected = sum(outcome[1] for outcome in outcomes)
+        print(f"{accepted + rejected} orders in {elapsed:.1f}s: {accepted} accepted, {rejected} rejected")
+        problems = check(names, accepted)
+
+        from database import log_writer, close_connection
+        log_writer.close()
+        close_connection()
+        os.chdir(here)
+
+    for problem in problems:
+        print(f"MISMATCH {problem}")
+    print("FAILED" if problems else "OK: every account balances exactly")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
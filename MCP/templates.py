@@ -1,12 +1,21 @@
 from datetime import datetime
-from market import is_paid_polygon, is_realtime_polygon
+from market import is_paid_polygon, is_realtime_polygon, use_simulator
+from mcp_params import MCP_GATEWAY
+
+
+def tool(namespace: str, name: str) -> str:
+    """The name a trader sees for a tool of our MCP servers; mcp_gateway.py prefixes it with the server's namespace"""
+    return f"{namespace}_{name}" if MCP_GATEWAY else name
+
 
 if is_realtime_polygon:
     note = "You have access to realtime market data tools; use your get_last_trade tool for the latest trade price. You can also use tools for share information, trends and technical indicators and fundamentals."
 elif is_paid_polygon:
     note = "You have access to market data tools but without access to the trade or quote tools; use your get_snapshot_ticker tool to get the latest share price on a 15 min delay. You can also use tools for share information, trends and technical indicators and fundamentals."
+elif use_simulator:
+    note = f"You have access to simulated market data; use your {tool('market', 'lookup_share_price')} tool to get the latest share price, or {tool('market', 'lookup_share_prices')} for several at once. Use {tool('market', 'get_technical_indicators')} for trends, momentum and risk across several stocks in one call, and {tool('market', 'get_price_history')} for their recent daily closes."
 else:
-    note = "You have access to end of day market data; use you get_share_price tool to get the share price as of the prior close."
+    note = f"You have access to end of day market data; use your {tool('market', 'lookup_share_price')} tool to get the share price as of the prior close, or {tool('market', 'lookup_share_prices')} for several at once. Use {tool('market', 'get_technical_indicators')} for trends, momentum and risk across several stocks in one call, and {tool('market', 'get_price_history')} for their recent daily closes."
 
 
 def researcher_instructions():
@@ -40,6 +49,7 @@ You actively manage your portfolio according to your strategy.
 You have access to tools including a researcher to research online for news and opportunities, based on your request.
 You also have tools to access to financial data for stocks. {note}
 And you have tools to buy and sell stocks using your account name {name}.
+When you make more than one trade, place them all in a single {tool('accounts', 'execute_orders')} call rather than a {tool('accounts', 'buy_shares')} or {tool('accounts', 'sell_shares')} call each.
 You can use your entity tools as a persistent memory to store and recall information; you share
 this memory with other traders and can benefit from the group's knowledge.
 Use these tools to carry out research, make decisions, and execute trades.
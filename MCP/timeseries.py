@@ -0,0 +1,158 @@
+import os
+import threading
+from datetime import datetime
+import database
+from database import get_connection, read_snapshot
+
+# Each resolution is a ring buffer of fixed capacity: a point lands in slot bucket % capacity,
+# merging into the bucket already there or overwriting one that has aged out. Every recorded
+# point updates all three resolutions, so the store never grows beyond the sum of capacities.
+RESOLUTIONS = {
+    "minute": (60, 24 * 60),
+    "hour": (60 * 60, 24 * 90),
+    "day": (24 * 60 * 60, 365 * 10),
+}
+DEFAULT_POINTS = 200
+
+UPSERT_POINT = '''
+    INSERT INTO portfolio_series (name, resolution, slot, bucket, datetime, open, high, low, close, count)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+    ON CONFLICT(name, resolution, slot) DO UPDATE SET
+        open = CASE WHEN bucket = excluded.bucket THEN open ELSE excluded.open END,
+        high = CASE WHEN bucket = excluded.bucket THEN max(high, excluded.high) ELSE excluded.high END,
+        low = CASE WHEN bucket = excluded.bucket THEN min(low, excluded.low) ELSE excluded.low END,
+        count = CASE WHEN bucket = excluded.bucket THEN count + 1 ELSE 1 END,
+        close = excluded.close,
+        datetime = excluded.datetime,
+        bucket = excluded.bucket
+    WHERE excluded.bucket >= bucket
+'''
+SELECT_SERIES = '''
+    SELECT datetime, close FROM portfolio_series
+    WHERE name = ? AND resolution = ? AND bucket BETWEEN ? AND ?
+    ORDER BY bucket
+'''
+SELECT_BUCKET_RANGE = '''
+    SELECT MIN(bucket), MAX(bucket), SUM(count) FROM portfolio_series
+    WHERE name = ? AND resolution = ?
+'''
+DELETE_SERIES = 'DELETE FROM portfolio_series WHERE name = ?'
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# The (pid, path) of each database whose portfolio_values this process has migrated
+_migrated: set[tuple[int, str]] = set()
+_migrate_lock = threading.Lock()
+
+
+def _rows(name: str, timestamp: str, value: float) -> list[tuple]:
+    seconds = datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp()
+    rows = []
+    for resolution, (width, capacity) in RESOLUTIONS.items():
+        bucket = int(seconds // width)
+        rows.append((name, resolution, bucket % capacity, bucket, timestamp, value, value, value, value))
+    return rows
+
+
+def record_value(name: str, value: float, timestamp: str | None = None) -> None:
+    """Record one portfolio value into every resolution, in a single transaction."""
+    timestamp = timestamp or datetime.now().strftime(TIMESTAMP_FORMAT)
+    _ensure_migrated()
+    with get_connection() as conn:
+        conn.executemany(UPSERT_POINT, _rows(name.lower(), timestamp, value))
+
+
+def clear_series(name: str) -> None:
+    _ensure_migrated()
+    with get_connection() as conn:
+        conn.execute(DELETE_SERIES, (name.lower(),))
+
+
+def lttb(points: list[tuple], threshold: int) -> list[tuple]:
+    """
+    Largest-Triangle-Three-Buckets downsampling: keep the first and last points, and from each
+    of threshold - 2 equal buckets in between keep the point forming the largest triangle with
+    the point kept before it and the average of the next bucket. This preserves the visual shape
+    of the series, peaks and troughs included, far better than taking every nth point.
+
+    points are tuples sorted by their numeric x, (x, y, ...); any extra fields are carried along.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+    sampled = [points[0]]
+    every = (len(points) - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, len(points))
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = points[a][:2]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            x, y = points[j][:2]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def get_series(name: str, start: str | None = None, end: str | None = None, points: int = DEFAULT_POINTS) -> list[tuple[str, float]]:
+    """
+    Return the portfolio values of an account between start and end (inclusive, as
+    "%Y-%m-%d %H:%M:%S" strings; default everything recorded), downsampled with LTTB to at
+    most the requested number of points.
+
+    Reads from the finest resolution whose ring buffer still covers the start of the range:
+    one that has never wrapped holds the whole history, otherwise it holds its last capacity buckets.
+    """
+    name = name.lower()
+    start_seconds = datetime.strptime(start, TIMESTAMP_FORMAT).timestamp() if start else None
+    end_seconds = datetime.strptime(end, TIMESTAMP_FORMAT).timestamp() if end else None
+    _ensure_migrated()
+    with read_snapshot() as conn:
+        ranges = {resolution: conn.execute(SELECT_BUCKET_RANGE, (name, resolution)).fetchone() for resolution in RESOLUTIONS}
+        recorded = ranges["day"][2]
+        if not recorded:
+            return []
+        for resolution, (width, capacity) in RESOLUTIONS.items():
+            earliest, latest, count = ranges[resolution]
+            if count == recorded or (start_seconds is not None and start_seconds >= (latest - capacity + 1) * width):
+                break
+        first = earliest if start_seconds is None else int(start_seconds // width)
+        last = latest if end_seconds is None else int(end_seconds // width)
+        rows = conn.execute(SELECT_SERIES, (name, resolution, first, last)).fetchall()
+    series = [(datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp(), value, timestamp) for timestamp, value in rows]
+    return [(timestamp, value) for _, value, timestamp in lttb(series, points)]
+
+
+def migrate_portfolio_values(conn) -> int:
+    """Move points from the unbounded portfolio_values table into the series store."""
+    rows = conn.execute("SELECT name, datetime, value FROM portfolio_values ORDER BY id").fetchall()
+    for name, timestamp, value in rows:
+        conn.executemany(UPSERT_POINT, _rows(name, timestamp, value))
+    conn.execute("DELETE FROM portfolio_values")
+    return len(rows)
+
+
+
+def _ensure_migrated() -> None:
+    """
+    Migrate portfolio_values on the first use of the series store in each process, rather than
+    at import, so that importing this module does not open the database.
+    """
+    key = (os.getpid(), database.DB)
+    if key in _migrated:
+        return
+    with _migrate_lock:
+        if key not in _migrated:
+            with get_connection() as conn:
+                migrate_portfolio_values(conn)
+            _migrated.add(key)
@@ -1,5 +1,5 @@
 from agents import TracingProcessor, Trace, Span
-from database import write_log
+from database import write_log, log_writer
 import secrets
 import string
 
@@ -69,7 +69,7 @@ class LogTracer(TracingProcessor):
             write_log(name, type, message)
 
     def force_flush(self) -> None:
-        pass
+        log_writer.flush()
 
     def shutdown(self) -> None:
-        pass
\ No newline at end of file
+        log_writer.close()
\ No newline at end of file
@@ -1,39 +1,25 @@
-import mcp
-from mcp.client.stdio import stdio_client
 from mcp import StdioServerParameters
 from agents import FunctionTool
+from mcp_pool import get_session_pool
 import json
 
 params = StdioServerParameters(command="uv", args=["run", "accounts_server.py"], env=None)
 
 
 async def list_accounts_tools():
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            tools_result = await session.list_tools()
-            return tools_result.tools
+    tools_result = await get_session_pool().call(params, lambda session: session.list_tools(), idempotent=True)
+    return tools_result.tools
         
 async def call_accounts_tool(tool_name, tool_args):
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            result = await session.call_tool(tool_name, tool_args)
-            return result
+    return await get_session_pool().call(params, lambda session: session.call_tool(tool_name, tool_args))
             
 async def read_accounts_resource(name):
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            result = await session.read_resource(f"accounts://accounts_server/{name}")
-            return result.contents[0].text
+    result = await get_session_pool().call(params, lambda session: session.read_resource(f"accounts://accounts_server/{name}"), idempotent=True)
+    return result.contents[0].text
         
 async def read_strategy_resource(name):
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            result = await session.read_resource(f"accounts://strategy/{name}")
-            return result.contents[0].text
+    result = await get_session_pool().call(params, lambda session: session.read_resource(f"accounts://strategy/{name}"), idempotent=True)
+    return result.contents[0].text
 
 async def get_accounts_tools_openai():
     openai_tools = []
@@ -1,5 +1,9 @@
 from mcp.server.fastmcp import FastMCP
-from accounts import Account
+from mcp_transport import run
+import json
+from accounts import Order, account_cache
+from market import get_share_price_async, get_share_prices_async
+from timeseries import get_series
 
 mcp = FastMCP("accounts_server")
 
@@ -10,7 +14,7 @@ async def get_balance(name: str) -> float:
     Args:
         name: The name of the account holder
     """
-    return Account.get(name).balance
+    return account_cache.get(name).balance
 
 @mcp.tool()
 async def get_holdings(name: str) -> dict[str, int]:
@@ -19,10 +23,22 @@ async def get_holdings(name: str) -> dict[str, int]:
     Args:
         name: The name of the account holder
     """
-    return Account.get(name).holdings
+    return account_cache.get(name).holdings
 
 @mcp.tool()
-async def buy_shares(name: str, symbol: str, quantity: int, rationale: str) -> float:
+async def get_profit_loss(name: str) -> dict:
+    """Get the profit or loss of the given account name, in total and per symbol.
+    Each symbol reports its quantity held, average cost, realized profit or loss from sales,
+    and unrealized profit or loss at the current price.
+
+    Args:
+        name: The name of the account holder
+    """
+    account = account_cache.get(name)
+    return account.get_profit_loss(await get_share_prices_async(account.holdings))
+
+@mcp.tool()
+async def buy_shares(name: str, symbol: str, quantity: int, rationale: str) -> str:
     """Buy shares of a stock.
 
     Args:
@@ -31,11 +47,12 @@ async def buy_shares(name: str, symbol: str, quantity: int, rationale: str) -> f
         quantity: The quantity of shares to buy
         rationale: The rationale for the purchase and fit with the account's strategy
     """
-    return Account.get(name).buy_shares(symbol, quantity, rationale)
+    price = await get_share_price_async(symbol)
+    return account_cache.get(name).buy_shares(symbol, quantity, rationale, price)
 
 
 @mcp.tool()
-async def sell_shares(name: str, symbol: str, quantity: int, rationale: str) -> float:
+async def sell_shares(name: str, symbol: str, quantity: int, rationale: str) -> str:
     """Sell shares of a stock.
 
     Args:
@@ -44,7 +61,24 @@ async def sell_shares(name: str, symbol: str, quantity: int, rationale: str) ->
         quantity: The quantity of shares to sell
         rationale: The rationale for the sale and fit with the account's strategy
     """
-    return Account.get(name).sell_shares(symbol, quantity, rationale)
+    price = await get_share_price_async(symbol)
+    return account_cache.get(name).sell_shares(symbol, quantity, rationale, price)
+
+@mcp.tool()
+async def execute_orders(name: str, orders: list[Order]) -> str:
+    """Buy and sell several stocks in a single call, and get back one report of the account.
+    Prefer it to separate buy_shares and sell_shares calls whenever you make more than one trade.
+    The orders are filled in the order given, so list sales first to fund purchases with them.
+    They are executed all together or not at all: if any order cannot be filled, for example for
+    lack of funds or shares, none are, and the error says which order failed.
+
+    Args:
+        name: The name of the account holder
+        orders: The orders, each with the symbol, side ("buy" or "sell"), quantity of shares, and
+            the rationale for the trade and fit with the account's strategy
+    """
+    prices = await get_share_prices_async([order.symbol for order in orders])
+    return account_cache.get(name).execute_orders(orders, prices)
 
 @mcp.tool()
 async def change_strategy(name: str, strategy: str) -> str:
@@ -54,17 +88,25 @@ async def change_strategy(name: str, strategy: str) -> str:
         name: The name of the account holder
         strategy: The new strategy for the account
     """
-    return Account.get(name).change_strategy(strategy)
+    return account_cache.get(name).change_strategy(strategy)
 
 @mcp.resource("accounts://accounts_server/{name}")
 async def read_account_resource(name: str) -> str:
-    account = Account.get(name.lower())
+    account = account_cache.get(name)
     return account.report()
 
 @mcp.resource("accounts://strategy/{name}")
 async def read_strategy_resource(name: str) -> str:
-    account = Account.get(name.lower())
+    account = account_cache.get(name)
     return account.get_strategy()
 
+@mcp.resource("accounts://portfolio_values/{name}")
+async def read_portfolio_values_resource(name: str) -> str:
+    return json.dumps(get_series(name))
+
+@mcp.resource("accounts://cache_stats")
+async def read_cache_stats_resource() -> str:
+    return json.dumps(account_cache.stats())
+
 if __name__ == "__main__":
-    mcp.run(transport='stdio')
\ No newline at end of file
+    run(mcp)
\ No newline at end of file
@@ -1,10 +1,12 @@
 import gradio as gr
+from collections import deque
 from util import css, js, Color
 import pandas as pd
 from trading_floor import names, lastnames, short_model_names
 import plotly.express as px
 from accounts import Account
-from database import read_log
+from database import read_log_since
+from timeseries import get_series
 
 mapper = {
     "trace": Color.WHITE,
@@ -15,6 +17,9 @@ mapper = {
     "account": Color.RED,
 }
 
+LOG_LINES = 13
+CHART_POINTS = 200
+
 
 class Trader:
     def __init__(self, name: str, lastname: str, model_name: str):
@@ -22,6 +27,9 @@ class Trader:
         self.lastname = lastname
         self.model_name = model_name
         self.account = Account.get(name)
+        self.last_log_id = 0
+        self.log_lines = deque(maxlen=LOG_LINES)
+        self.logs_html = None
 
     def reload(self):
         self.account = Account.get(self.name)
@@ -33,7 +41,7 @@ class Trader:
         return self.account.get_strategy()
 
     def get_portfolio_value_df(self) -> pd.DataFrame:
-        df = pd.DataFrame(self.account.portfolio_value_time_series, columns=["datetime", "value"])
+        df = pd.DataFrame(get_series(self.name, points=CHART_POINTS), columns=["datetime", "value"])
         df["datetime"] = pd.to_datetime(df["datetime"])
         return df
 
@@ -73,23 +81,25 @@ class Trader:
         return pd.DataFrame(transactions)
 
     def get_portfolio_value(self) -> str:
-        """Calculate total portfolio value based on current prices"""
-        portfolio_value = self.account.calculate_portfolio_value() or 0.0
-        pnl = self.account.calculate_profit_loss(portfolio_value) or 0.0
+        """Show total portfolio value as of the latest valuation"""
+        snapshot = self.account.snapshot()
+        portfolio_value = snapshot["total_portfolio_value"] or 0.0
+        pnl = snapshot["total_profit_loss"] or 0.0
         color = "green" if pnl >= 0 else "red"
         emoji = "⬆" if pnl >= 0 else "⬇"
         return f"<div style='text-align: center;background-color:{color};'><span style='font-size:32px'>${portfolio_value:,.0f}</span><span style='font-size:24px'>&nbsp;&nbsp;&nbsp;{emoji}&nbsp;${pnl:,.0f}</span></div>"
 
     def get_logs(self, previous=None) -> str:
-        logs = read_log(self.name, last_n=13)
-        response = ""
-        for log in logs:
-            timestamp, type, message = log
-            color = mapper.get(type, Color.WHITE).value
-            response += f"<span style='color:{color}'>{timestamp} : [{type}] {message}</span><br/>"
-        response = f"<div style='height:250px; overflow-y:auto;'>{response}</div>"
-        if response != previous:
-            return response
+        """Fetch only the log entries written since the last poll, and append them to the view"""
+        logs = read_log_since(self.name, self.last_log_id, limit=LOG_LINES)
+        if logs or self.logs_html is None:
+            for log_id, timestamp, type, message in logs:
+                color = mapper.get(type, Color.WHITE).value
+                self.log_lines.append(f"<span style='color:{color}'>{timestamp} : [{type}] {message}</span><br/>")
+                self.last_log_id = log_id
+            self.logs_html = f"<div style='height:250px; overflow-y:auto;'>{''.join(self.log_lines)}</div>"
+        if self.logs_html != previous:
+            return self.logs_html
         return gr.update()
 
 
@@ -1,70 +1,403 @@
-from polygon import RESTClient
 from dotenv import load_dotenv
+import asyncio
+import httpx
+import logging
 import os
+import sys
+import threading
+import weakref
+import time
+from concurrent.futures import Future
 from datetime import datetime
-import random
-from database import write_market, read_market
+import market_calendar
+from price_board import PriceBoard
+from database import write_market_prices, read_market_date, read_market_price, read_market_prices, write_prices, read_prices
 from functools import lru_cache
 from datetime import timezone
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from polygon import RESTClient
 
 load_dotenv(override=True)
 
 polygon_api_key = os.getenv("POLYGON_API_KEY")
 polygon_plan = os.getenv("POLYGON_PLAN")
+polygon_base_url = os.getenv("POLYGON_BASE_URL", "https://api.polygon.io")
+PRICE_CACHE_TTL = float(os.getenv("PRICE_CACHE_TTL", "60"))
+PRICE_BOARD_RETRY = 10.0
+
+# "polygon" for the Polygon API, or "simulator" for the offline market in market_sim.py
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "polygon" if polygon_api_key else "simulator").strip().lower()
+use_simulator = MARKET_DATA_PROVIDER == "simulator"
+
+is_paid_polygon = polygon_plan == "paid" and not use_simulator
+is_realtime_polygon = polygon_plan == "realtime" and not use_simulator
+
+SNAPSHOT_PATH = "/v2/snapshot/locale/us/markets/stocks/tickers"
+
+# httpx logs every request at INFO, which would flood the MCP servers' logs
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+@lru_cache(maxsize=None)
+def _polygon_client(pid: int, api_key: str, base_url: str) -> "RESTClient":
+    # Imported on first use: the client library takes longer to import than the rest of an MCP
+    # server, and a server on the simulator or with every price cached never needs it
+    from polygon import RESTClient
+
+    return RESTClient(api_key, base=base_url)
+
 
-is_paid_polygon = polygon_plan == "paid"
-is_realtime_polygon = polygon_plan == "realtime"
+def get_polygon_client() -> "RESTClient":
+    """
+    The process's shared Polygon client. Its connection pool is reused by every lookup, so only
+    the first request to the API pays for TCP and TLS setup; a forked child gets its own.
+    """
+    return _polygon_client(os.getpid(), polygon_api_key, polygon_base_url)
+
+
+_async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_async_polygon_client() -> httpx.AsyncClient:
+    """
+    The shared asyncio HTTP client for the running event loop, for the async MCP tools.
+    An httpx.AsyncClient is bound to the loop it was first used on, so there is one per loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            base_url=polygon_base_url,
+            headers={"Authorization": f"Bearer {polygon_api_key}"},
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_keepalive_connections=10),
+        )
+        _async_clients[loop] = client
+    return client
 
 
 def is_market_open() -> bool:
-    client = RESTClient(polygon_api_key)
-    market_status = client.get_market_status()
-    return market_status.market == "open"
+    """Whether the exchange is in a regular session now, from the local calendar, without a network request"""
+    return market_calendar.is_market_open()
 
 
-def get_all_share_prices_polygon_eod() -> dict[str, float]:
-    """With much thanks to student Reema R. for fixing the timezone issue with this!"""
-    client = RESTClient(polygon_api_key)
+def get_all_share_prices_polygon_eod() -> tuple[str, list[tuple]]:
+    """
+    Fetch the last trading day's bars for every ticker, as the trading date and a list of
+    (symbol, open, high, low, close, volume) tuples.
+
+    With much thanks to student Reema R. for fixing the timezone issue with this!
+    """
+    client = get_polygon_client()
 
     probe = client.get_previous_close_agg("SPY")[0]
     last_close = datetime.fromtimestamp(probe.timestamp / 1000, tz=timezone.utc).date()
 
     results = client.get_grouped_daily_aggs(last_close, adjusted=True, include_otc=False)
-    return {result.ticker: result.close for result in results}
+    bars = [(r.ticker, r.open, r.high, r.low, r.close, r.volume) for r in results]
+    return last_close.strftime("%Y-%m-%d"), bars
 
 
 @lru_cache(maxsize=2)
-def get_market_for_prior_date(today):
-    market_data = read_market(today)
-    if not market_data:
-        market_data = get_all_share_prices_polygon_eod()
-        write_market(today, market_data)
-    return market_data
+def get_market_for_prior_date(today) -> str:
+    """
+    The trading day whose closes price lookups made today should use, loading its bars into
+    the market_prices table on the first lookup of the day. Only the date is cached here;
+    prices are read from the table one indexed row at a time.
+    """
+    trading_date = read_market_date(today)
+    if not trading_date:
+        trading_date, bars = get_all_share_prices_polygon_eod()
+        write_market_prices(today, trading_date, bars)
+    return trading_date
 
 
 def get_share_price_polygon_eod(symbol) -> float:
     today = datetime.now().date().strftime("%Y-%m-%d")
-    market_data = get_market_for_prior_date(today)
-    return market_data.get(symbol, 0.0)
+    trading_date = get_market_for_prior_date(today)
+    return read_market_price(trading_date, symbol) or 0.0
+
+
+def get_share_prices_polygon_eod(symbols: list[str]) -> dict[str, float]:
+    today = datetime.now().date().strftime("%Y-%m-%d")
+    prices = read_market_prices(get_market_for_prior_date(today), symbols)
+    return {symbol: prices.get(symbol) or 0.0 for symbol in symbols}
 
 
 def get_share_price_polygon_min(symbol) -> float:
-    client = RESTClient(polygon_api_key)
+    client = get_polygon_client()
     result = client.get_snapshot_ticker("stocks", symbol)
     return result.min.close or result.prev_day.close
 
 
+def get_share_prices_polygon_min(symbols: list[str]) -> dict[str, float]:
+    """Price many symbols with a single request to the multi-ticker snapshot endpoint"""
+    client = get_polygon_client()
+    results = client.get_snapshot_all("stocks", tickers=symbols)
+    prices = {result.ticker: result.min.close or result.prev_day.close for result in results}
+    return {symbol: prices.get(symbol, 0.0) for symbol in symbols}
+
+
+async def get_share_prices_polygon_min_async(symbols: list[str]) -> dict[str, float]:
+    """The same multi-ticker snapshot request as get_share_prices_polygon_min, awaited on the shared async client"""
+    response = await get_async_polygon_client().get(SNAPSHOT_PATH, params={"tickers": ",".join(symbols)})
+    response.raise_for_status()
+    prices = {
+        result["ticker"]: (result.get("min") or {}).get("c") or (result.get("prevDay") or {}).get("c")
+        for result in response.json().get("tickers") or []
+    }
+    return {symbol: prices.get(symbol) or 0.0 for symbol in symbols}
+
+
+class PriceCache:
+    """
+    Per-symbol price cache with a time-to-live, in memory and in the prices table, so that
+    every process asking for prices (the MCP servers, the trading floor, the dashboard)
+    reuses a price fetched by any of them until it is ttl seconds old.
+
+    Concurrent misses for the same symbol within a process are coalesced: the first caller
+    fetches, and everyone else waits for its result rather than sending an identical request.
+    """
+
+    def __init__(self, ttl: float = PRICE_CACHE_TTL):
+        self.ttl = ttl
+        self._prices: dict[str, tuple[float, float]] = {}
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(["hits", "shared_hits", "misses", "coalesced", "fetches"], 0)
+        self._age_total = 0.0
+        self._age_max = 0.0
+
+    def _serve(self, symbol: str, now: float, prices: dict, counter: str) -> bool:
+        entry = self._prices.get(symbol)
+        if not entry or now - entry[1] >= self.ttl:
+            return False
+        age = now - entry[1]
+        prices[symbol] = entry[0]
+        self._counts[counter] += 1
+        self._age_total += age
+        self._age_max = max(self._age_max, age)
+        return True
+
+    def _lookup(self, symbols: list[str]) -> tuple[dict, dict, list, Future]:
+        """
+        Serve what the cache can, then split the misses into symbols another caller is already
+        fetching (to wait for) and symbols this caller must fetch, registering it as their fetcher.
+        """
+        now = time.time()
+        prices = {}
+        with self._lock:
+            missing = [symbol for symbol in symbols if not self._serve(symbol, now, prices, "hits")]
+        if not missing:
+            return prices, {}, [], None
+        stored = read_prices(missing)
+        with self._lock:
+            for symbol, entry in stored.items():
+                if entry[1] > self._prices.get(symbol, (0.0, 0.0))[1]:
+                    self._prices[symbol] = entry
+            missing = [symbol for symbol in missing if not self._serve(symbol, now, prices, "shared_hits")]
+            waiting = {symbol: self._inflight[symbol] for symbol in missing if symbol in self._inflight}
+            leading = [symbol for symbol in missing if symbol not in waiting]
+            future = Future()
+            for symbol in leading:
+                self._inflight[symbol] = future
+            self._counts["misses"] += len(missing)
+            self._counts["coalesced"] += len(waiting)
+            self._counts["fetches"] += bool(leading)
+        return prices, waiting, leading, future
+
+    def _store(self, fetched: dict[str, float]) -> None:
+        fetched_at = time.time()
+        write_prices(fetched, fetched_at)
+        with self._lock:
+            for symbol, price in fetched.items():
+                self._prices[symbol] = (price, fetched_at)
+
+    def _release(self, leading: list[str]) -> None:
+        with self._lock:
+            for symbol in leading:
+                self._inflight.pop(symbol, None)
+
+    def get(self, symbol: str, fetch) -> float:
+        """Price one symbol, calling fetch(symbol) on a miss."""
+        return self.get_many([symbol], lambda symbols: {symbols[0]: fetch(symbols[0])})[symbol]
+
+    def get_many(self, symbols: list[str], fetch) -> dict[str, float]:
+        """Price many symbols, calling fetch(missing_symbols) once for all the misses."""
+        prices, waiting, leading, future = self._lookup(symbols)
+        if leading:
+            try:
+                fetched = fetch(leading)
+                self._store(fetched)
+                future.set_result(fetched)
+            except Exception as e:
+                future.set_exception(e)
+                raise
+            finally:
+                self._release(leading)
+            prices.update(fetched)
+        for symbol, pending in waiting.items():
+            prices[symbol] = pending.result()[symbol]
+        return {symbol: prices[symbol] for symbol in symbols}
+
+    async def get_many_async(self, symbols: list[str], fetch) -> dict[str, float]:
+        """As get_many, awaiting fetch(missing_symbols); coalesces with sync and async callers alike."""
+        prices, waiting, leading, future = self._lookup(symbols)
+        if leading:
+            try:
+                fetched = await fetch(leading)
+                self._store(fetched)
+                future.set_result(fetched)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                self._release(leading)
+            prices.update(fetched)
+        for symbol, pending in waiting.items():
+            prices[symbol] = (await asyncio.wrap_future(pending))[symbol]
+        return {symbol: prices[symbol] for symbol in symbols}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._prices.clear()
+
+    def stats(self) -> dict:
+        """Hit rate, and how stale the prices served from the cache were, in seconds."""
+        with self._lock:
+            counts = dict(self._counts)
+            served = counts["hits"] + counts["shared_hits"]
+            lookups = served + counts["misses"]
+            return {
+                **counts,
+                "hit_rate": served / lookups if lookups else 0.0,
+                "mean_age_seconds": self._age_total / served if served else 0.0,
+                "max_age_seconds": self._age_max,
+                "ttl_seconds": self.ttl,
+                "size": len(self._prices),
+            }
+
+
+price_cache = PriceCache()
+
+
 def get_share_price_polygon(symbol) -> float:
     if is_paid_polygon:
-        return get_share_price_polygon_min(symbol)
+        return price_cache.get(symbol, get_share_price_polygon_min)
     else:
         return get_share_price_polygon_eod(symbol)
 
 
+def get_share_prices_polygon(symbols: list[str]) -> dict[str, float]:
+    if is_paid_polygon:
+        return price_cache.get_many(symbols, get_share_prices_polygon_min)
+    else:
+        return get_share_prices_polygon_eod(symbols)
+
+
+async def get_share_prices_polygon_async(symbols: list[str]) -> dict[str, float]:
+    if is_paid_polygon:
+        return await price_cache.get_many_async(symbols, get_share_prices_polygon_min_async)
+    else:
+        return await asyncio.to_thread(get_share_prices_polygon_eod, symbols)
+
+
+def get_share_prices_simulated(symbols: list[str]) -> dict[str, float]:
+    """Prices from the offline market simulator: the latest minute's tick, or the last close outside a session"""
+    # Imported on first use, as it brings in NumPy, which nothing else in the accounts server needs
+    import market_sim
+
+    return market_sim.simulator.prices(symbols)
+
+
+_board: PriceBoard | None = None
+_board_checked = 0.0
+_board_lock = threading.Lock()
+
+
+def get_board_prices(symbols: list[str]) -> dict[str, float]:
+    """
+    Prices of the symbols on the shared price board (see price_board.py) that were published
+    within the price cache TTL. Empty when no board is being published; the board is looked
+    for again every PRICE_BOARD_RETRY seconds.
+    """
+    global _board, _board_checked
+    with _board_lock:
+        if _board is not None and not _board.alive():
+            _board.close()
+            _board = None
+        if _board is None:
+            if time.monotonic() - _board_checked < PRICE_BOARD_RETRY:
+                return {}
+            _board_checked = time.monotonic()
+            _board = PriceBoard.attach()
+            if _board is None:
+                return {}
+        return _board.get_many(symbols, price_cache.ttl)
+
+
+def fetch_share_prices(symbols: list[str]) -> dict[str, float]:
+    """Prices straight from the provider, bypassing the board and the price cache: what the board publishes"""
+    if not use_simulator:
+        try:
+            return get_share_prices_polygon_min(symbols) if is_paid_polygon else get_share_prices_polygon_eod(symbols)
+        except Exception as e:
+            print(f"Was not able to use the polygon API due to {e}; using the market simulator", file=sys.stderr)
+    return get_share_prices_simulated(symbols)
+
+
 def get_share_price(symbol) -> float:
-    if polygon_api_key:
+    board = get_board_prices([symbol])
+    if symbol in board:
+        return board[symbol]
+    if not use_simulator:
         try:
             return get_share_price_polygon(symbol)
         except Exception as e:
-            print(f"Was not able to use the polygon API due to {e}; using a random number")
-    return float(random.randint(1, 100))
+            print(f"Was not able to use the polygon API due to {e}; using the market simulator", file=sys.stderr)
+    return get_share_prices_simulated([symbol])[symbol]
+
+
+def get_share_prices(symbols) -> dict[str, float]:
+    """
+    Look up the prices of many symbols at once: from the price board where it has them, and
+    otherwise with one request rather than one per symbol
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    prices = get_board_prices(symbols)
+    missing = [symbol for symbol in symbols if symbol not in prices]
+    if missing and not use_simulator:
+        try:
+            prices.update(get_share_prices_polygon(missing))
+            missing = []
+        except Exception as e:
+            print(f"Was not able to use the polygon API due to {e}; using the market simulator", file=sys.stderr)
+    if missing:
+        prices.update(get_share_prices_simulated(missing))
+    return {symbol: prices[symbol] for symbol in symbols}
+
+
+async def get_share_prices_async(symbols) -> dict[str, float]:
+    """As get_share_prices, without blocking the event loop; for async callers such as the MCP tools"""
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    prices = get_board_prices(symbols)
+    missing = [symbol for symbol in symbols if symbol not in prices]
+    if missing and not use_simulator:
+        try:
+            prices.update(await get_share_prices_polygon_async(missing))
+            missing = []
+        except Exception as e:
+            print(f"Was not able to use the polygon API due to {e}; using the market simulator", file=sys.stderr)
+    if missing:
+        prices.update(get_share_prices_simulated(missing))
+    return {symbol: prices[symbol] for symbol in symbols}
+
+
+async def get_share_price_async(symbol) -> float:
+    return (await get_share_prices_async([symbol]))[symbol]
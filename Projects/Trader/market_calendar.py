@@ -0,0 +1,136 @@
+"""
+The NYSE trading calendar, computed locally from the exchange's rules, so that checking whether
+the market is open, or when it next opens, needs no network request.
+
+Regular sessions run 9:30 to 16:00 New York time on weekdays, except on the exchange holidays,
+and close at 13:00 on the day before Independence Day, the day after Thanksgiving and Christmas
+Eve. A holiday falling on a Saturday is observed on the Friday before, and one falling on a
+Sunday on the Monday after - except New Year's Day, which is not made up when on a Saturday.
+Unscheduled closures, such as national days of mourning, are not known in advance.
+"""
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+NEW_YORK = ZoneInfo("America/New_York")
+OPEN = time(9, 30)
+CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The nth given weekday (Monday is 0) of a month; n = -1 for the last"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Western Easter Sunday, by the anonymous Gregorian algorithm"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+
+def _observed(day: date) -> date:
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=None)
+def holidays(year: int) -> frozenset[date]:
+    """The days of a year on which the exchange is closed, other than weekends"""
+    new_year = date(year, 1, 1)
+    days = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(days)
+
+
+@lru_cache(maxsize=None)
+def early_closes(year: int) -> frozenset[date]:
+    """The days of a year on which the exchange closes at 13:00"""
+    candidates = [date(year, 7, 3), _nth_weekday(year, 11, 3, 4) + timedelta(days=1), date(year, 12, 24)]
+    return frozenset(day for day in candidates if is_trading_day(day))
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def session(day: date) -> tuple[datetime, datetime] | None:
+    """The opening and closing times of a day's session, or None when the exchange is closed"""
+    if not is_trading_day(day):
+        return None
+    close = EARLY_CLOSE if day in early_closes(day.year) else CLOSE
+    return datetime.combine(day, OPEN, NEW_YORK), datetime.combine(day, close, NEW_YORK)
+
+
+def _now(now: datetime | None) -> datetime:
+    return (now or datetime.now(NEW_YORK)).astimezone(NEW_YORK)
+
+
+def is_market_open(now: datetime | None = None) -> bool:
+    now = _now(now)
+    hours = session(now.date())
+    return bool(hours) and hours[0] <= now < hours[1]
+
+
+def next_open(now: datetime | None = None) -> datetime:
+    """The next time the market opens after now; if it is open now, that is the next session's open"""
+    now = _now(now)
+    day = now.date()
+    while True:
+        hours = session(day)
+        if hours and hours[0] > now:
+            return hours[0]
+        day += timedelta(days=1)
+
+
+def next_close(now: datetime | None = None) -> datetime:
+    """The next time the market closes after now: today's close while it is open"""
+    now = _now(now)
+    day = now.date()
+    while True:
+        hours = session(day)
+        if hours and hours[1] > now:
+            return hours[1]
+        day += timedelta(days=1)
+
+
+def completed_sessions(count: int, now: datetime | None = None) -> list[date]:
+    """The dates of the last count sessions to have closed by now, oldest first"""
+    now = _now(now)
+    day = now.date()
+    hours = session(day)
+    if not hours or now < hours[1]:
+        day -= timedelta(days=1)
+    days = []
+    while len(days) < count:
+        if is_trading_day(day):
+            days.append(day)
+        day -= timedelta(days=1)
+    return days[::-1]
@@ -1,5 +1,9 @@
 from mcp.server.fastmcp import FastMCP
-from market import get_share_price
+from mcp_transport import run
+import asyncio
+import json
+from market import get_share_price_async, get_share_prices_async, price_cache
+from indicators import get_indicators, get_history
 
 mcp = FastMCP("market_server")
 
@@ -10,7 +14,45 @@ async def lookup_share_price(symbol: str) -> float:
     Args:
         symbol: the symbol of the stock
     """
-    return get_share_price(symbol)
+    return await get_share_price_async(symbol)
+
+@mcp.tool()
+async def lookup_share_prices(symbols: list[str]) -> dict[str, float]:
+    """This tool provides the current prices of several stock symbols in a single call.
+    Prefer it to repeated lookup_share_price calls when you need more than one price.
+
+    Args:
+        symbols: the symbols of the stocks
+    """
+    return await get_share_prices_async(symbols)
+
+@mcp.tool()
+async def get_technical_indicators(symbols: list[str]) -> dict[str, dict]:
+    """This tool provides technical indicators for several stock symbols in a single call, computed
+    from daily closes as of the last close: the close and its change over 20 days, simple moving
+    averages over 20, 50 and 200 days, exponential moving averages over 12 and 26 days, the 14 day
+    RSI, annualized 20 day volatility, and the current and maximum drawdown from the peak close
+    over the last year. A value is null when there is not enough history to compute it.
+
+    Args:
+        symbols: the symbols of the stocks
+    """
+    return await asyncio.to_thread(get_indicators, symbols)
+
+@mcp.tool()
+async def get_price_history(symbols: list[str], days: int = 20) -> dict:
+    """This tool provides the daily closing prices of several stock symbols over recent trading days,
+    in a single call: the dates, oldest first, and each symbol's close on each date.
+
+    Args:
+        symbols: the symbols of the stocks
+        days: how many trading days of history, up to a year
+    """
+    return await asyncio.to_thread(get_history, symbols, days)
+
+@mcp.resource("market://price_cache_stats")
+async def read_price_cache_stats_resource() -> str:
+    return json.dumps(price_cache.stats())
 
 if __name__ == "__main__":
-    mcp.run(transport='stdio')
\ No newline at end of file
+    run(mcp)
\ No newline at end of file
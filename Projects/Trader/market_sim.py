@@ -0,0 +1,201 @@
+"""
+A deterministic, offline market: a stand-in for Polygon that prices any symbol, at any time,
+the same way on every call and in every process.
+
+Each symbol follows a geometric Brownian motion whose drift, volatility, price on the
+REFERENCE day and market beta are derived from a hash of its ticker. Symbols are correlated through a single
+market factor: a symbol's Brownian path is beta * market + sqrt(1 - beta^2) * its own.
+
+Every random number is a hash of (seed, symbol, time step) rather than a draw from a stateful
+generator, so a price depends only on the seed, the symbol and the time - not on which other
+symbols were asked for, or in what order. That lets a path be evaluated at any date without
+generating it from the start: the path is pinned down every BLOCK trading days, and the days
+within a block, and the minutes within a session, are filled in with Brownian bridges between
+those fixed points. Whole universes of symbols are priced in one vectorized NumPy pass.
+
+Trading days are counted from ANCHOR, and sessions follow the exchange calendar in
+market_calendar.py; every session is simulated as SESSION_MINUTES minutes long, and on an
+early close the minutes are compressed so that the day's close is reached at 13:00.
+"""
+
+import os
+import zlib
+from datetime import date, datetime, timedelta
+import numpy as np
+from dotenv import load_dotenv
+from market_calendar import NEW_YORK, OPEN, holidays, is_trading_day, session
+
+load_dotenv(override=True)
+
+MARKET_SIM_SEED = int(os.getenv("MARKET_SIM_SEED", "42"))
+
+ANCHOR = np.datetime64("2000-01-03")
+REFERENCE = date(2025, 1, 2)
+BLOCK = 256
+DAYS_PER_YEAR = 252
+SESSION_MINUTES = 390
+MARKET_FACTOR = "^MARKET"
+
+# Counters for the hashed random streams; the high bits keep the streams disjoint
+_PARAMS = np.uint64(1 << 60)
+_BLOCKS = np.uint64(2 << 60)
+_DAYS = np.uint64(3 << 60)
+_MINUTES = np.uint64(4 << 60)
+_VOLUMES = np.uint64(5 << 60)
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _uniforms(x: np.ndarray) -> np.ndarray:
+    """Map hashes to floats uniform on the open interval (0, 1)"""
+    return ((x >> np.uint64(11)).astype(np.float64) + 0.5) / 2.0**53
+
+
+def _normals(keys: np.ndarray, counters: np.ndarray) -> np.ndarray:
+    """Standard normals, one per (key, counter) pair, shaped (len(keys), len(counters))"""
+    x = _splitmix64(keys[:, None] ^ _splitmix64(counters[None, :]))
+    u1, u2 = _uniforms(x), _uniforms(_splitmix64(x))
+    return np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)
+
+
+def _bridge(start: np.ndarray, end: np.ndarray, steps: np.ndarray, scale: float) -> np.ndarray:
+    """
+    Brownian bridge from start to end through the given standard normal increments: a random
+    walk with the drift removed so it lands on end. Returns the path with both endpoints,
+    shaped (len(start), steps.shape[1] + 1).
+    """
+    n = steps.shape[1]
+    walk = np.concatenate([np.zeros((len(start), 1)), np.cumsum(steps * scale, axis=1)], axis=1)
+    fraction = np.arange(n + 1) / n
+    return start[:, None] + walk - fraction * walk[:, -1:] + fraction * (end - start)[:, None]
+
+
+CALENDAR = np.busdaycalendar(holidays=[day for year in range(2000, 2101) for day in holidays(year)])
+
+
+def trading_day(day: date) -> int:
+    """Index of a trading day since ANCHOR; a day the market is closed maps to the trading day before it"""
+    return int(np.busday_count(ANCHOR, np.datetime64(day) + 1, busdaycal=CALENDAR)) - 1
+
+
+def trading_date(index: int) -> date:
+    return np.busday_offset(ANCHOR, index, roll="forward", busdaycal=CALENDAR).astype(date)
+
+
+class MarketSimulator:
+    def __init__(self, seed: int = MARKET_SIM_SEED):
+        self.seed = seed
+
+    def _keys(self, symbols: list[str]) -> np.ndarray:
+        return np.array(
+            [(zlib.crc32(symbol.encode()) << 32 | zlib.crc32(symbol[::-1].encode())) ^ self.seed for symbol in symbols],
+            dtype=np.uint64,
+        )
+
+    def parameters(self, symbols: list[str]) -> dict[str, np.ndarray]:
+        """Annual drift and volatility, market beta and REFERENCE day price of each symbol"""
+        u = _uniforms(_splitmix64(self._keys(symbols)[:, None] ^ (_PARAMS + np.arange(4, dtype=np.uint64))[None, :]))
+        return {
+            "drift": -0.05 + 0.25 * u[:, 0],
+            "volatility": 0.15 + 0.35 * u[:, 1],
+            "beta": 0.3 + 0.6 * u[:, 2],
+            "initial": np.exp(np.log(5.0) + (np.log(500.0) - np.log(5.0)) * u[:, 3]),
+        }
+
+    def _daily_paths(self, keys: np.ndarray, days: np.ndarray) -> np.ndarray:
+        """Standard Brownian motion, in units of trading days, at each of days for each key"""
+        blocks = days // BLOCK
+        last_block = int(blocks.max()) + 1
+        anchors = np.concatenate(
+            [
+                np.zeros((len(keys), 1)),
+                np.cumsum(_normals(keys, _BLOCKS + np.arange(last_block, dtype=np.uint64)) * np.sqrt(BLOCK), axis=1),
+            ],
+            axis=1,
+        )
+        paths = np.empty((len(keys), len(days)))
+        for block in np.unique(blocks):
+            steps = _normals(keys, _DAYS + np.uint64(block * BLOCK) + np.arange(BLOCK, dtype=np.uint64))
+            path = _bridge(anchors[:, block], anchors[:, block + 1], steps, 1.0)
+            in_block = blocks == block
+            paths[:, in_block] = path[:, days[in_block] - block * BLOCK]
+        return paths
+
+    def _correlated(self, symbols: list[str], paths_of) -> np.ndarray:
+        """Combine each symbol's own Brownian paths with the market factor's, weighted by beta"""
+        keys = self._keys([MARKET_FACTOR, *symbols])
+        paths = paths_of(keys)
+        beta = self.parameters(symbols)["beta"][:, None, ...]
+        return beta * paths[:1] + np.sqrt(1.0 - beta**2) * paths[1:]
+
+    def _prices(self, symbols: list[str], paths: np.ndarray, days: np.ndarray) -> np.ndarray:
+        """Geometric Brownian motion through the given paths, measured from the REFERENCE day"""
+        p = self.parameters(symbols)
+        reference = trading_day(REFERENCE)
+        paths = paths - self._correlated(symbols, lambda keys: self._daily_paths(keys, np.array([reference])))
+        years = (days - reference) / DAYS_PER_YEAR
+        sigma = p["volatility"][:, None]
+        log_price = np.log(p["initial"])[:, None] + (p["drift"][:, None] - sigma**2 / 2) * years + sigma * paths / np.sqrt(DAYS_PER_YEAR)
+        return np.maximum(np.round(np.exp(log_price), 2), 0.01)
+
+    def _closes(self, symbols: list[str], days: np.ndarray) -> np.ndarray:
+        paths = self._correlated(symbols, lambda keys: self._daily_paths(keys, days))
+        return self._prices(symbols, paths, days)
+
+    def closes(self, symbols: list[str], start: date, end: date) -> tuple[list[date], np.ndarray]:
+        """Closing prices on every trading day from start to end, shaped (len(symbols), days)"""
+        days = np.arange(max(trading_day(start - timedelta(days=1)) + 1, 0), trading_day(end) + 1)
+        if not len(days):
+            return [], np.empty((len(symbols), 0))
+        return [trading_date(int(d)) for d in days], self._closes(symbols, days)
+
+    def intraday(self, symbols: list[str], day: date) -> np.ndarray:
+        """
+        Minute-by-minute prices through the session of a trading day, shaped
+        (len(symbols), SESSION_MINUTES + 1): the previous close, then the price at the end of
+        each minute, ending at the day's close.
+        """
+        d = trading_day(day)
+
+        def paths_of(keys):
+            ends = self._daily_paths(keys, np.array([max(d - 1, 0), d]))
+            steps = _normals(keys, _MINUTES + np.uint64(d * 512) + np.arange(SESSION_MINUTES, dtype=np.uint64))
+            return _bridge(ends[:, 0], ends[:, 1], steps, np.sqrt(1.0 / SESSION_MINUTES))
+
+        paths = self._correlated(symbols, paths_of)
+        minutes = max(d - 1, 0) + np.arange(SESSION_MINUTES + 1) / SESSION_MINUTES
+        return self._prices(symbols, paths, minutes)
+
+    def bars(self, symbols: list[str], day: date) -> list[tuple]:
+        """The day's (symbol, open, high, low, close, volume) bars, as in a grouped-daily result"""
+        ticks = self.intraday(symbols, day)[:, 1:]
+        base = 10 ** (5 + 2.5 * _uniforms(_splitmix64(self._keys(symbols) ^ _VOLUMES)))
+        volume = np.round(base * np.exp(0.3 * _normals(self._keys(symbols), np.array([_VOLUMES + np.uint64(trading_day(day))]))[:, 0]))
+        return list(zip(symbols, ticks[:, 0].tolist(), ticks.max(axis=1).tolist(), ticks.min(axis=1).tolist(), ticks[:, -1].tolist(), volume.tolist()))
+
+    def prices(self, symbols: list[str], when: datetime | None = None) -> dict[str, float]:
+        """
+        The price of each symbol at a moment: the latest minute's tick during a session,
+        otherwise the last close.
+        """
+        when = (when or datetime.now(NEW_YORK)).astimezone(NEW_YORK)
+        day = when.date()
+        hours = session(day)
+        if hours and hours[0] <= when < hours[1]:
+            minute = int((when - hours[0]) / (hours[1] - hours[0]) * SESSION_MINUTES)
+            values = self.intraday(symbols, day)[:, minute]
+        else:
+            d = trading_day(day)
+            if is_trading_day(day) and when.time() < OPEN:
+                d -= 1
+            values = self._closes(symbols, np.array([max(d, 0)]))[:, 0]
+        return dict(zip(symbols, values.tolist()))
+
+
+simulator = MarketSimulator()
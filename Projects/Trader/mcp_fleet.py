@@ -0,0 +1,216 @@
+"""
+Long-lived MCP servers for the agents, shared by every trader and kept running between cycles.
+
+Starting a server means launching its process, often through uvx or npx, which resolve their
+packages first, and running the initialize handshake; doing that for every server of every
+trader on every cycle dominated the time before a trader made its first model call. The fleet
+starts each distinct server once, the first time a trader asks for it, and hands the same
+connected server to every trader that asks for the same params:
+
+- stateless servers (accounts, push, market, fetch, search) take the trader's name in their
+  tool calls, so one process serves all the traders
+- servers with per-trader params, like each trader's memory database, get one process per
+  trader, which is kept warm between cycles instead of being started again
+- params with a url are for servers already running with --transport http, shared with other
+  processes too; the fleet only keeps a client session to each
+
+Each server is connected, and restarted, by a task of its own, since the stdio transport has to
+be entered and exited from the same task. A supervisor pings every server each
+CHECK_EVERY_SECONDS and restarts any that does not answer; a server that fails to start is
+retried with a growing backoff. report() shows how long each server took to start. Tool lists
+are cached by mcp_tool_cache.py, across connections and runs.
+"""
+
+import asyncio
+import json
+import os
+import time
+import weakref
+from agents.mcp import MCPServer
+from dotenv import load_dotenv
+from mcp_tool_cache import CachedMCPServerStdio, CachedMCPServerStreamableHttp
+
+load_dotenv(override=True)
+
+CHECK_EVERY_SECONDS = float(os.getenv("MCP_FLEET_CHECK_SECONDS", "30"))
+START_TIMEOUT_SECONDS = float(os.getenv("MCP_FLEET_START_TIMEOUT_SECONDS", "120"))
+PING_TIMEOUT_SECONDS = 5.0
+STOP_TIMEOUT_SECONDS = 5.0
+MAX_BACKOFF_SECONDS = 60.0
+CLIENT_SESSION_TIMEOUT_SECONDS = 120
+
+SECRET_WORDS = ("KEY", "TOKEN", "SECRET", "PASSWORD")
+
+
+def server_key(params: dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+def server_label(params: dict) -> str:
+    """The URL of a server, or its command line with the env settings that tell its instances apart"""
+    if "url" in params:
+        return params["url"]
+    env = [
+        f"{name}={value}"
+        for name, value in sorted((params.get("env") or {}).items())
+        if not any(word in name.upper() for word in SECRET_WORDS)
+    ]
+    return " ".join([params["command"], *params.get("args", []), *env])
+
+
+class ManagedServer:
+    """One server process, connected and restarted by a task of its own"""
+
+    def __init__(self, params: dict):
+        self.params = params
+        self.label = server_label(params)
+        # Params with a url are for a shared server, already running with --transport http
+        server_class = CachedMCPServerStreamableHttp if "url" in params else CachedMCPServerStdio
+        self.server = server_class(params, name=self.label, client_session_timeout_seconds=CLIENT_SESSION_TIMEOUT_SECONDS)
+        self.starts = 0
+        self.failures = 0
+        self.start_seconds: list[float] = []
+        self._attempt = self._new_attempt()
+        self._restart = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run(), name=f"mcp server {self.label}")
+
+    def _new_attempt(self) -> asyncio.Future:
+        attempt = asyncio.get_running_loop().create_future()
+        # A failed start is reported to the callers of ready(), if there are any
+        attempt.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return attempt
+
+    async def _run(self) -> None:
+        while not self._closing:
+            if self._attempt.done():
+                self._attempt = self._new_attempt()
+            self._restart.clear()
+            started = time.monotonic()
+            try:
+                await self.server.connect()
+            except Exception as e:
+                self.failures += 1
+                delay = min(MAX_BACKOFF_SECONDS, 2.0 ** self.failures)
+                print(f"MCP server {self.label} failed to start due to {e}; retrying in {delay:.0f}s")
+                self._attempt.set_exception(RuntimeError(f"MCP server {self.label} failed to start: {e}"))
+                try:
+                    await asyncio.wait_for(self._restart.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.starts += 1
+            self.failures = 0
+            self.start_seconds.append(time.monotonic() - started)
+            self._attempt.set_result(self.server)
+            try:
+                await self._restart.wait()
+            finally:
+                self._attempt = self._new_attempt()
+                await self.server.cleanup()
+
+    async def ready(self) -> MCPServer:
+        """The connected server, waiting while it starts; raises if its last start failed"""
+        return await asyncio.wait_for(asyncio.shield(self._attempt), START_TIMEOUT_SECONDS)
+
+    def running(self) -> bool:
+        return self.server.session is not None and not self._restart.is_set()
+
+    async def healthy(self) -> bool:
+        session = self.server.session
+        if session is None:
+            return False
+        try:
+            await asyncio.wait_for(session.send_ping(), PING_TIMEOUT_SECONDS)
+            return True
+        except Exception:
+            return False
+
+    def restart(self) -> None:
+        self._restart.set()
+
+    async def stop(self) -> None:
+        self._closing = True
+        self._restart.set()
+        try:
+            await asyncio.wait_for(self._task, STOP_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._attempt.cancel()
+
+
+class ServerFleet:
+    def __init__(self):
+        self._servers: dict[str, ManagedServer] = {}
+        self._supervisor: asyncio.Task | None = None
+        self._reported_starts = 0
+
+    async def servers(self, params_list: list[dict]) -> list[MCPServer]:
+        """Connected servers for these params, starting the ones that are not running yet together"""
+        if self._supervisor is None:
+            self._supervisor = asyncio.create_task(self._supervise(), name="mcp fleet supervisor")
+        managed = []
+        for params in params_list:
+            key = server_key(params)
+            if key not in self._servers:
+                self._servers[key] = ManagedServer(params)
+            managed.append(self._servers[key])
+        return list(await asyncio.gather(*[server.ready() for server in managed]))
+
+    async def _check(self, managed: ManagedServer) -> None:
+        if managed.running() and not await managed.healthy():
+            print(f"MCP server {managed.label} stopped answering; restarting it")
+            managed.restart()
+
+    async def _supervise(self) -> None:
+        while True:
+            await asyncio.sleep(CHECK_EVERY_SECONDS)
+            await asyncio.gather(*[self._check(managed) for managed in list(self._servers.values())])
+
+    def starts(self) -> int:
+        return sum(managed.starts for managed in self._servers.values())
+
+    def report(self, changed_only: bool = False) -> str | None:
+        """
+        A table of every server with its starts and start times, or None when changed_only is
+        set and no server has started since the last report
+        """
+        starts = self.starts()
+        if changed_only and starts == self._reported_starts:
+            return None
+        self._reported_starts = starts
+        lines = [f"{'MCP server':<64}{'starts':>7}{'first s':>9}{'last s':>8}  status"]
+        for managed in self._servers.values():
+            first = f"{managed.start_seconds[0]:.2f}" if managed.start_seconds else "-"
+            last = f"{managed.start_seconds[-1]:.2f}" if managed.start_seconds else "-"
+            status = "running" if managed.running() else f"down, {managed.failures} failed starts"
+            lines.append(f"{managed.label[:63]:<64}{managed.starts:>7}{first:>9}{last:>8}  {status}")
+        total = sum(sum(managed.start_seconds) for managed in self._servers.values())
+        lines.append(f"{len(self._servers)} servers, {starts} starts, {total:.1f}s spent starting them")
+        return "\n".join(lines)
+
+    async def close(self) -> None:
+        """Stop the supervisor and every server"""
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+        servers, self._servers = list(self._servers.values()), {}
+        await asyncio.gather(*[managed.stop() for managed in servers])
+
+
+_fleets: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_fleet() -> ServerFleet:
+    """The server fleet of the running event loop"""
+    loop = asyncio.get_running_loop()
+    fleet = _fleets.get(loop)
+    if fleet is None:
+        fleet = _fleets[loop] = ServerFleet()
+    return fleet
+
+
+async def close_fleet() -> None:
+    fleet = _fleets.pop(asyncio.get_running_loop(), None)
+    if fleet:
+        await fleet.close()
@@ -0,0 +1,59 @@
+"""
+One MCP server with the tools and resources of the accounts, market, push and datetime servers.
+
+A trader connected to each of those servers separately, with a process, an initialize handshake
+and a list_tools call for each, and every process kept caches of its own. The gateway imports
+the servers into a single process and registers their tools under names prefixed with the
+server's namespace, like accounts_execute_orders or market_lookup_share_prices, so tools of
+different servers can never collide; resources keep their URIs, whose schemes already tell the
+servers apart. Every tool shares the process's price cache and account cache, so a trade is
+filled at the price the trader just looked up without fetching it again, and an account loaded
+by one tool is cached for the next.
+
+Runs on any transport, like the servers it mounts: uv run mcp_gateway.py [--transport http]
+"""
+
+from mcp.server.fastmcp import FastMCP
+from mcp_transport import run
+import accounts_server
+import datetime_server
+import market_server
+import push_server
+
+NAMESPACES = {
+    "accounts": accounts_server.mcp,
+    "market": market_server.mcp,
+    "push": push_server.mcp,
+    "datetime": datetime_server.mcp,
+}
+
+mcp = FastMCP("mcp_gateway")
+
+
+def mount(gateway: FastMCP, namespace: str, server: FastMCP) -> None:
+    """Register the tools of server on gateway as namespace_tool, and its resources unchanged"""
+    # FastMCP has no public way to list a server's tools and resources along with their functions
+    for tool in server._tool_manager.list_tools():
+        gateway.add_tool(
+            tool.fn,
+            name=f"{namespace}_{tool.name}",
+            title=tool.title,
+            description=tool.description,
+            annotations=tool.annotations,
+        )
+    for resource in server._resource_manager.list_resources():
+        gateway.resource(
+            str(resource.uri), name=resource.name, description=resource.description, mime_type=resource.mime_type
+        )(resource.fn)
+    for template in server._resource_manager.list_templates():
+        gateway.resource(
+            template.uri_template, name=template.name, description=template.description, mime_type=template.mime_type
+        )(template.fn)
+
+
+for namespace, server in NAMESPACES.items():
+    mount(mcp, namespace, server)
+
+
+if __name__ == "__main__":
+    run(mcp)
@@ -0,0 +1,164 @@
+"""
+Long-lived MCP client sessions, shared by every call to the same server.
+
+Opening a session to a stdio server means starting its process and running the initialize
+handshake, which costs far more than the request itself. SessionPool keeps one session per
+server, keyed by its StdioServerParameters, started lazily on first use:
+
+- a session that has been idle for PING_AFTER_SECONDS is pinged before it is used, and
+  restarted if it does not answer within PING_TIMEOUT_SECONDS
+- a request that fails on a session that no longer answers pings restarts the session; it is
+  retried once on the fresh one only if it is idempotent, like listing tools or reading a
+  resource, since a tool call such as a trade may have taken effect before the server died
+- close() shuts every session down, ending its server process
+
+Each session runs in a task of its own, since the stdio transport has to be entered and exited
+from the same task; requests from any task on the loop share it. There is one pool per event
+loop, from get_session_pool().
+"""
+
+import asyncio
+import os
+import time
+import weakref
+from datetime import timedelta
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+PING_AFTER_SECONDS = float(os.getenv("MCP_PING_AFTER_SECONDS", "30"))
+PING_TIMEOUT_SECONDS = float(os.getenv("MCP_PING_TIMEOUT_SECONDS", "5"))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("MCP_REQUEST_TIMEOUT_SECONDS", "120"))
+STOP_TIMEOUT_SECONDS = 5.0
+
+
+def params_key(params: StdioServerParameters) -> tuple:
+    return (params.command, tuple(params.args), tuple(sorted((params.env or {}).items())), str(params.cwd or ""))
+
+
+class PooledSession:
+    """One server process and its client session, owned by a background task"""
+
+    def __init__(self, params: StdioServerParameters):
+        self.params = params
+        self.session: ClientSession | None = None
+        self.last_used = 0.0
+        self.starts = 0
+        self._task: asyncio.Task | None = None
+        self._closing: asyncio.Event | None = None
+
+    async def _own(self, ready: asyncio.Future) -> None:
+        try:
+            async with stdio_client(self.params) as streams:
+                async with ClientSession(*streams, read_timeout_seconds=timedelta(seconds=REQUEST_TIMEOUT_SECONDS)) as session:
+                    await session.initialize()
+                    self.session = session
+                    ready.set_result(session)
+                    await self._closing.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+        finally:
+            self.session = None
+
+    async def start(self) -> ClientSession:
+        self._closing = asyncio.Event()
+        ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._own(ready), name=f"mcp session {' '.join([self.params.command, *self.params.args])}")
+        self.starts += 1
+        self.last_used = time.monotonic()
+        return await ready
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._closing.set()
+        try:
+            await asyncio.wait_for(self._task, STOP_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._task = None
+
+    def running(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def healthy(self) -> bool:
+        if not self.running():
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), PING_TIMEOUT_SECONDS)
+            return True
+        except Exception:
+            return False
+
+
+class SessionPool:
+    def __init__(self):
+        self._sessions: dict[tuple, PooledSession] = {}
+        self._locks: dict[tuple, asyncio.Lock] = {}
+
+    async def session(self, params: StdioServerParameters) -> ClientSession:
+        """A started, answering session to the server, starting or restarting it as needed"""
+        key = params_key(params)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            pooled = self._sessions.setdefault(key, PooledSession(params))
+            idle = time.monotonic() - pooled.last_used
+            if not pooled.running() or (idle > PING_AFTER_SECONDS and not await pooled.healthy()):
+                await pooled.stop()
+                await pooled.start()
+            pooled.last_used = time.monotonic()
+            return pooled.session
+
+    async def call(self, params: StdioServerParameters, request, idempotent: bool = False):
+        """
+        Run request(session), an awaitable MCP request, on the pooled session to the server. If it
+        fails because the session has died, the session is restarted, and an idempotent request
+        is run once more on it; any other request fails, as it may already have taken effect.
+        """
+        session = await self.session(params)
+        try:
+            return await request(session)
+        except Exception:
+            pooled = self._sessions[params_key(params)]
+            if pooled.session is session and await pooled.healthy():
+                raise
+            print(f"MCP session to {params.command} {' '.join(params.args)} was lost; restarting it")
+            async with self._locks[params_key(params)]:
+                if pooled.session is session or not pooled.running():
+                    await pooled.stop()
+                    await pooled.start()
+            if not idempotent:
+                raise
+            return await request(await self.session(params))
+
+    async def close(self) -> None:
+        """Shut down every session and its server process"""
+        sessions, self._sessions = list(self._sessions.values()), {}
+        await asyncio.gather(*[pooled.stop() for pooled in sessions])
+
+    def stats(self) -> dict:
+        return {
+            " ".join([pooled.params.command, *pooled.params.args]): {"running": pooled.running(), "starts": pooled.starts}
+            for pooled in self._sessions.values()
+        }
+
+
+_pools: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_session_pool() -> SessionPool:
+    """The session pool of the running event loop"""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = SessionPool()
+    return pool
+
+
+async def close_session_pool() -> None:
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool:
+        await pool.close()
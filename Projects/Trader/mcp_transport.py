@@ -0,0 +1,103 @@
+"""
+Runs an MCP server on the transport chosen on its command line.
+
+By default a server runs over stdio, as the child process of the one client that started it.
+Its stdout then carries the protocol, so the servers and the modules they use print their
+diagnostics to stderr.
+With --transport http it serves streamable HTTP at http://host:port/mcp instead, where one
+process serves every client, each request in a task of its own, so many requests from many
+clients are handled concurrently. Replies are plain JSON rather than event streams. --workers
+starts that many processes sharing the port; the server is then stateless, so that any worker
+can answer any request and a client needs no session affinity, at the cost of setting up each
+request from scratch. GET /health answers with the server's name and process id.
+--transport sse serves the older SSE transport, for clients that only speak that; its
+sessions live in one process, so it runs a single worker.
+
+Usage: uv run accounts_server.py [--transport stdio|http|sse] [--host 127.0.0.1] [--port 8101] [--workers 1]
+"""
+
+import argparse
+import importlib
+import os
+import sys
+from mcp.server.fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+MCP_HOST = os.getenv("MCP_HOST", "127.0.0.1")
+HTTP_PORTS = {"mcp_gateway": 8100, "accounts_server": 8101, "market_server": 8102, "push_server": 8103, "datetime_server": 8104}
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+# How a worker process finds the server it runs
+SERVER_MODULE = "MCP_SERVER_MODULE"
+SERVER_HOST = "MCP_SERVER_HOST"
+SERVER_PORT = "MCP_SERVER_PORT"
+
+
+def http_port(server: str) -> int:
+    return int(os.getenv(f"{server.upper()}_PORT", HTTP_PORTS[server]))
+
+
+def http_url(server: str) -> str:
+    return f"http://{MCP_HOST}:{http_port(server)}/mcp"
+
+
+def configure_http(mcp: FastMCP, host: str, port: int, stateless: bool = False) -> FastMCP:
+    mcp.settings.host = host
+    mcp.settings.port = port
+    mcp.settings.stateless_http = stateless
+    mcp.settings.json_response = True
+    if host not in LOCAL_HOSTS:
+        # FastMCP only accepts requests addressed to localhost unless told otherwise
+        mcp.settings.transport_security = None
+
+    @mcp.custom_route("/health", methods=["GET"])
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({"status": "ok", "server": mcp.name, "pid": os.getpid()})
+
+    return mcp
+
+
+def create_app():
+    """The ASGI app of one worker process, for the server named in its environment"""
+    module = importlib.import_module(os.environ[SERVER_MODULE])
+    mcp = configure_http(module.mcp, os.environ[SERVER_HOST], int(os.environ[SERVER_PORT]), stateless=True)
+    return mcp.streamable_http_app()
+
+
+def run(mcp: FastMCP) -> None:
+    """Run the server of the __main__ module on the transport given on the command line"""
+    module = os.path.splitext(os.path.basename(sys.modules["__main__"].__file__))[0]
+    parser = argparse.ArgumentParser(description=f"The {mcp.name} MCP server")
+    parser.add_argument("--transport", choices=["stdio", "http", "sse"], default="stdio")
+    parser.add_argument("--host", default=MCP_HOST, help="address to serve HTTP on")
+    parser.add_argument("--port", type=int, default=http_port(module) if module in HTTP_PORTS else 8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("MCP_WORKERS", "1")), help="HTTP worker processes")
+    args = parser.parse_args()
+
+    if args.transport == "stdio":
+        mcp.run(transport="stdio")
+        return
+
+    import uvicorn
+
+    log_level = mcp.settings.log_level.lower()
+    if args.transport == "sse":
+        app = configure_http(mcp, args.host, args.port).sse_app()
+        uvicorn.run(app, host=args.host, port=args.port, log_level=log_level)
+    elif args.workers > 1:
+        os.environ.update({SERVER_MODULE: module, SERVER_HOST: args.host, SERVER_PORT: str(args.port)})
+        uvicorn.run(
+            "mcp_transport:create_app",
+            factory=True,
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            log_level=log_level,
+        )
+    else:
+        app = configure_http(mcp, args.host, args.port).streamable_http_app()
+        uvicorn.run(app, host=args.host, port=args.port, log_level=log_level)
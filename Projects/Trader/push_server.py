@@ -1,15 +1,8 @@
-import os
-from dotenv import load_dotenv
-import requests
+import sys
 from pydantic import BaseModel, Field
 from mcp.server.fastmcp import FastMCP
-
-load_dotenv(override=True)
-
-pushover_user = os.getenv("PUSHOVER_USER")
-pushover_token = os.getenv("PUSHOVER_TOKEN")
-pushover_url = "https://api.pushover.net/1/messages.json"
-
+from mcp_transport import run
+from push_dispatcher import push_dispatcher
 
 mcp = FastMCP("push_server")
 
@@ -19,13 +12,14 @@ class PushModelArgs(BaseModel):
 
 
 @mcp.tool()
-def push(args: PushModelArgs):
+async def push(args: PushModelArgs):
     """Send a push notification with this brief message"""
-    print(f"Push: {args.message}")
-    payload = {"user": pushover_user, "token": pushover_token, "message": args.message}
-    requests.post(pushover_url, data=payload)
-    return "Push notification sent"
+    print(f"Push: {args.message}", file=sys.stderr)
+    # Sent in the background, coalesced with any other pushes that follow closely
+    if not push_dispatcher.notify(args.message):
+        return "Push notification dropped: too many are waiting to be sent"
+    return "Push notification queued"
 
 
 if __name__ == "__main__":
-    mcp.run(transport="stdio")
+    run(mcp)
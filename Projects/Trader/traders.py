@@ -1,12 +1,9 @@
-from contextlib import AsyncExitStack
 from accounts_client import read_accounts_resource, read_strategy_resource
 from tracers import make_trace_id
 from agents import Agent, Tool, Runner, OpenAIChatCompletionsModel, trace
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
 import os
-import json
-from agents.mcp import MCPServerStdio
 from templates import (
     researcher_instructions,
     trader_instructions,
@@ -15,6 +12,7 @@ from templates import (
     research_tool,
 )
 from mcp_params import trader_mcp_server_params, researcher_mcp_server_params
+from mcp_fleet import get_fleet
 
 load_dotenv(override=True)
 
@@ -84,10 +82,7 @@ class Trader:
         return self.agent
 
     async def get_account_report(self) -> str:
-        account = await read_accounts_resource(self.name)
-        account_json = json.loads(account)
-        account_json.pop("portfolio_value_time_series", None)
-        return json.dumps(account_json)
+        return await read_accounts_resource(self.name)
 
     async def run_agent(self, trader_mcp_servers, researcher_mcp_servers):
         self.agent = await self.create_agent(trader_mcp_servers, researcher_mcp_servers)
@@ -101,21 +96,11 @@ class Trader:
         await Runner.run(self.agent, message, max_turns=MAX_TURNS)
 
     async def run_with_mcp_servers(self):
-        async with AsyncExitStack() as stack:
-            trader_mcp_servers = [
-                await stack.enter_async_context(
-                    MCPServerStdio(params, client_session_timeout_seconds=120)
-                )
-                for params in trader_mcp_server_params
-            ]
-            async with AsyncExitStack() as stack:
-                researcher_mcp_servers = [
-                    await stack.enter_async_context(
-                        MCPServerStdio(params, client_session_timeout_seconds=120)
-                    )
-                    for params in researcher_mcp_server_params(self.name)
-                ]
-                await self.run_agent(trader_mcp_servers, researcher_mcp_servers)
+        # The servers are shared with the other traders and stay up between cycles
+        fleet = get_fleet()
+        trader_mcp_servers = await fleet.servers(trader_mcp_server_params)
+        researcher_mcp_servers = await fleet.servers(researcher_mcp_server_params(self.name))
+        await self.run_agent(trader_mcp_servers, researcher_mcp_servers)
 
     async def run_with_trace(self):
         trace_name = f"{self.name}-trading" if self.do_trade else f"{self.name}-rebalancing"
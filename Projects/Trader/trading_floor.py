@@ -3,8 +3,13 @@ from typing import List
 import asyncio
 from tracers import LogTracer
 from agents import add_trace_processor
-from market import is_market_open
+from market_calendar import NEW_YORK, is_market_open, next_open
+from valuation import run_valuations
+import price_board
+from mcp_pool import close_session_pool
+from mcp_fleet import close_fleet, get_fleet
 from dotenv import load_dotenv
+from datetime import datetime, timedelta
 import os
 
 load_dotenv(override=True)
@@ -43,12 +48,34 @@ def create_traders() -> List[Trader]:
 async def run_every_n_minutes():
     add_trace_processor(LogTracer())
     traders = create_traders()
-    while True:
-        if RUN_EVEN_WHEN_MARKET_IS_CLOSED or is_market_open():
-            await asyncio.gather(*[trader.run() for trader in traders])
-        else:
-            print("Market is closed, skipping run")
-        await asyncio.sleep(RUN_EVERY_N_MINUTES * 60)
+    board = price_board.start_process()
+    valuations = asyncio.create_task(run_valuations(names))
+    try:
+        while True:
+            if RUN_EVEN_WHEN_MARKET_IS_CLOSED or is_market_open():
+                await asyncio.gather(*[trader.run() for trader in traders])
+                report = get_fleet().report(changed_only=True)
+                if report:
+                    print(report)
+            else:
+                print("Market is closed, skipping run")
+            now = datetime.now(NEW_YORK)
+            wake = now + timedelta(minutes=RUN_EVERY_N_MINUTES)
+            if not RUN_EVEN_WHEN_MARKET_IS_CLOSED and not is_market_open(wake):
+                wake = max(wake, next_open(now))
+                print(f"Market is closed, next run at {wake:%Y-%m-%d %H:%M %Z}")
+            await asyncio.sleep((wake - now).total_seconds())
+    finally:
+        valuations.cancel()
+        try:
+            await valuations
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"Valuations stopped early due to {e!r}")
+        await close_fleet()
+        await close_session_pool()
+        await asyncio.to_thread(price_board.stop_process, board)
 
 
 if __name__ == "__main__":
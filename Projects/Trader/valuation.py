@@ -0,0 +1,47 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+from accounts import Account
+from database import write_valuation
+from timeseries import record_value
+
+load_dotenv(override=True)
+
+VALUATION_INTERVAL_SECONDS = int(os.getenv("VALUATION_INTERVAL_SECONDS", "300"))
+
+
+def value_account(name: str) -> float:
+    """
+    Price an account's holdings, then record the result both as the latest valuation,
+    which Account.snapshot reads, and as a point in the portfolio value time series.
+    """
+    account = Account.get(name)
+    prices = account.get_prices()
+    value = account.calculate_portfolio_value(prices)
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    write_valuation(name, timestamp, value, prices)
+    record_value(name, value, timestamp)
+    return value
+
+
+async def run_valuations(names: list[str], interval: int = VALUATION_INTERVAL_SECONDS):
+    """
+    Value every account on a fixed cadence, aligned to multiples of interval seconds, so
+    points are evenly spaced however long each pass or each trader run takes. This is the
+    only writer of valuations; reports and the dashboard just read the latest one.
+    """
+    while True:
+        for name in names:
+            try:
+                await asyncio.to_thread(value_account, name)
+            except Exception as e:
+                print(f"Error valuing {name}: {e}")
+        await asyncio.sleep(interval - time.time() % interval)
+
+
+if __name__ == "__main__":
+    from trading_floor import names
+    print(f"Valuing {', '.join(names)} every {VALUATION_INTERVAL_SECONDS} seconds")
+    asyncio.run(run_valuations(names))